@@ -2,13 +2,16 @@
 import streamlit as st
 from src import render_ui
 
-# 1. 页面基础设置
-st.set_page_config(
-    page_title="Secret", 
-    page_icon="🔞", 
-    layout="wide",
-    initial_sidebar_state="auto"
-)
+# 文档提取进程池以 spawn 方式启动子进程，子进程会以 __mp_main__ 的名字重新导入本脚本，
+# 页面代码只在 Streamlit 运行脚本（__name__ == "__main__"）时执行
+if __name__ == "__main__":
+    # 1. 页面基础设置
+    st.set_page_config(
+        page_title="Secret", 
+        page_icon="🔞", 
+        layout="wide",
+        initial_sidebar_state="auto"
+    )
 
-# 2. 渲染主UI
-render_ui()
\ No newline at end of file
+    # 2. 渲染主UI
+    render_ui()
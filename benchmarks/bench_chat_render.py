@@ -0,0 +1,148 @@
+# 基准测试 - 在无头浏览器中测量聊天记录的首次渲染与重跑耗时（旧版每条消息 iframe vs 页面级工具栏组件）
+# 需要: pip install playwright && playwright install chromium
+# 无法安装浏览器时可用 --server-only，通过 websocket 直接驱动脚本运行，只测量服务端耗时与发送的数据量
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_render_app.py")
+
+# 所有 iframe 都已加载完成（旧版每条消息都有组件 iframe）
+IFRAMES_READY = """() => [...document.querySelectorAll('iframe')].every(
+    f => { try { return f.contentDocument && f.contentDocument.readyState === 'complete'; } catch (e) { return true; } }
+)"""
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port):
+    """
+    后台启动基准测试页面，等待端口可连接
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Streamlit 启动超时")
+
+
+def measure(page, base_url, n, mode, timeout):
+    """
+    Returns:
+        tuple: (首次渲染毫秒, 重跑毫秒, iframe 数量)
+    """
+    start = time.perf_counter()
+    page.goto(f"{base_url}/?n={n}&mode={mode}")
+    page.wait_for_selector("#bench-done", state="attached", timeout=timeout)
+    page.wait_for_function(IFRAMES_READY, timeout=timeout)
+    first = (time.perf_counter() - start) * 1000
+
+    run = int(page.get_attribute("#bench-done", "data-run"))
+    start = time.perf_counter()
+    page.click(".st-key-bench_rerun button")
+    page.wait_for_function(
+        f"() => Number(document.querySelector('#bench-done')?.getAttribute('data-run')) > {run}", timeout=timeout
+    )
+    page.wait_for_function(IFRAMES_READY, timeout=timeout)
+    rerun = (time.perf_counter() - start) * 1000
+    return first, rerun, page.locator("iframe").count()
+
+
+def measure_server(port, n, mode, timeout):
+    """
+    不经过浏览器：通过 websocket 请求两次脚本运行（首次 + 重跑），统计脚本耗时、
+    发送给前端的数据量以及组件元素数（components.html 的 iframe、自定义组件与 st_copy 等新版组件）
+
+    Returns:
+        tuple: (首次运行毫秒, 重跑毫秒, 首次发送字节数, 组件元素数)
+    """
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    async def run_once(ws):
+        msg = BackMsg()
+        msg.rerun_script.query_string = f"n={n}&mode={mode}"
+        start = time.perf_counter()
+        await ws.send(msg.SerializeToString())
+        size = widgets = 0
+        while True:
+            data = await asyncio.wait_for(ws.recv(), timeout / 1000)
+            size += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                if forward.delta.new_element.WhichOneof("type") in ("iframe", "component_instance", "bidi_component"):
+                    widgets += 1
+            elif kind == "script_finished":
+                return (time.perf_counter() - start) * 1000, size, widgets
+
+    async def run():
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+            first, size, widgets = await run_once(ws)
+            rerun, _, _ = await run_once(ws)
+        return first, rerun, size, widgets
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="聊天记录浏览器渲染基准测试")
+    parser.add_argument("--sizes", default="20,100,200,400", help="消息数量列表（逗号分隔）")
+    parser.add_argument("--repeat", type=int, default=3, help="每组重复次数，取中位数")
+    parser.add_argument("--timeout", type=int, default=120000, help="单次等待的超时（毫秒）")
+    parser.add_argument("--server-only", action="store_true", help="不启动浏览器，只测量服务端脚本耗时与数据量")
+    args = parser.parse_args()
+
+    port = _free_port()
+    process = start_app(port)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        if args.server_only:
+            print(f"{'消息数':>6} {'模式':<8} {'组件':>7} {'首次运行(ms)':>13} {'重跑(ms)':>10} {'发送(KB)':>9}")
+            for n in [int(x) for x in args.sizes.split(",")]:
+                for mode in ("legacy", "toolbar"):
+                    samples = [measure_server(port, n, mode, args.timeout) for _ in range(args.repeat)]
+                    first = sorted(s[0] for s in samples)[len(samples) // 2]
+                    rerun = sorted(s[1] for s in samples)[len(samples) // 2]
+                    print(f"{n:>6} {mode:<8} {samples[-1][3]:>7} {first:>13.0f} {rerun:>10.0f} {samples[-1][2] / 1024:>9.1f}")
+            return
+
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            page = browser.new_page()
+            print(f"{'消息数':>6} {'模式':<8} {'iframe':>7} {'首次渲染(ms)':>13} {'重跑(ms)':>10}")
+            for n in [int(x) for x in args.sizes.split(",")]:
+                for mode in ("legacy", "toolbar"):
+                    samples = [measure(page, base_url, n, mode, args.timeout) for _ in range(args.repeat)]
+                    first = sorted(s[0] for s in samples)[len(samples) // 2]
+                    rerun = sorted(s[1] for s in samples)[len(samples) // 2]
+                    print(f"{n:>6} {mode:<8} {samples[-1][2]:>7} {first:>13.0f} {rerun:>10.0f}")
+            browser.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
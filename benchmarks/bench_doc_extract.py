@@ -0,0 +1,144 @@
+# 基准测试 - 按格式测量文档文本提取的吞吐（单进程 vs 进程池）与体积缩减
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.doc_extract import extract_text, PdfReader
+
+WORDS = ["季度", "收入", "同比", "增长", "项目", "进度", "风险", "the", "report", "summary", "data", "分析"]
+
+
+def _sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def build_docx(paragraphs, seed=0, image_kb=200):
+    """
+    生成包含段落、标题、表格和一张内嵌图片的 DOCX
+    """
+    rng = random.Random(seed)
+    w = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    body = []
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            body.append(f'<w:p><w:pPr><w:pStyle w:val="Heading2"/></w:pPr><w:r><w:t>第 {i // 20 + 1} 节</w:t></w:r></w:p>')
+        body.append(f'<w:p><w:r><w:t>{_sentence(rng)}</w:t></w:r><w:r><w:tab/><w:t>{_sentence(rng, 6)}</w:t></w:r></w:p>')
+        if i % 50 == 49:
+            rows = "".join(
+                "<w:tr>" + "".join(f"<w:tc><w:p><w:r><w:t>{rng.randint(0, 9999)}</w:t></w:r></w:p></w:tc>" for _ in range(4)) + "</w:tr>"
+                for _ in range(5)
+            )
+            body.append(f"<w:tbl>{rows}</w:tbl>")
+    document = f'<?xml version="1.0" encoding="UTF-8"?><w:document {w}><w:body>{"".join(body)}</w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("word/document.xml", document)
+        archive.writestr("word/media/image1.png", os.urandom(image_kb * 1024))
+    return buffer.getvalue()
+
+
+def build_xlsx(rows, cols=8, seed=0):
+    """
+    生成一个工作表的 XLSX，文本列使用共享字符串，其余为数值
+    """
+    rng = random.Random(seed)
+    ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    rel_ns = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+    shared = [f"<si><t>{word}</t></si>" for word in WORDS]
+    sheet_rows = []
+    for r in range(1, rows + 1):
+        cells = [f'<c r="A{r}" t="s"><v>{rng.randrange(len(WORDS))}</v></c>']
+        for c in range(1, cols):
+            cells.append(f'<c r="{chr(65 + c)}{r}"><v>{rng.random() * 1000:.2f}</v></c>')
+        sheet_rows.append(f'<row r="{r}">{"".join(cells)}</row>')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("xl/workbook.xml", f'<workbook {ns} {rel_ns}><sheets><sheet name="数据" sheetId="1" r:id="rId1"/></sheets></workbook>')
+        archive.writestr("xl/_rels/workbook.xml.rels",
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Id="rId1" Target="worksheets/sheet1.xml"/></Relationships>')
+        archive.writestr("xl/sharedStrings.xml", f'<sst {ns}>{"".join(shared)}</sst>')
+        archive.writestr("xl/worksheets/sheet1.xml", f'<worksheet {ns}><sheetData>{"".join(sheet_rows)}</sheetData></worksheet>')
+    return buffer.getvalue()
+
+
+def build_pdf(pages, seed=0):
+    """
+    生成每页若干行 ASCII 文本的最小 PDF
+    """
+    rng = random.Random(seed)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = " ".join(f"({' '.join(rng.choice(['report', 'data', 'summary', 'growth']) for _ in range(10))}) Tj T*" for _ in range(40))
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {len(objects)} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def _extract(args):
+    ok, text = extract_text(*args)
+    assert ok, text
+    return len(text.encode("utf-8"))
+
+
+def measure(fmt, docs, workers):
+    total = sum(len(data) for _, data in docs)
+    start = time.perf_counter()
+    text_bytes = sum(_extract(doc) for doc in docs)
+    single = time.perf_counter() - start
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_extract, docs[:workers]))  # 预热子进程
+        start = time.perf_counter()
+        list(pool.map(_extract, docs))
+        pooled = time.perf_counter() - start
+
+    print(f"{fmt:<6} {len(docs):>4} 个 · 原始 {total / 2**20:7.1f} MB → 文本 {text_bytes / 2**20:6.2f} MB "
+          f"({text_bytes / total:6.1%})   单进程 {total / 2**20 / single:7.1f} MB/s "
+          f"{len(docs) / single:6.1f} 个/s   进程池×{workers} {total / 2**20 / pooled:7.1f} MB/s {len(docs) / pooled:6.1f} 个/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文档文本提取基准测试")
+    parser.add_argument("--docs", type=int, default=16, help="每种格式的文档数量")
+    parser.add_argument("--paragraphs", type=int, default=2000, help="每个 DOCX 的段落数")
+    parser.add_argument("--rows", type=int, default=5000, help="每个 XLSX 的行数")
+    parser.add_argument("--pages", type=int, default=30, help="每个 PDF 的页数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="进程池大小")
+    args = parser.parse_args()
+
+    measure("docx", [("doc.docx", build_docx(args.paragraphs, seed=i)) for i in range(args.docs)], args.workers)
+    measure("xlsx", [("sheet.xlsx", build_xlsx(args.rows, seed=i)) for i in range(args.docs)], args.workers)
+    if PdfReader is None:
+        print("pdf    未安装 pypdf，跳过")
+    else:
+        measure("pdf", [("doc.pdf", build_pdf(args.pages, seed=i)) for i in range(args.docs)], args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# 基准测试 - 对比侧边栏会话列表每次重跑的排序分组开销：旧版逐条解析时间 vs SessionStore 缓存的分组视图
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.session_cache import SessionStore, GROUP_ORDER, parse_session_date
+
+
+def build_sessions(count, seed=0):
+    """
+    生成 count 个会话，更新时间分布在最近一年内，约 1% 置顶，混合两种时间格式
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    sessions = []
+    for i in range(count):
+        updated = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        fmt = "%Y-%m-%dT%H:%M:%S" if i % 2 else "%Y-%m-%d %H:%M:%S"
+        sessions.append({
+            "id": 100000 + i,
+            "name": f"会话 {i}",
+            "model": "bench-model",
+            "topSort": 1 if rng.random() < 0.01 else 0,
+            "updated": updated.strftime(fmt)
+        })
+    return sessions
+
+
+def legacy_group(timestamp_str, is_pinned=False):
+    """
+    旧版 get_session_group：每个会话每次重跑都解析时间并调用 datetime.now()
+    """
+    if is_pinned: return "📌 已置顶"
+    if not timestamp_str: return "未知时间"
+    try:
+        clean_ts = str(timestamp_str).replace('Z', '')
+        dt = datetime.fromisoformat(clean_ts) if 'T' in clean_ts else datetime.strptime(clean_ts, "%Y-%m-%d %H:%M:%S")
+        diff_days = (datetime.now().date() - dt.date()).days
+        if diff_days == 0: return "今天"
+        if diff_days == 1: return "昨天"
+        if diff_days <= 7: return "过去 7 天"
+        if diff_days <= 30: return "过去 30 天"
+        return "更早"
+    except Exception:
+        return "未知时间"
+
+
+def legacy_render(sessions):
+    sessions.sort(key=lambda x: (x.get('topSort', 0), x.get('updated', '')), reverse=True)
+    groups = {}
+    for s in sessions:
+        groups.setdefault(legacy_group(s.get('updated'), is_pinned=s.get('topSort') == 1), []).append(s)
+    return [(name, groups[name]) for name in GROUP_ORDER if name in groups]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="侧边栏会话分组基准测试")
+    parser.add_argument("--sessions", type=int, default=10000, help="会话数量")
+    parser.add_argument("--reruns", type=int, default=20, help="模拟的重跑次数")
+    args = parser.parse_args()
+
+    sessions = build_sessions(args.sessions)
+    legacy_ms, legacy_groups = timed(lambda: legacy_render(list(sessions)), args.reruns)
+
+    parse_session_date.cache_clear()
+    store = SessionStore(sessions)
+    first_ms, groups = timed(lambda: store.grouped(), 1)
+    cached_ms, _ = timed(lambda: store.grouped(), args.reruns)
+
+    # 会话列表变化（例如重命名）后重新分组，时间戳解析结果仍可复用
+    def patched():
+        store.patch(sessions[0]["id"], {"name": "重命名"})
+        return store.grouped()
+    patched_ms, _ = timed(patched, args.reruns)
+    next_day_ms, _ = timed(lambda: store.grouped(date.today() + timedelta(days=1)), 1)
+
+    assert [(g, [s["id"] for s in items]) for g, items in groups] == \
+        [(g, [s["id"] for s in items]) for g, items in legacy_groups], "分组结果与旧版不一致"
+
+    print(f"会话数: {args.sessions}   重跑次数: {args.reruns}")
+    print(f"旧版 (每次排序 + 逐条解析)   : {legacy_ms:8.2f} ms/次")
+    print(f"分组视图 首次构建            : {first_ms:8.2f} ms")
+    print(f"分组视图 缓存命中            : {cached_ms:8.4f} ms/次")
+    print(f"分组视图 列表变化后重建      : {patched_ms:8.2f} ms/次")
+    print(f"分组视图 跨天后重建          : {next_day_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
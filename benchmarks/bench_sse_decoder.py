@@ -0,0 +1,140 @@
+# 基准测试 - 回放 SSE 流，对比逐行解码 + json.loads 与 SSEDecoder 快速路径
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.sse import iter_events, set_json_backend, EVENT_STRING
+
+SAMPLES = ["好的", "，", "我们", "来看", " the", " answer", "\n\n", "```python\n", "print(\"hi\")", "<think>", "推理"]
+
+
+def build_stream(events, seed=0):
+    """
+    构造与 /chat/completions 相同格式的 SSE 字节流
+    """
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(events):
+        data = {"type": "string", "data": rng.choice(SAMPLES)}
+        parts.append(b"data:" + json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n\n")
+    meta = {"type": "object", "data": {"id": 1, "completionTokens": events, "updated": "2026-01-13 17:19:50"}}
+    parts.append(b"data:" + json.dumps(meta).encode("utf-8") + b"\n\n")
+    parts.append(b"data:[DONE]\n\n")
+    return b"".join(parts)
+
+
+def split_blocks(raw, size):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def legacy_iter_lines(blocks):
+    """
+    模拟 requests.Response.iter_lines 的逐行切分
+    """
+    pending = None
+    for chunk in blocks:
+        if pending is not None:
+            chunk = pending + chunk
+        lines = chunk.splitlines()
+        if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
+            pending = lines.pop()
+        else:
+            pending = None
+        yield from lines
+    if pending is not None:
+        yield pending
+
+
+def run_legacy(blocks):
+    """
+    旧实现：逐行 decode、startswith 判断后对每个事件执行 json.loads
+
+    Returns:
+        list: 解析出的文本分片
+    """
+    texts = []
+    for line in legacy_iter_lines(blocks):
+        if line:
+            decoded_line = line.decode('utf-8')
+            if decoded_line.startswith("data:"):
+                json_str = decoded_line[5:].strip()
+                if json_str == "[DONE]":
+                    break
+                try:
+                    data_obj = json.loads(json_str)
+                    if isinstance(data_obj, dict) and data_obj.get("type") == "string":
+                        texts.append(data_obj["data"])
+                except Exception:
+                    continue
+    return texts
+
+
+def run_decoder(blocks):
+    """
+    新实现：SSEDecoder + 文本事件快速路径
+
+    Returns:
+        list: 解析出的文本分片
+    """
+    return [value for kind, value in iter_events(blocks) if kind == EVENT_STRING]
+
+
+def measure(name, fn, blocks, events, repeat):
+    """
+    取 repeat 次中的最快耗时计算吞吐；再用 tracemalloc 记录解码期间的峰值内存，
+    以及前后两次快照的内存块数之差（结果列表持有的对象，即每个事件最终留下的分配）
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(blocks)
+        timings.append(time.perf_counter() - start)
+    result = None
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn(blocks)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks_kept = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    best = min(timings)
+    print(f"{name:<22} {events / best:>12,.0f} events/s   {best / events * 1e9:8.0f} ns/event   "
+          f"峰值内存 {peak:>12,} B   新增内存块 {blocks_kept / events:5.2f} 个/event   文本事件 {len(result)}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE 解码回放基准测试")
+    parser.add_argument("--events", type=int, default=200_000, help="文本事件数量")
+    parser.add_argument("--block-size", type=int, default=65536, help="每次读取的字节数（两种实现相同）")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    raw = build_stream(args.events)
+    print(f"events={args.events} bytes={len(raw):,}")
+
+    # 两种实现读取同样大小的字节块，只比较解码本身
+    blocks = split_blocks(raw, args.block_size)
+    expected = measure("iter_lines + json", run_legacy, blocks, args.events, args.repeat)
+    for backend in ("json", "orjson"):
+        try:
+            set_json_backend(backend)
+        except ValueError:
+            print(f"{'SSEDecoder (' + backend + ')':<22} 未安装，跳过")
+            continue
+        result = measure(f"SSEDecoder ({backend})", run_decoder, blocks, args.events, args.repeat)
+        assert result == expected, "解码结果与旧实现不一致"
+
+
+if __name__ == "__main__":
+    main()
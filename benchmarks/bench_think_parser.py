@@ -0,0 +1,83 @@
+# 基准测试 - 对比 process_ai_content 全量重解析与 ThinkStreamParser 增量解析
+import argparse
+import os
+import random
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import process_ai_content, ThinkStreamParser
+
+WORDS = ["推理", "模型", "token", "stream", "the", "answer", "is", "因此", "\n", "42", "。", "data"]
+
+
+def build_chunks(tokens, think_ratio=0.6, seed=0):
+    """
+    构造模拟的流式分片：前 think_ratio 比例为思考内容，标签会被随机切断在分片边界上
+    """
+    rng = random.Random(seed)
+    think_tokens = int(tokens * think_ratio)
+    text = "<think>" + " ".join(rng.choice(WORDS) for _ in range(think_tokens))
+    text += "</think>" + " ".join(rng.choice(WORDS) for _ in range(tokens - think_tokens))
+
+    chunks = []
+    pos = 0
+    while pos < len(text):
+        step = rng.randint(1, 8)
+        chunks.append(text[pos:pos + step])
+        pos += step
+    return chunks
+
+
+def run_baseline(chunks):
+    """
+    旧实现：每个分片后对全文重新解析
+    """
+    full_response = ""
+    result = None
+    for chunk in chunks:
+        full_response += chunk
+        result = process_ai_content(full_response)
+    return result
+
+
+def run_incremental(chunks, view_every=1):
+    """
+    新实现：增量解析，每 view_every 个分片取一次视图（模拟合并渲染）
+    """
+    parser = ThinkStreamParser()
+    for index, chunk in enumerate(chunks):
+        parser.feed(chunk)
+        if index % view_every == 0:
+            parser.view()
+    return parser.view()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="think 标签解析基准测试")
+    parser.add_argument("--tokens", type=int, default=100_000, help="模拟的 token 数")
+    parser.add_argument("--view-every", type=int, default=1, help="每隔多少个分片取一次视图")
+    parser.add_argument("--skip-baseline", action="store_true", help="跳过旧实现（长文本下非常慢）")
+    args = parser.parse_args()
+
+    chunks = build_chunks(args.tokens)
+    total_chars = sum(len(c) for c in chunks)
+    print(f"tokens={args.tokens} chunks={len(chunks)} chars={total_chars}")
+
+    start = time.perf_counter()
+    incremental = run_incremental(chunks, args.view_every)
+    incremental_time = time.perf_counter() - start
+    print(f"ThinkStreamParser:  {incremental_time:8.3f}s  ({len(chunks) / incremental_time:,.0f} chunks/s)")
+
+    if not args.skip_baseline:
+        start = time.perf_counter()
+        baseline = run_baseline(chunks)
+        baseline_time = time.perf_counter() - start
+        print(f"process_ai_content: {baseline_time:8.3f}s  ({len(chunks) / baseline_time:,.0f} chunks/s)")
+        print(f"加速比: {baseline_time / incremental_time:.1f}x, 结果一致: {baseline == incremental}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# 基准测试 - 对比整文件 base64 + json 请求体与流式分块请求体构造的内存峰值
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.upload_stream import iter_chat_body, file_data_prefix
+
+PAYLOAD = {"sessionId": 1, "text": "请总结这个文件", "contextCount": 20, "temperature": 0.7}
+
+
+class FakeUpload(io.BytesIO):
+    """
+    模拟 Streamlit UploadedFile：带 name 属性的内存文件
+    """
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def build_legacy(upload):
+    """
+    旧实现：getvalue + 整体 base64 + json 序列化 + 编码（requests 的 json= 参数）
+    """
+    encoded = base64.b64encode(upload.getvalue()).decode('utf-8')
+    payload = dict(PAYLOAD, files=[{"name": upload.name, "data": f"{file_data_prefix(upload.name)}{encoded}"}])
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return len(body)
+
+
+def build_streaming(upload):
+    """
+    新实现：逐块生成请求体，模拟逐块写入 socket 后丢弃
+    """
+    total = 0
+    for part in iter_chat_body(PAYLOAD, upload):
+        total += len(part)
+    return total
+
+
+def measure(name, fn, upload, size):
+    tracemalloc.start()
+    start = time.perf_counter()
+    body_size = fn(upload)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<12} 请求体 {body_size / 2**20:8.1f} MB   峰值分配 {peak / 2**20:8.1f} MB "
+          f"({peak / size:.2f}× 文件大小)   {size / 2**20 / elapsed:8.0f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="附件请求体内存基准测试")
+    parser.add_argument("--sizes", default="1,10,50", help="附件大小列表（MB），逗号分隔")
+    args = parser.parse_args()
+
+    # 先校验两种实现生成的请求体等价
+    sample = FakeUpload(os.urandom(100_003), "sample.pdf")
+    streamed = b"".join(iter_chat_body(PAYLOAD, sample))
+    legacy = json.dumps(dict(PAYLOAD, files=[{
+        "name": sample.name,
+        "data": file_data_prefix(sample.name) + base64.b64encode(sample.getvalue()).decode()
+    }]), ensure_ascii=False).encode("utf-8")
+    assert json.loads(streamed) == json.loads(legacy), "流式请求体与旧实现不一致"
+
+    for size_mb in [float(s) for s in args.sizes.split(",")]:
+        size = int(size_mb * 2**20)
+        upload = FakeUpload(os.urandom(size), "report.pdf")
+        print(f"\n附件 {size_mb:g} MB")
+        measure("json=", build_legacy, upload, size)
+        measure("流式分块", build_streaming, upload, size)
+
+
+if __name__ == "__main__":
+    main()
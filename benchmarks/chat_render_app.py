@@ -0,0 +1,47 @@
+# 基准测试页面 - 渲染 N 条合成消息，供 bench_chat_render.py 在浏览器中测量渲染耗时
+# 用法: streamlit run benchmarks/chat_render_app.py，然后访问 ?n=200&mode=legacy 或 ?n=200&mode=toolbar
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit as st
+from src.styles import apply_global_styles
+from src.chat_utils import render_chat_message, render_chat_toolbar, message_copy_text
+import legacy_chat_utils
+
+ANSWER = "这是一段用于基准测试的回复。\n\n```python\nprint('hello')\n```\n\n" + "内容 " * 60
+
+
+def synthetic_messages(n):
+    messages = []
+    for i in range(n // 2):
+        messages.append({"role": "user", "content": f"第 {i + 1} 个问题", "tokens": 0, "timestamp": "12:00:00"})
+        messages.append({"role": "assistant", "content": ANSWER, "tokens": 120, "timestamp": "12:00:05",
+                         "cid": str(1000 + i), "sid": "1", "taskId": ""})
+    return messages
+
+
+def main():
+    n = int(st.query_params.get("n", 100))
+    mode = st.query_params.get("mode", "toolbar")
+    st.session_state.bench_run = st.session_state.get("bench_run", 0) + 1
+
+    apply_global_styles()
+    st.button("rerun", key="bench_rerun")
+    messages = synthetic_messages(n)
+    if mode == "legacy":
+        # 旧版渲染直接调用原样保留的基线代码，保证对比的是真实的旧实现
+        for i, msg_obj in enumerate(messages):
+            legacy_chat_utils.render_chat_message(msg_obj, i, "bench-model")
+    else:
+        render_chat_toolbar({str(i): message_copy_text(m) for i, m in enumerate(messages)})
+        for i, msg_obj in enumerate(messages):
+            render_chat_message(msg_obj, i, "bench-model")
+
+    # 渲染完成标记，run 计数用于区分重跑
+    st.html(f'<div id="bench-done" data-run="{st.session_state.bench_run}"></div>')
+
+
+main()
@@ -0,0 +1,117 @@
+# 压测脚本 - N 个并发客户端循环执行 创建会话 → 流式对话 → 读取记录 → 删除会话，统计吞吐与延迟分位数
+import argparse
+import os
+import sys
+import threading
+import time
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.core import AIClient
+from src import metrics
+from mock_server import start_mock_server, add_mock_arguments, options_from_args
+
+PROMPT = "请简单介绍一下你自己"
+
+
+def run_client(index, base_url, iterations, model, results):
+    """
+    单个客户端的工作循环，每轮的端到端耗时与失败原因写入 results
+    """
+    bot = AIClient(f"load-test-{index}", base_url=base_url)
+    for _ in range(iterations):
+        start = time.perf_counter()
+        error = None
+        ok, data = bot.create_session(model)
+        if not ok:
+            error = f"create: {data}"
+        else:
+            session_id = bot.session_id
+            reply = "".join(bot.chat_stream(PROMPT))
+            if reply.startswith("❌") or not bot.last_chat_metadata:
+                error = "chat_stream: 回复不完整"
+            ok, data = bot.get_chat_records(session_id)
+            if not ok and error is None:
+                error = f"records: {data}"
+            ok, data = bot.delete_session(session_id)
+            if not ok and error is None:
+                error = f"delete: {data}"
+        results.append((time.perf_counter() - start, error))
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value * 1000:8.1f}"
+
+
+def report(entries, results, elapsed):
+    """
+    打印整体吞吐、每个接口的延迟分位数与流式指标
+    """
+    errors = [error for _, error in results if error]
+    print(f"\n完成 {len(results)} 轮 · 失败 {len(errors)} · 耗时 {elapsed:.2f}s · 吞吐 {len(results) / elapsed:.1f} 轮/s")
+    for error in sorted(set(errors))[:5]:
+        print(f"  失败示例: {error}")
+
+    rounds = [duration for duration, _ in results]
+    print(f"\n{'指标':<28} {'次数':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print(f"{'端到端一轮':<28} {len(rounds):>6} {format_ms(metrics.percentile(rounds, 50))} "
+          f"{format_ms(metrics.percentile(rounds, 95))} {format_ms(metrics.percentile(rounds, 99))}")
+
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry["endpoint"], []).append(entry)
+    for endpoint in sorted(groups):
+        items = groups[endpoint]
+        fields = [("latency", endpoint)]
+        if items[0].get("ttft", False) is not False:
+            fields += [("ttfb", "  └ 首字节"), ("ttft", "  └ 首字")]
+        for field, label in fields:
+            values = [e[field] for e in items if e.get(field) is not None]
+            print(f"{label:<28} {len(values):>6} {format_ms(metrics.percentile(values, 50))} "
+                  f"{format_ms(metrics.percentile(values, 95))} {format_ms(metrics.percentile(values, 99))}")
+
+    speeds = [e["tokens_per_sec"] for e in entries if e.get("tokens_per_sec")]
+    if speeds:
+        print(f"\n生成速度 tok/s: p50 {metrics.percentile(speeds, 50):.0f} · p5 {metrics.percentile(speeds, 5):.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AIClient 并发压测")
+    parser.add_argument("--clients", type=int, default=8, help="并发客户端数量")
+    parser.add_argument("--iterations", type=int, default=20, help="每个客户端执行的轮数")
+    parser.add_argument("--model", default="mock-fast", help="创建会话使用的模型")
+    parser.add_argument("--base-url", default=None, help="压测已有服务器；不指定时在进程内启动模拟服务器")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_mock_server(options=options_from_args(args))
+    print(f"目标: {base_url} · 客户端 {args.clients} · 每个 {args.iterations} 轮")
+
+    # 通过指标回调收集全部请求，不受环形缓冲区容量限制
+    entries = []
+    metrics.add_hook(entries.append)
+    results = []
+    threads = [
+        threading.Thread(target=run_client, args=(i, base_url, args.iterations, args.model, results))
+        for i in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    metrics.remove_hook(entries.append)
+
+    report(entries, results, elapsed)
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
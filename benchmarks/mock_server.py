@@ -0,0 +1,365 @@
+# 模拟服务器 - 在本地模拟 AIClient 使用的 Achuan API 接口，用于离线基准测试与压测
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+MODELS = ["mock-fast", "mock-think", "gemini-3-pro-preview"]
+WORDS = ["好的", "我们", "来看", "这个", "问题", "首先", "其次", "因此", "the", "answer", "is", "42", "，", "。", "\n"]
+
+
+class MockOptions:
+    """
+    模拟服务器的行为配置
+
+    Args:
+        latency (float): 每个请求的固定延迟（秒）
+        jitter (float): 额外随机延迟的上限（秒）
+        chunk_chars (int): 每个 SSE 文本事件包含的字符数
+        chunk_delay (float): 两个 SSE 事件之间的间隔（秒）
+        reply_chars (int): 每次回复的字符数
+        think (bool): 回复前是否输出 <think> 推理内容
+        error_rate (float): 请求直接返回 HTTP 500 的概率
+        abort_rate (float): 流式回复中途断开连接的概率
+        page_size (int): 聊天记录每页条数
+    """
+    def __init__(self, latency=0.0, jitter=0.0, chunk_chars=4, chunk_delay=0.0, reply_chars=400,
+                 think=False, error_rate=0.0, abort_rate=0.0, page_size=20):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_chars = max(1, chunk_chars)
+        self.chunk_delay = chunk_delay
+        self.reply_chars = reply_chars
+        self.think = think
+        self.error_rate = error_rate
+        self.abort_rate = abort_rate
+        self.page_size = page_size
+
+
+class MockState:
+    """
+    内存中的会话与聊天记录
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = itertools.count(100000)
+        self.sessions = {}
+        self.records = {}
+
+    def next_id(self):
+        with self.lock:
+            return next(self.ids)
+
+
+def _now():
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def build_reply(options, rng):
+    """
+    生成一次回复的完整文本
+    """
+    words = []
+    length = 0
+    while length < options.reply_chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word)
+    text = "".join(words)
+    if options.think:
+        text = "<think>\n" + text[:len(text) // 2] + "\n</think>\n\n" + text[len(text) // 2:]
+    return text
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    """
+    处理 /chat/session、/chat/record、/chat/tmpl 与 /chat/completions 请求
+    """
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分两次写入，keep-alive 连接上 Nagle 算法与对端的延迟 ACK 会让之后的每个请求多等约 40 ms
+    disable_nagle_algorithm = True
+    options = MockOptions()
+    state = MockState()
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- 响应工具 ---
+
+    def _read_body(self):
+        """
+        读取请求体，支持 Content-Length 与分块传输编码（流式上传附件时使用）
+        """
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(parts)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _read_json(self):
+        body = self._read_body()
+        if not body:
+            return {}
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {}
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _ok(self, data=None):
+        self._send_json({"code": 0, "data": data, "msg": "ok"})
+
+    def _fail(self, msg, code=1):
+        self._send_json({"code": code, "data": None, "msg": msg})
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _write_event(self, data):
+        payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        self._write_chunk(f"data:{payload}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _simulate(self):
+        """
+        模拟网络延迟与错误注入
+
+        Returns:
+            bool: 是否已返回注入的错误响应
+        """
+        options = self.options
+        delay = options.latency + (random.uniform(0, options.jitter) if options.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if options.error_rate and random.random() < options.error_rate:
+            self._read_json()
+            self._send_json({"code": 500, "msg": "injected error"}, status=500)
+            return True
+        return False
+
+    def _route(self, method):
+        if self._simulate():
+            return
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if parts[:1] != ["chat"] or len(parts) < 2:
+            self._send_json({"code": 404, "msg": "not found"}, status=404)
+            return
+        handler = getattr(self, f"{method.lower()}_{parts[1]}", None)
+        if handler is None:
+            self._send_json({"code": 405, "msg": "method not allowed"}, status=405)
+            return
+        handler(parts[2] if len(parts) > 2 else None, query)
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+    # --- /chat/session ---
+
+    def get_session(self, session_id, query):
+        with self.state.lock:
+            sessions = sorted(self.state.sessions.values(), key=lambda s: s["created"], reverse=True)
+        self._ok(sessions)
+
+    def post_session(self, session_id, query):
+        payload = self._read_json()
+        session_id = self.state.next_id()
+        now = _now()
+        session = {**payload, "id": session_id, "name": "New Chat", "created": now, "updated": now}
+        session.setdefault("topSort", 0)
+        with self.state.lock:
+            self.state.sessions[str(session_id)] = session
+            self.state.records[str(session_id)] = []
+        self._ok(session)
+
+    def put_session(self, session_id, query):
+        payload = self._read_json()
+        with self.state.lock:
+            session = self.state.sessions.get(str(session_id))
+            if session is not None:
+                session.update(payload)
+                session["id"] = int(session_id)
+                session["updated"] = _now()
+        if session is None:
+            self._fail("会话不存在")
+        else:
+            self._ok(session)
+
+    def delete_session(self, session_id, query):
+        with self.state.lock:
+            found = self.state.sessions.pop(str(session_id), None)
+            self.state.records.pop(str(session_id), None)
+        if found is None:
+            self._fail("会话不存在")
+        else:
+            self._ok()
+
+    # --- /chat/record ---
+
+    def get_record(self, session_id, query):
+        page = max(1, int(query.get("page", 1)))
+        size = self.options.page_size
+        with self.state.lock:
+            records = list(reversed(self.state.records.get(str(session_id), [])))
+        self._ok({"records": records[(page - 1) * size:page * size], "total": len(records)})
+
+    def delete_record(self, session_id, query):
+        cid = query.get("cid")
+        sid = query.get("sid", "")
+        with self.state.lock:
+            records = self.state.records.get(sid, [])
+            kept = [r for r in records if str(r["id"]) != cid]
+            self.state.records[sid] = kept
+        if len(kept) == len(records):
+            self._fail("记录不存在")
+        else:
+            self._ok()
+
+    # --- /chat/tmpl ---
+
+    def get_tmpl(self, session_id, query):
+        self._ok({"models": [{"label": name, "value": name} for name in MODELS]})
+
+    # --- /chat/completions ---
+
+    def post_completions(self, session_id, query):
+        payload = self._read_json()
+        sid = str(payload.get("sessionId"))
+        with self.state.lock:
+            session = self.state.sessions.get(sid)
+        if session is None:
+            self._fail("会话不存在")
+            return
+
+        options = self.options
+        rng = random.Random()
+        reply = build_reply(options, rng)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        abort_at = len(reply) // 2 if options.abort_rate and rng.random() < options.abort_rate else None
+        for start in range(0, len(reply), options.chunk_chars):
+            if abort_at is not None and start >= abort_at:
+                # 模拟连接中断：不发送结束块直接关闭
+                self.close_connection = True
+                return
+            if options.chunk_delay:
+                time.sleep(options.chunk_delay)
+            self._write_event({"type": "string", "data": reply[start:start + options.chunk_chars]})
+
+        now = _now()
+        record = {
+            "id": self.state.next_id(),
+            "sessionId": int(sid),
+            "userText": payload.get("text", ""),
+            "aiText": reply,
+            "model": session.get("model", ""),
+            "taskId": "",
+            "useFiles": payload.get("files", []),
+            "promptTokens": len(payload.get("text", "")),
+            "completionTokens": len(reply),
+            "created": now,
+            "updated": now
+        }
+        with self.state.lock:
+            self.state.records.setdefault(sid, []).append(record)
+        meta = {k: record[k] for k in ("id", "model", "promptTokens", "completionTokens", "created", "updated")}
+        self._write_event({"type": "object", "data": meta})
+        self._write_event("[DONE]")
+        self._write_chunk(b"")
+
+
+def start_mock_server(host="127.0.0.1", port=0, options=None):
+    """
+    在后台线程中启动模拟服务器
+
+    Args:
+        host (str): 监听地址
+        port (int): 监听端口，0 表示自动分配
+        options (MockOptions, optional): 行为配置
+
+    Returns:
+        tuple: (服务器实例, base_url)
+    """
+    handler = type("ConfiguredMockAPIHandler", (MockAPIHandler,), {
+        "options": options or MockOptions(),
+        "state": MockState()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-api-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_mock_arguments(parser):
+    """
+    注册模拟服务器的命令行参数（供压测脚本复用）
+    """
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="每个 SSE 文本事件的字符数")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="SSE 事件间隔（秒）")
+    parser.add_argument("--reply-chars", type=int, default=400, help="每次回复的字符数")
+    parser.add_argument("--think", action="store_true", help="回复中包含 <think> 推理内容")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 500 的概率")
+    parser.add_argument("--abort-rate", type=float, default=0.0, help="流式回复中途断开的概率")
+    parser.add_argument("--page-size", type=int, default=20, help="聊天记录每页条数")
+
+
+def options_from_args(args):
+    return MockOptions(
+        latency=args.latency, jitter=args.jitter, chunk_chars=args.chunk_chars, chunk_delay=args.chunk_delay,
+        reply_chars=args.reply_chars, think=args.think, error_rate=args.error_rate,
+        abort_rate=args.abort_rate, page_size=args.page_size
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Achuan API 本地模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.host, args.port, options_from_args(args))
+    print(f"模拟服务器已启动: {base_url}  (将 CONFIG['base_url'] 或 AIClient(base_url=...) 指向该地址)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,10 @@
 
 # 导出主要模块
 from .config import CONFIG, load_config
-from .core import AIClient
+from .core import AIClient, CancelToken
+from .async_core import AsyncAIClient, SyncAIClient
 from .ui import render_ui
-from .utils import process_ai_content, ensure_current_model
+from .utils import process_ai_content, ensure_current_model, ThinkStreamParser
 
 __version__ = "1.0.0"
 __author__ = "AI Assistant Pro Team"
@@ -0,0 +1,395 @@
+# 异步客户端模块 - 基于 asyncio 的 AI 客户端，多个流式对话共享同一个事件循环
+import asyncio
+import inspect
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
+import httpx
+from .config import CONFIG
+from .core import BaseAIClient
+from .http_pool import _auth_key
+from .sse import aiter_events
+from .upload_stream import aiter_chat_body
+
+# 按 (事件循环, base_url, authorization 摘要) 缓存的异步连接池:
+# key -> [httpx.AsyncClient, 所属事件循环, 最近使用时间, 正在使用的请求数]
+_async_clients = {}
+_async_lock = threading.Lock()
+
+
+def _build_async_client():
+    """
+    创建与 requests 连接池配置一致的 httpx.AsyncClient
+    """
+    limits = httpx.Limits(
+        max_connections=CONFIG["poolMaxSize"],
+        max_keepalive_connections=CONFIG["poolMaxSize"],
+        keepalive_expiry=CONFIG["poolKeepAlive"]
+    )
+    # 与 requests 保持一致：不设置读取超时，避免长时间思考时被中断
+    return httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(None, connect=10.0))
+
+
+def _evict_idle_async(loop, now):
+    """
+    回收不再需要的异步连接池（调用方需持有锁）：
+    所属事件循环已关闭的直接丢弃；当前事件循环中超过 keep-alive 时间未被使用的在该循环中关闭；
+    仍有请求在使用的跳过
+    """
+    keep_alive = CONFIG["poolKeepAlive"]
+    for key, (client, client_loop, last_used, in_use) in list(_async_clients.items()):
+        if client_loop.is_closed():
+            del _async_clients[key]
+        elif client_loop is loop and not in_use and now - last_used > keep_alive:
+            del _async_clients[key]
+            loop.create_task(client.aclose())
+
+
+@asynccontextmanager
+async def pooled_async_client(base_url, authorization):
+    """
+    借用当前事件循环共享的 httpx.AsyncClient，同一 base_url 与 authorization 复用同一个连接池；
+    借用期间连接池被标记为使用中，回收空闲连接池时不会关闭它
+
+    Args:
+        base_url (str): API 基础地址
+        authorization (str): 用户授权令牌
+
+    Yields:
+        httpx.AsyncClient: 绑定到当前运行中事件循环的异步客户端
+    """
+    loop = asyncio.get_running_loop()
+    key = (id(loop), base_url, _auth_key(authorization))
+    now = time.monotonic()
+    with _async_lock:
+        _evict_idle_async(loop, now)
+        entry = _async_clients.get(key)
+        if entry is None or entry[1] is not loop or entry[0].is_closed:
+            entry = _async_clients[key] = [_build_async_client(), loop, now, 0]
+        entry[2] = now
+        entry[3] += 1
+    try:
+        yield entry[0]
+    finally:
+        with _async_lock:
+            # 从使用结束时开始计算空闲时间
+            entry[2] = time.monotonic()
+            entry[3] -= 1
+
+
+class AsyncAIClient(BaseAIClient):
+    """
+    异步AI客户端类，与 AIClient 接口一一对应，所有网络方法均为协程
+    """
+
+    async def _request(self, method, url, **kwargs):
+        """
+        通过共享的异步连接池发送请求，默认携带实例请求头
+        """
+        kwargs.setdefault("headers", self.headers)
+        start = time.perf_counter()
+        try:
+            async with pooled_async_client(self.base_url, self.authorization) as client:
+                response = await client.request(method, url, **kwargs)
+        except Exception as e:
+            self._record_request(method, url, start, error=str(e))
+            raise
+        self._record_request(method, url, start, response.status_code, len(response.content))
+        return response
+
+    async def create_session(self, model="gemini-3-pro-preview"):
+        """
+        创建新会话
+
+        Args:
+            model (str): 要使用的模型名称
+
+        Returns:
+            tuple: (成功状态, 消息或会话ID)
+        """
+        url = f"{self.base_url}/chat/session"
+        payload = self._build_session_payload(model)
+        try:
+            response = await self._request("POST", url, json=payload)
+            if response.status_code == 200:
+                ok, data = self._unwrap(response.json())
+                if ok:
+                    self.session_id = data['id']
+                    self.model = model
+                    return True, str(self.session_id)
+                return False, data
+            return False, f"HTTP {response.status_code}"
+        except Exception as e:
+            return False, str(e)
+
+    async def get_sessions(self):
+        """
+        获取历史会话列表
+
+        Returns:
+            tuple: (成功状态, 会话列表或错误消息)
+        """
+        url = f"{self.base_url}/chat/session"
+        try:
+            response = await self._request("GET", url)
+            if response.status_code == 200:
+                return self._unwrap(response.json(), default=[])
+            return False, f"HTTP {response.status_code}"
+        except Exception as e:
+            return False, str(e)
+
+    async def get_chat_records(self, session_id, page=1):
+        """
+        获取指定会话的聊天记录
+
+        Args:
+            session_id (str): 会话ID
+            page (int): 页码
+
+        Returns:
+            tuple: (成功状态, 聊天记录或错误消息)
+        """
+        url = f"{self.base_url}/chat/record/{session_id}?page={page}"
+        try:
+            response = await self._request("GET", url)
+            if response.status_code == 200:
+                return self._unwrap(response.json(), default={})
+            return False, f"HTTP {response.status_code}"
+        except Exception as e:
+            return False, str(e)
+
+    async def iter_chat_records(self, session_id, start_page=1, prefetch=None):
+        """
+        按页异步迭代聊天记录（第 1 页为最新），并发预取后续若干页
+
+        Args:
+            session_id (str): 会话ID
+            start_page (int): 起始页码
+            prefetch (int, optional): 预取页数，默认读取 CONFIG["recordPrefetch"]
+
+        Yields:
+            list: 每一页的记录列表（新→旧）
+        """
+        prefetch = CONFIG["recordPrefetch"] if prefetch is None else prefetch
+        tasks = {}
+        page = start_page
+        page_size = None
+        try:
+            while True:
+                for p in range(page, page + prefetch + 1):
+                    if p not in tasks:
+                        tasks[p] = asyncio.ensure_future(self.get_chat_records(session_id, p))
+
+                success, data = await tasks.pop(page)
+                records = data.get("records") if success and isinstance(data, dict) else None
+                if not records:
+                    return
+                yield records
+
+                page_size = page_size or len(records)
+                if len(records) < page_size:
+                    return
+                page += 1
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def update_session(self, session_id, update_data, session_data):
+        """
+        更新会话信息（名称、置顶状态等）
+
+        Args:
+            session_id (str): 会话ID
+            update_data (dict): 要更新的数据
+            session_data (dict): 当前会话的完整原始数据
+
+        Returns:
+            tuple: (成功状态, 消息)
+        """
+        url = f"{self.base_url}/chat/session/{session_id}"
+        try:
+            payload = self._build_update_payload(update_data, session_data)
+            response = await self._request("PUT", url, json=payload)
+            if response.status_code == 200:
+                return self._unwrap(response.json(), success_value="会话信息更新成功", fail_msg='更新失败')
+            return False, f"HTTP {response.status_code}"
+        except Exception as e:
+            return False, str(e)
+
+    async def toggle_session_pin(self, session_data):
+        """
+        切换会话置顶状态
+
+        Args:
+            session_data (dict): 当前会话的完整数据
+        """
+        new_sort = 0 if session_data.get("topSort", 0) == 1 else 1
+        return await self.update_session(session_data["id"], {"topSort": new_sort}, session_data)
+
+    async def get_model_list(self):
+        """
+        获取所有可选模型
+
+        Returns:
+            tuple: (成功状态, 模型列表或错误消息)
+        """
+        url = f"{self.base_url}/chat/tmpl"
+        try:
+            response = await self._request("GET", url)
+            if response.status_code == 200:
+                return self._unwrap(response.json(), default={})
+            return False, f"HTTP {response.status_code}"
+        except Exception as e:
+            return False, str(e)
+
+    async def delete_session(self, session_id):
+        """
+        删除指定会话
+
+        Args:
+            session_id (str): 要删除的会话ID
+
+        Returns:
+            tuple: (成功状态, 消息)
+        """
+        url = f"{self.base_url}/chat/session/{session_id}"
+        try:
+            response = await self._request("DELETE", url)
+            if response.status_code == 200:
+                return self._unwrap(response.json(), success_value="会话删除成功")
+            return False, f"HTTP {response.status_code}"
+        except Exception as e:
+            return False, str(e)
+
+    async def delete_chat_record(self, cid, sid, task_id=""):
+        """
+        删除指定的聊天记录
+
+        Args:
+            cid (str): 聊天记录ID
+            sid (str): 会话ID
+            task_id (str, optional): 任务ID
+
+        Returns:
+            tuple: (成功状态, 消息)
+        """
+        url = f"{self.base_url}/chat/record?cid={cid}&sid={sid}"
+        if task_id:
+            url += f"&taskId={task_id}"
+
+        try:
+            response = await self._request("DELETE", url)
+            if response.status_code == 200:
+                try:
+                    return self._unwrap(response.json(), success_value="聊天记录删除成功", fail_msg="删除失败")
+                except json.JSONDecodeError:
+                    return True, "聊天记录删除成功"
+            return False, f"HTTP {response.status_code}"
+        except Exception as e:
+            return False, str(e)
+
+    async def chat_stream(self, user_text, file_obj=None, cancel_token=None, context_count=None):
+        """
+        异步流式聊天生成器，使用 `async for` 迭代
+
+        Args:
+            cancel_token (CancelToken, optional): 取消令牌，每个事件前检查，取消后退出并关闭流
+            context_count (int, optional): 本次携带的上下文条数，默认使用 CONFIG["contextCount"]
+        """
+        if not self.session_id:
+            yield "⚠️ 会话未连接，请先创建或选择会话！"
+            return
+
+        self._reset_chat_metadata()
+
+        url = f"{self.base_url}/chat/completions"
+        if file_obj and CONFIG["streamUploads"]:
+            body = {"content": aiter_chat_body(self._build_chat_payload(user_text, context_count=context_count), file_obj)}
+        else:
+            body = {"json": self._build_chat_payload(user_text, file_obj, context_count)}
+
+        timer = self._stream_timer(url)
+        error = None
+        finished = False
+        try:
+            async with pooled_async_client(self.base_url, self.authorization) as client, \
+                    client.stream("POST", url, headers=self._stream_headers(), **body) as response:
+                timer.response_started(response.status_code)
+                # 不指定块大小：httpx 指定 chunk_size 时会攒满该大小才产出，首字要等到整个流结束；
+                # 收到多少就交给解码器多少，事件边界由 SSEDecoder 处理
+                async for kind, value in aiter_events(timer.acount(response.aiter_bytes())):
+                    if cancel_token is not None and cancel_token.cancelled:
+                        break
+                    content = self._event_content(kind, value)
+                    if content is not None:
+                        timer.token()
+                        yield content
+                else:
+                    finished = True
+        except Exception as e:
+            error = str(e)
+            yield f"❌ 网络请求错误: {e}"
+        finally:
+            self.last_stream_metrics = timer.finish(self.last_chat_metadata, self.model, error,
+                                                    cancelled=not finished and error is None)
+
+
+# --- 同步包装：在后台线程中运行共享事件循环 ---
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_background_loop():
+    """
+    获取（必要时启动）运行在守护线程中的共享事件循环
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="async-ai-client", daemon=True)
+            thread.start()
+        return _loop
+
+
+def run_sync(coro):
+    """
+    在共享事件循环中执行协程并阻塞等待结果
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
+
+
+def iter_sync(async_gen):
+    """
+    将异步生成器转换为同步生成器，提前退出时会关闭异步生成器
+    """
+    try:
+        while True:
+            try:
+                yield run_sync(async_gen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        run_sync(async_gen.aclose())
+
+
+class SyncAIClient:
+    """
+    AsyncAIClient 的同步包装，接口与 AIClient 相同，供现有 UI 代码直接调用
+    """
+    def __init__(self, authorization, base_url=None):
+        object.__setattr__(self, "_client", AsyncAIClient(authorization, base_url))
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if inspect.isasyncgenfunction(attr):
+            return lambda *args, **kwargs: iter_sync(attr(*args, **kwargs))
+        if inspect.iscoroutinefunction(attr):
+            return lambda *args, **kwargs: run_sync(attr(*args, **kwargs))
+        return attr
+
+    def __setattr__(self, name, value):
+        # session_id、authorization 等状态统一保存在内部异步客户端上
+        setattr(self._client, name, value)
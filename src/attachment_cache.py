@@ -0,0 +1,147 @@
+# 附件缓存模块 - 按内容 SHA-256 缓存附件的 base64 编码结果，进程内共享，LRU 淘汰
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from .config import CONFIG
+
+# 内容哈希 -> base64 编码结果（bytes）
+_encoded = OrderedDict()
+_encoded_bytes = 0
+# UploadedFile.file_id -> 内容哈希，避免同一个上传对象重复计算哈希
+_digests = OrderedDict()
+# 内容哈希 -> 见过的文件名（只记录仍在 _encoded 中的条目，随淘汰一起移除）
+_names = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "renamed_hits": 0, "bytes_saved": 0, "evictions": 0}
+
+# 计算哈希时每次读取的字节数
+HASH_BLOCK = 1024 * 1024
+# 最多记住的 file_id 数量
+MAX_DIGESTS = 1024
+
+
+def _file_size(fileobj):
+    size = getattr(fileobj, "size", None)
+    if size is None:
+        fileobj.seek(0, 2)
+        size = fileobj.tell()
+    return size
+
+
+def file_digest(fileobj):
+    """
+    计算附件内容的 SHA-256（分块读取，不复制整个文件）
+
+    Args:
+        fileobj: 支持 seek/read 的文件对象（如 Streamlit UploadedFile）
+
+    Returns:
+        str: 十六进制摘要
+    """
+    file_id = getattr(fileobj, "file_id", None)
+    if file_id is not None:
+        with _lock:
+            digest = _digests.get(file_id)
+        if digest:
+            return digest
+
+    hasher = hashlib.sha256()
+    fileobj.seek(0)
+    while True:
+        block = fileobj.read(HASH_BLOCK)
+        if not block:
+            break
+        hasher.update(block)
+    digest = hasher.hexdigest()
+
+    if file_id is not None:
+        with _lock:
+            _digests[file_id] = digest
+            while len(_digests) > MAX_DIGESTS:
+                _digests.popitem(last=False)
+    return digest
+
+
+def is_cacheable(fileobj):
+    """
+    不超过 CONFIG["attachmentCacheMaxFile"] 的附件才缓存，更大的附件始终流式编码
+    """
+    return _file_size(fileobj) <= CONFIG["attachmentCacheMaxFile"]
+
+
+def lookup(fileobj):
+    """
+    查找附件的缓存编码结果，并记录命中统计
+
+    Returns:
+        tuple: (内容哈希, base64 编码结果或 None)
+    """
+    digest = file_digest(fileobj)
+    name = getattr(fileobj, "name", "")
+    with _lock:
+        encoded = _encoded.get(digest)
+        if encoded is None:
+            _stats["misses"] += 1
+        else:
+            _encoded.move_to_end(digest)
+            _stats["hits"] += 1
+            _stats["bytes_saved"] += _file_size(fileobj)
+            names = _names.setdefault(digest, set())
+            if name not in names:
+                _stats["renamed_hits"] += 1
+                names.add(name)
+    return digest, encoded
+
+
+def store(digest, encoded, name=""):
+    """
+    写入编码结果，超出 CONFIG["attachmentCacheBytes"] 时按最近最少使用淘汰
+
+    Args:
+        digest (str): 内容哈希
+        encoded (bytes): base64 编码结果
+        name (str): 写入时的文件名，之后以其他文件名命中时计为 renamed_hits
+    """
+    global _encoded_bytes
+    with _lock:
+        if digest in _encoded:
+            return
+        _encoded[digest] = encoded
+        _encoded_bytes += len(encoded)
+        _names[digest] = {name}
+        while _encoded_bytes > CONFIG["attachmentCacheBytes"] and _encoded:
+            old_digest, old = _encoded.popitem(last=False)
+            _encoded_bytes -= len(old)
+            _names.pop(old_digest, None)
+            _stats["evictions"] += 1
+
+
+def encode_file(fileobj):
+    """
+    获取附件的 base64 编码结果：命中缓存时直接返回，否则编码并写入缓存
+
+    Returns:
+        bytes: base64 编码结果
+    """
+    digest, encoded = lookup(fileobj)
+    if encoded is None:
+        fileobj.seek(0)
+        encoded = base64.b64encode(fileobj.read())
+        if is_cacheable(fileobj):
+            store(digest, encoded, getattr(fileobj, "name", ""))
+    return encoded
+
+
+def get_attachment_stats():
+    """
+    获取附件缓存统计
+
+    Returns:
+        dict: hits / misses / renamed_hits / bytes_saved / evictions / entries / cached_bytes
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_encoded)
+        stats["cached_bytes"] = _encoded_bytes
+    return stats
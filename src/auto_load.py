@@ -2,6 +2,12 @@
 import streamlit as st
 from .core import AIClient
 from .config import CONFIG
+from .utils import open_session_messages
+from .local_store import get_store, owner_key
+from .model_cache import get_model_list
+from .session_cache import (
+    set_sessions, load_cached_sessions, is_sessions_loaded, reconcile_sessions, get_session_store
+)
 
 # 自动加载模型列表和会话
 def auto_load_data():
@@ -29,7 +35,7 @@ def auto_load_data():
     # 自动加载模型列表
     if not st.session_state.models:
         bot_instance = AIClient(st.session_state.get("saved_api_authorization", CONFIG["authorization"]))
-        success, data = bot_instance.get_model_list()
+        success, data = get_model_list(bot_instance)
         if success:
             st.session_state.models = data.get("models", [])
             # 始终默认使用gemini的preview模型
@@ -37,13 +43,23 @@ def auto_load_data():
             st.session_state.current_session_model = "gemini-3-pro-preview"
 
     # 自动加载会话列表并打开最近一次对话
-    # 只有在会话列表为空时才加载，避免无限循环
-    if not st.session_state.sessions or authorization_processed:  # 当authorization被处理时，强制加载会话列表
+    # 只在首次加载时同步拉取，之后由 TTL 过期触发后台对账，避免无限循环
+    if not is_sessions_loaded() or authorization_processed:  # 当authorization被处理时，强制加载会话列表
         bot_instance = AIClient(st.session_state.get("saved_api_authorization", CONFIG["authorization"]))
-        success, data = bot_instance.get_sessions()
+        store = get_store()
+        cached = store.load_sessions(owner_key(bot_instance.authorization)) if store else []
+        if cached:
+            # 本地有缓存时先显示缓存的会话列表，服务器列表在后台拉取，下一次渲染时对账替换
+            load_cached_sessions(cached, bot_instance)
+            success, data = True, cached
+        else:
+            success, data = bot_instance.get_sessions()
+            if success:
+                # 始终更新会话列表
+                set_sessions(data)
+                if store:
+                    store.save_sessions(owner_key(bot_instance.authorization), data)
         if success:
-            # 始终更新会话列表
-            st.session_state.sessions = data
             if data:
                 st.toast(f"已加载 {len(data)} 个会话", icon="✅")
                 
@@ -67,33 +83,17 @@ def auto_load_data():
                     
                     # 只有在消息列表为空时，才加载历史聊天记录
                     if not st.session_state.messages:
-                        # 加载该会话的历史聊天记录
-                        success, records_data = st.session_state.bot.get_chat_records(session_id)
-                        if success and records_data.get("records"):
-                            # 将历史记录转换为消息格式
-                            for record in reversed(records_data["records"]):
-                                user_text = record.get("userText")
-                                ai_text = record.get("aiText")
-                                
-                                if user_text:
-                                    st.session_state.messages.append({
-                                        "role": "user",
-                                        "content": user_text,
-                                        "tokens": record.get("promptTokens", 0),
-                                        "updated": record.get("created", ""),
-                                        "model": record.get("model", "")
-
-                                    })
-                                if ai_text:
-                                    st.session_state.messages.append({
-                                        "role": "assistant",
-                                        "content": ai_text,
-                                        "tokens": record.get("completionTokens", 0),
-                                        "updated": record.get("updated", ""),
-                                        "model" : record.get("model", "")
-                                    })
+                        # 加载该会话最新一页的历史聊天记录，更早的记录按需加载
+                        st.session_state.messages = open_session_messages(st.session_state.bot, session_id)
             else:
                 # 会话列表为空时，初始化bot
                 if not st.session_state.bot:
                     st.session_state.bot = bot_instance
         # 移除自动加载时的st.rerun()，避免无限循环
+    else:
+        # 会话列表缓存过期时在后台对账，结果在下一次渲染时生效
+        bot_instance = AIClient(st.session_state.get("saved_api_authorization", CONFIG["authorization"]))
+        if reconcile_sessions(bot_instance):
+            store = get_store()
+            if store:
+                store.save_sessions(owner_key(bot_instance.authorization), list(get_session_store()))
@@ -3,9 +3,15 @@ import streamlit as st
 import streamlit.components.v1 as components
 from .core import AIClient
 from .styles import apply_global_styles
-from .chat_utils import render_chat_message
+from .chat_utils import (
+    render_chat_message, render_chat_toolbar, message_copy_text, process_pending_deletion, render_deletion_watcher,
+    ACTIVE_MESSAGE_INDEX
+)
 from .navigation import render_right_sidebar_nav
 from .config import CONFIG
+from .utils import load_older_messages, sync_pending_history
+from .session_cache import add_session, new_session_entry, get_session
+from .input_area import collect_finished_stream, render_active_stream, render_fanout_comparison
 
 # --- 1. 后端逻辑：仅处理“新建对话” ---
 
@@ -37,10 +43,8 @@ def handle_header_actions():
             success, msg = bot.create_session(model=model)
 
             if success:
-                # 1. 刷新会话列表
-                ok, sessions_data = bot.get_sessions()
-                if ok:
-                    st.session_state.sessions = sessions_data
+                # 1. 在本地会话列表中插入新会话（完整数据由后台对账补齐）
+                add_session(new_session_entry(bot.session_id, model))
 
                 # 2. 加载新会话
                 from .sidebar import load_session_to_state
@@ -65,12 +69,9 @@ def render_fixed_header():
     session_name = ""
 
     if st.session_state.get("bot") and st.session_state.bot.session_id:
-        current_id = str(st.session_state.bot.session_id)
-        sessions = st.session_state.get("sessions", [])
-        for s in sessions:
-            if str(s.get("id")) == current_id:
-                session_name = s.get("name", "")
-                break
+        session = get_session(st.session_state.bot.session_id)
+        if session:
+            session_name = session.get("name", "")
 
     if not session_name:
         session_name = "New Chat"
@@ -162,7 +163,98 @@ def render_fixed_header():
     """
     components.html(js, height=0, width=0)
 
-# --- 3. 主入口 ---
+# --- 3. 消息窗口：只完整渲染最近的若干轮，更早的按页折叠 ---
+
+def group_turns(messages):
+    """
+    以用户消息为起点把消息分组为轮次（开头没有用户消息的回复归入第一轮）
+
+    Args:
+        messages (list): 消息列表
+
+    Returns:
+        list: 每轮包含的消息下标列表
+    """
+    turns = []
+    for index, msg in enumerate(messages):
+        if msg["role"] == "user" or not turns:
+            turns.append([])
+        turns[-1].append(index)
+    return turns
+
+
+def _turn_key(messages, indices):
+    """
+    轮次的稳定标识：首条消息的对话ID（没有时退回到时间与内容），加载更早的消息或删除对话后不变
+    """
+    msg = messages[indices[0]]
+    return str(msg.get("cid") or msg.get("id") or f"{msg.get('timestamp', '')}|{msg.get('content', '')[:50]}")
+
+
+def _open_turns():
+    """
+    当前会话中被展开的轮次（按会话分别记录，切换会话不互相影响）。
+    记录轮次标识而不是页码：加载更早的消息会在前面插入轮次，页码随之整体偏移
+    """
+    bot = st.session_state.get("bot")
+    session_id = str(bot.session_id) if bot and bot.session_id else ""
+    return st.session_state.setdefault("chat_open_turns", {}).setdefault(session_id, set())
+
+
+def render_message_window(messages):
+    """
+    完整渲染最近 CONFIG["chatWindowTurns"] 轮（按页对齐）以及被展开的页，
+    其余每 CONFIG["chatPageTurns"] 轮折叠为一个按钮，不再为每条消息创建组件
+
+    Args:
+        messages (list): 消息列表
+
+    Returns:
+        tuple: (轮次数, 折叠的页码列表, 本次渲染的消息下标 -> 复制文本)
+    """
+    turns = group_turns(messages)
+    window = CONFIG["chatWindowTurns"]
+    page_size = CONFIG["chatPageTurns"]
+    total = len(turns)
+    # 窗口起点向下对齐到页边界，保证每一页要么完整渲染、要么整体折叠
+    tail_start = 0 if not window or total <= window else (total - window) // page_size * page_size
+    open_turns = _open_turns()
+    current_model = st.session_state.get("current_session_model", "Unknown")
+
+    turn_keys = [_turn_key(messages, indices) for indices in turns]
+    # 页中任一轮次被展开过，整页保持展开（插入更早的轮次后页边界会移动）
+    open_pages = {turn_index // page_size for turn_index in range(tail_start) if turn_keys[turn_index] in open_turns}
+    visible = [turn_index >= tail_start or turn_index // page_size in open_pages for turn_index in range(total)]
+    # 页面级工具栏只需要本次渲染的消息的复制文本
+    copy_texts = {
+        str(message_index): message_copy_text(messages[message_index])
+        for turn_index, indices in enumerate(turns) if visible[turn_index]
+        for message_index in indices
+    }
+
+    collapsed_pages = []
+    for turn_index, indices in enumerate(turns):
+        page = turn_index // page_size
+        if not visible[turn_index]:
+            if turn_index % page_size == 0:
+                collapsed_pages.append(page)
+                last = min((page + 1) * page_size, tail_start)
+                preview = messages[indices[0]].get("content", "").strip().replace("\n", " ")[:30]
+                st.button(
+                    f"💬 第 {turn_index + 1}–{last} 轮（已折叠）· {preview}",
+                    key=f"chat_page_{page}",
+                    on_click=open_turns.update,
+                    args=(turn_keys[page * page_size:last],),
+                    use_container_width=True
+                )
+            continue
+
+        st.markdown(f"<div id='msg-anchor-{turn_index}' style='position:relative; top: -80px; visibility: hidden;'></div>", unsafe_allow_html=True)
+        for message_index in indices:
+            render_chat_message(messages[message_index], message_index, current_model)
+    return total, collapsed_pages, copy_texts
+
+# --- 4. 主入口 ---
 
 def render_chat_area():
     """
@@ -177,18 +269,38 @@ def render_chat_area():
 
     chat_container = st.container()
     with chat_container:
+        # 历史记录分页：仅在用户需要时拉取更早的一页
+        if st.session_state.get("history_iter") is not None and st.session_state.get("messages"):
+            if st.button("⬆️ 加载更早的消息", key="load_older_messages", use_container_width=True):
+                if load_older_messages():
+                    st.rerun()
+                else:
+                    st.toast("没有更早的消息了", icon="📭")
+
+        # 后台生成已结束的回复先写入历史记录
+        collect_finished_stream()
+        # 待处理的删除在渲染前统一处理一次（本地先移除，服务器在后台确认）
+        process_pending_deletion()
+        if st.session_state.get("pending_deletions"):
+            render_deletion_watcher()
+
+        qa_count = 0
+        collapsed_pages = []
+        copy_texts = {}
         if "messages" in st.session_state and st.session_state.messages:
-            current_model = st.session_state.get("current_session_model", "Unknown")
-            qa_count = 0 
-            for message_index, msg_obj in enumerate(st.session_state.messages):
-                role = msg_obj["role"]
-                if role == "user":
-                    qa_count += 1
-                    current_pair_index = qa_count - 1
-                    st.markdown(f"<div id='msg-anchor-{current_pair_index}' style='position:relative; top: -80px; visibility: hidden;'></div>", unsafe_allow_html=True)
-
-                render_chat_message(msg_obj, message_index, current_model)
-
-            render_right_sidebar_nav(qa_count)
-        else:
-            render_right_sidebar_nav(0)
\ No newline at end of file
+            qa_count, collapsed_pages, copy_texts = render_message_window(st.session_state.messages)
+
+        render_fanout_comparison()
+
+        # 当前会话仍在后台生成时，在末尾轮询渲染进行中的问答
+        active_prompt = render_active_stream(qa_count)
+        if active_prompt is not None:
+            qa_count += 1
+            copy_texts[ACTIVE_MESSAGE_INDEX] = active_prompt
+        # 一个页面级组件处理所有消息（包括进行中的问答）的复制 / 删除
+        render_chat_toolbar(copy_texts)
+        render_right_sidebar_nav(qa_count, collapsed_pages, CONFIG["chatPageTurns"])
+
+    # 缓存内容已渲染，再与服务器增量同步，有变化时重新渲染
+    if sync_pending_history():
+        st.rerun()
\ No newline at end of file
@@ -1,8 +1,10 @@
 # 聊天工具模块 - 存放聊天相关的共享功能
 import streamlit as st
 import streamlit.components.v1 as components
+import html
+import os
 import re
-from st_copy import copy_button
+from .config import CONFIG
 
 # --- 1. SVG 图标资源 ---
 # 使用 fill="currentColor" 让颜色由 CSS 控制
@@ -13,6 +15,13 @@ DELETE_SVG = """
 </svg>
 """
 
+COPY_SVG = """
+<svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round" xmlns="http://www.w3.org/2000/svg">
+    <rect x="9" y="9" width="13" height="13" rx="2" ry="2"></rect>
+    <path d="M5 15H4a2 2 0 0 1-2-2V4a2 2 0 0 1 2-2h9a2 2 0 0 1 2 2v1"></path>
+</svg>
+"""
+
 # --- 2. 辅助函数 ---
 
 def clean_ai_text(text):
@@ -20,152 +29,189 @@ def clean_ai_text(text):
     pattern = r""
     return re.sub(pattern, "", text, flags=re.DOTALL).strip()
 
-def render_badges(tokens=0, time_str="", model_name=""):
-    """生成底部的元数据徽章 HTML"""
+def _badge_items(tokens=0, time_str="", model_name=""):
     badges = []
     if tokens: badges.append(f"💳 {tokens} Tokens")
     if time_str: badges.append(f"⌚️ {time_str}")
     badges.append(f"📛 {model_name}")
-
-    if not badges: return ""
-    return f"""
-    <div style="display: flex; flex-direction: row; align-items: center; gap: 8px; flex-wrap: wrap; margin-top: 4px;">
-        {''.join([f"""
+    return "".join(f"""
         <div style="background-color: rgba(128, 128, 128, 0.08); color: #888; border: 1px solid rgba(128, 128, 128, 0.1); padding: 2px 10px; border-radius: 12px; font-size: 11px; font-weight: 500; white-space: nowrap; display: flex; align-items: center;">
             {badge_text}
         </div>
-        """ for badge_text in badges])}
+        """ for badge_text in badges)
+
+def render_badges(tokens=0, time_str="", model_name=""):
+    """生成底部的元数据徽章 HTML"""
+    return f"""
+    <div style="display: flex; flex-direction: row; align-items: center; gap: 8px; flex-wrap: wrap; margin-top: 4px;">
+        {_badge_items(tokens, time_str, model_name)}
     </div>
     """
 
-# --- 3. 核心 V1 组件：删除按钮 ---
-
-def render_v1_delete_button(cid, sid, task_id):
-    """
-    使用 components.html 构建纯 HTML 删除按钮。
-
-    关键修改：
-    1. 给 components.html 设置固定的 width=30，防止在窄列中塌陷。
-    2. HTML body 设置为 flex 居中，确保图标位置正确。
-    """
-    html_code = f"""
-    <!DOCTYPE html>
-    <html style="overflow: hidden;">
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body {{
-                margin: 0; padding: 0;
-                background-color: transparent;
-                display: flex; 
-                align-items: center; 
-                justify-content: center;
-                height: 100vh; /* 撑满 iframe 高度 */
-                width: 100vw;
-                overflow: hidden;
-            }}
-            .del-btn {{
-                border: none; 
-                background: transparent; 
-                padding: 4px;
-                margin: 0;
-                cursor: pointer;
-                color: #999; /* 默认灰色 */
-                transition: color 0.2s ease, transform 0.1s;
-                display: flex; 
-                align-items: center; 
-                justify-content: center;
-                width: 24px; 
-                height: 24px;
-                line-height: 0;
-                outline: none;
-            }}
-            .del-btn:hover {{
-                color: #FF4B4B; /* 悬停红色 */
-            }}
-            .del-btn:active {{
-                transform: scale(0.9);
-            }}
-            svg {{
-                width: 16px; 
-                height: 16px;
-                fill: currentColor;
-                display: block;
-            }}
-        </style>
-        <script>
-            function handleDelete() {{
-                if (confirm('⚠️ 确定要删除这条对话吗？\\n此操作无法撤销。')) {{
-                    try {{
-                        const params = new URLSearchParams(window.parent.location.search);
-                        params.set('del_cid', '{cid}');
-                        params.set('del_sid', '{sid}');
-                        params.set('del_tid', '{task_id}');
-                        window.parent.location.search = params.toString();
-                    }} catch(e) {{
-                        console.error(e);
-                    }}
-                }}
-            }}
-        </script>
-    </head>
-    <body>
-        <button class="del-btn" onclick="handleDelete()" title="删除对话">
-            {DELETE_SVG}
-        </button>
-    </body>
-    </html>
-    """
-    # 【关键】强制设置 width=30 和 height=34，确保它占据物理空间
-    components.html(html_code, height=34, width=30, scrolling=False)
-
-def check_and_execute_deletion():
-    """
-    检查 URL 参数是否有删除指令，如果有则执行删除并清理 URL
-    """
-    try:
-        # 兼容不同版本的 query_params 获取方式
-        qp = st.query_params
-
-        # 将 query_params 转换为字典以方便检查
-        params_dict = dict(qp)
-
-        if "del_cid" in params_dict:
-            del_cid = params_dict["del_cid"]
-            del_sid = params_dict.get("del_sid")
-            del_tid = params_dict.get("del_tid")
-
-            # 执行删除
-            if st.session_state.get("bot"):
-                success, msg = st.session_state.bot.delete_chat_record(del_cid, del_sid, del_tid)
-                if success:
-                    st.toast("删除成功", icon="🗑️")
-
-                    # 刷新数据逻辑：重新加载会话
-                    bot = st.session_state.bot
-                    # 重新拉取数据
-                    ok, _ = bot.get_chat_records(bot.session_id)
-                    if ok:
-                        from .sidebar import load_session_to_state
-                        load_session_to_state(bot.session_id, "", st.session_state.get("current_session_model"), bot.authorization)
-                else:
-                    st.toast(f"删除失败: {msg}", icon="❌")
-
-            # 清理 URL 参数，防止刷新时重复触发
-            qp.clear()
-            # 立即重新运行以清除 URL 并刷新界面
-            st.rerun()
-
-    except Exception as e:
-        # print(f"Deletion check error: {e}")
-        pass
+# 进行中问答的用户消息在工具栏复制文本中的键（历史消息使用消息下标）
+ACTIVE_MESSAGE_INDEX = "active"
+
+def message_copy_text(msg_obj):
+    """消息被复制时的文本（AI 回复会先清洗）"""
+    content = msg_obj.get("content", "")
+    return clean_ai_text(content) if msg_obj["role"] == "assistant" else content
+
+def render_message_toolbar(msg_obj, message_index, model_name="Unknown"):
+    """
+    生成消息底部工具栏 HTML：复制 / 删除按钮 + 元数据徽章。
+    按钮只是带 data-* 属性的普通元素，点击由页面级的 chat_toolbar 组件统一处理
+    """
+    actions = [f'<button class="ac-msg-action" data-action="copy" data-index="{message_index}" title="复制">{COPY_SVG}</button>']
+    if msg_obj["role"] == "assistant":
+        # 数据缺失时按钮仍然显示，点击后由服务器返回删除失败
+        cid = msg_obj.get("cid") or msg_obj.get("id") or ""
+        sid = msg_obj.get("sid") or msg_obj.get("sessionId") or msg_obj.get("session_id") or ""
+        task_id = msg_obj.get("taskId") or msg_obj.get("task_id") or ""
+        actions.append(
+            f'<button class="ac-msg-action" data-action="delete" data-cid="{html.escape(str(cid))}" '
+            f'data-sid="{html.escape(str(sid))}" data-tid="{html.escape(str(task_id))}" title="删除对话">{DELETE_SVG}</button>'
+        )
+
+    use_tokens = msg_obj.get("useTokens", msg_obj.get("tokens", 0))
+    updated_time = msg_obj.get("updated", msg_obj.get("timestamp", ""))
+    return f"""
+    <div class="ac-msg-toolbar">
+        {''.join(actions)}
+        {_badge_items(use_tokens, updated_time, msg_obj.get("model") or model_name)}
+    </div>
+    """
+
+# --- 3. 页面级工具栏组件：一个 iframe 处理所有消息的复制 / 删除 ---
+
+_chat_toolbar = components.declare_component(
+    "chat_toolbar",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "toolbar")
+)
+
+def render_chat_toolbar(copy_texts):
+    """
+    渲染页面级工具栏组件；它上报的动作保存在 st.session_state["chat_toolbar"]，
+    由下一次运行开头的 process_pending_deletion 统一处理
+
+    Args:
+        copy_texts (dict): 消息下标（字符串）-> 复制文本，只需包含本次渲染的消息
+    """
+    _chat_toolbar(copy_texts=copy_texts, key="chat_toolbar", default=None)
+
+def _take_deletion_request():
+    """
+    取出本次运行待处理的删除请求：工具栏组件上报的新动作，或 URL 参数中的删除指令（旧链接）
+
+    Returns:
+        tuple or None: (对话ID, 会话ID, 任务ID)
+    """
+    event = st.session_state.get("chat_toolbar")
+    if event and event.get("action") == "delete" and event.get("nonce") != st.session_state.get("chat_toolbar_nonce"):
+        # 组件的值在之后的运行中保持不变，按 nonce 保证同一动作只处理一次
+        st.session_state.chat_toolbar_nonce = event.get("nonce")
+        return event.get("cid"), event.get("sid"), event.get("tid")
+
+    qp = st.query_params
+    if "del_cid" in qp:
+        request = (qp.get("del_cid"), qp.get("del_sid"), qp.get("del_tid"))
+        # 清理 URL 参数，防止刷新时重复触发
+        for key in ("del_cid", "del_sid", "del_tid"):
+            qp.pop(key, None)
+        return request
+    return None
+
+def remove_local_exchange(cid):
+    """
+    从 st.session_state.messages 和本地缓存中移除一轮问答（用户消息与回复共用同一个对话ID）
+
+    Returns:
+        int: 移除的消息条数
+    """
+    messages = st.session_state.get("messages", [])
+    kept = [m for m in messages if str(m.get("cid") or m.get("id") or "") != str(cid)]
+    st.session_state.messages = kept
+
+    from .local_store import get_store, owner_key
+    store = get_store()
+    if store and st.session_state.get("bot"):
+        store.delete_record(owner_key(st.session_state.bot.authorization), cid)
+    return len(messages) - len(kept)
+
+def process_pending_deletion():
+    """
+    每次脚本运行在渲染消息之前调用一次：
+    先在本地移除被删除的问答并立即渲染结果，服务器删除在后台确认，
+    删除键记入 st.session_state.pending_deletions，由 render_deletion_watcher 轮询确认结果
+    """
+    bot = st.session_state.get("bot")
+    if not bot:
+        return
+    request = _take_deletion_request()
+    if request is None:
+        return
+    cid, sid, task_id = request
+    if not cid:
+        st.toast("删除失败: 缺少对话ID", icon="❌")
+        return
+    from .delete_queue import submit_deletion
+
+    remove_local_exchange(cid)
+    key = submit_deletion(bot, cid, sid or bot.session_id, task_id)
+    st.session_state.setdefault("pending_deletions", []).append(key)
+    st.toast("已删除，等待服务器确认", icon="🗑️")
+
+def _reload_session_records(bot, session_id):
+    """
+    删除确认失败后从服务器重新加载会话：本地缓存中的记录已被移除，缓存优先的加载无法恢复它；
+    当前会话直接刷新消息列表，其他会话只把最新一页写回缓存
+    """
+    from .local_store import get_store, owner_key
+    from .utils import open_chat_history
+
+    if str(session_id) == str(bot.session_id):
+        st.session_state.pending_sync = None
+        st.session_state.messages = open_chat_history(bot, session_id)
+        return
+    store = get_store()
+    if store:
+        success, data = bot.get_chat_records(session_id)
+        records = data.get("records") if success and isinstance(data, dict) else None
+        if records:
+            store.upsert_records(owner_key(bot.authorization), session_id, records)
+
+@st.fragment(run_every=CONFIG["deletionPollInterval"])
+def render_deletion_watcher():
+    """
+    轮询本页提交的删除（局部刷新，不重跑整个页面）：确认成功时提示；
+    确认失败时从服务器重新加载被删记录所在的会话并整页重跑
+    """
+    pending = st.session_state.get("pending_deletions")
+    bot = st.session_state.get("bot")
+    if not pending or not bot:
+        return
+    from .delete_queue import pop_deletion_result
+
+    failed_sessions = []
+    for key in list(pending):
+        result = pop_deletion_result(key)
+        if result is None:
+            continue
+        pending.remove(key)
+        ok, msg = result
+        if ok:
+            st.toast("服务器已确认删除", icon="✅")
+        else:
+            st.toast(f"删除失败: {msg}", icon="❌")
+            if key[0] not in failed_sessions:
+                failed_sessions.append(key[0])
+    if failed_sessions:
+        for session_id in failed_sessions:
+            _reload_session_records(bot, session_id)
+        st.rerun()
 
 # --- 4. 主渲染函数 ---
 
 def render_chat_message(msg_obj, message_index, model_name="Unknown"):
-    # 每次渲染前检查是否有挂起的删除操作
-    check_and_execute_deletion()
-
     role = msg_obj["role"]
     content = msg_obj["content"]
 
@@ -191,35 +237,5 @@ def render_chat_message(msg_obj, message_index, model_name="Unknown"):
                 st.markdown(main_content)
 
         # --- 底部工具栏 ---
-        if role == "assistant":
-            # 布局：[复制 | 删除] [徽章......]
-            buttons_col, badges_col = st.columns([0.15, 0.85], vertical_alignment="center")
-
-            with buttons_col:
-                # 左侧复制，右侧删除
-                c_copy, c_del = st.columns([0.6, 0.4], gap="small", vertical_alignment="center")
-
-                with c_copy:
-                    text_to_copy = clean_ai_text(content)
-                    copy_button(text_to_copy)
-
-                with c_del:
-                    # 强制渲染删除按钮，不进行 if cid 判断 (假设数据存在)
-                    cid = msg_obj.get("cid") or msg_obj.get("id")
-                    sid = msg_obj.get("sid") or msg_obj.get("sessionId") or msg_obj.get("session_id")
-                    task_id = msg_obj.get("taskId") or msg_obj.get("task_id")
-
-                    # 直接渲染，数据缺失时按钮可能点击无效但会显示
-                    render_v1_delete_button(cid or "", sid or "", task_id or "")
-
-        else:
-            # 用户消息工具栏
-            buttons_col, badges_col = st.columns([0.05, 0.95], vertical_alignment="center")
-            with buttons_col:
-                copy_button(content)
-
-        # 渲染徽章
-        with badges_col:
-            use_tokens = msg_obj.get("useTokens", msg_obj.get("tokens", 0))
-            updated_time = msg_obj.get("updated", msg_obj.get("timestamp", ""))
-            st.html(render_badges(tokens=use_tokens, time_str=updated_time, model_name=model_name))
\ No newline at end of file
+        # 复制 / 删除按钮与徽章放在同一段 HTML 中，不再为每条消息创建 iframe
+        st.html(render_message_toolbar(msg_obj, message_index, model_name))
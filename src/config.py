@@ -16,12 +16,55 @@ def load_config():
         "base_url": BASE_URL,
         # 对话参数配置
         "contextCount": 25,
+        "contextTokenBudget": 8000, # 上下文 token 预算，超出时自动减少携带的上下文条数（0 表示不限制）
         "frequencyPenalty": 0,
         "maxToken": 0,
         "presencePenalty": 0,
         "prompt": "请使用用户交互的语言进行回复",
         "temperature": 0,
-        "topSort": 0
+        "topSort": 0,
+        # 连接池配置
+        "poolConnections": 4,   # 每个会话缓存的主机连接池数量
+        "poolMaxSize": 16,      # 单个主机连接池的最大连接数
+        "poolKeepAlive": 300,   # 会话空闲多少秒后被回收
+        # 流式渲染配置
+        "renderInterval": 0.05, # 两次重绘之间的最短间隔（秒）
+        "renderBytes": 512,     # 累积多少字节后立即重绘
+        "streamPollInterval": 0.25, # 后台生成时页面重新跟随任务的轮询间隔（秒），重绘频率由上面两项控制
+        "deletionPollInterval": 0.5, # 等待服务器确认删除时页面轮询的间隔（秒）
+        # 聊天记录渲染配置
+        "chatWindowTurns": 20,  # 完整渲染最近多少轮对话（0 表示全部渲染）
+        "chatPageTurns": 20,    # 更早的对话每多少轮折叠为一页
+        # SSE 解码配置
+        "sseBlockSize": 65536,  # 每次从连接读取的最大字节数（有多少读多少，不等待读满）
+        "jsonBackend": "auto",  # JSON 解析后端: auto / orjson / json
+        # 附件上传配置
+        "streamUploads": True,  # 有附件时使用分块传输流式发送请求体
+        "uploadChunkSize": 196608, # 每次读取并编码的原始字节数（3 的倍数）
+        "attachmentCacheBytes": 64 * 1024 * 1024,    # 附件编码缓存总容量（字节）
+        "attachmentCacheMaxFile": 8 * 1024 * 1024,   # 超过该大小的附件不缓存，直接流式编码
+        # 图片预处理配置（需要安装 Pillow）
+        "imagePrep": True,      # 上传前是否缩放并重新压缩图片
+        "imageMaxEdge": 2048,   # 图片最长边的最大像素
+        "imageQuality": 85,     # 重新压缩的质量 (1-95)
+        "imageFormat": "JPEG",  # 输出格式: JPEG / WEBP / PNG / keep（PNG 保持 PNG，其余转 JPEG）
+        "imageWorkers": 4,      # 并行处理图片的线程数
+        # 文档提取配置（PDF 需要安装 pypdf）
+        "docTextMode": False,   # 是否默认开启文本模式
+        "extractWorkers": 2,    # 提取文档文本的进程数
+        "extractCacheEntries": 64,  # 内存中缓存的提取结果数量（磁盘缓存不限）
+        # 聊天记录分页配置
+        "recordPrefetch": 2,    # 后台预取的历史记录页数
+        # 本地缓存配置
+        "localStore": False,    # 是否把会话列表与聊天记录缓存到 cacheDir 下的 SQLite（默认关闭，可在设置中开启）
+        "cacheDir": os.path.join(os.path.expanduser("~"), ".acaipro"),
+        # 会话列表缓存配置
+        "sessionListTTL": 60,   # 会话列表缓存有效期（秒），过期后在后台对账
+        "sessionPageSize": 50,  # 侧边栏每组先渲染的会话数，其余按“显示更多”分页展开（0 表示全部渲染）
+        # 模型列表缓存配置
+        "modelListTTL": 3600,   # 进程级模型列表缓存有效期（秒）
+        # 请求指标配置
+        "metricsBufferSize": 500  # 保留最近多少条请求指标
     }
     
     return config
@@ -0,0 +1,108 @@
+# 上下文规划模块 - 本地估算消息的 token 数，按 token 预算决定每次请求携带的上下文条数
+import re
+from .config import CONFIG
+
+# 中日韩字符大致一个字一个 token，其余文本大致 4 个字符一个 token
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+# 每条消息的角色、分隔符等固定开销
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text):
+    """
+    粗略估算文本的 token 数（不依赖分词器）
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        int: 估算的 token 数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def calibration_ratio(messages):
+    """
+    用服务器记录的 completionTokens 校准本地估算：实际 token 总数 / 估算总数，限制在 0.5 ~ 2 之间
+
+    Args:
+        messages (list): 消息列表
+
+    Returns:
+        float: 校准系数，没有可用记录时为 1.0
+    """
+    recorded = estimated = 0
+    for msg in messages:
+        if msg.get("role") == "assistant" and msg.get("tokens") and msg.get("content"):
+            recorded += msg["tokens"]
+            estimated += estimate_tokens(msg["content"])
+    if not recorded or not estimated:
+        return 1.0
+    return min(max(recorded / estimated, 0.5), 2.0)
+
+
+def message_tokens(msg, ratio=1.0):
+    """
+    单条消息的 token 数：AI 回复优先使用记录的 completionTokens，
+    用户消息记录的 promptTokens 包含了整个上下文，因此按内容估算
+    """
+    if msg.get("role") == "assistant" and msg.get("tokens"):
+        return msg["tokens"] + MESSAGE_OVERHEAD
+    return int(estimate_tokens(msg.get("content", "")) * ratio) + MESSAGE_OVERHEAD
+
+
+def plan_context(messages, user_text="", session_id=None, budget=None, max_count=None, system_prompt=None):
+    """
+    从最新的消息开始向前累加，选出不超过 token 预算的上下文条数
+
+    Args:
+        messages (list): 当前会话的消息列表（按时间顺序，通常为 st.session_state.messages）
+        user_text (str): 本次要发送的用户输入
+        session_id (str, optional): 只统计属于该会话的消息（多模型对比的回复属于其他会话）
+        budget (int, optional): token 预算，默认 CONFIG["contextTokenBudget"]，0 表示不限制
+        max_count (int, optional): 上下文条数上限，默认 CONFIG["contextCount"]
+        system_prompt (str, optional): 系统提示词，默认 CONFIG["prompt"]
+
+    Returns:
+        dict: {"count": 发送的上下文条数, "max_count": 条数上限, "prompt_tokens": 估算的提示 token 数,
+               "budget": 预算, "trimmed": 是否因预算减少了条数, "over_budget": 保留的最少上下文仍超出预算}
+    """
+    budget = CONFIG["contextTokenBudget"] if budget is None else budget
+    max_count = int(CONFIG["contextCount"] if max_count is None else max_count)
+    system_prompt = CONFIG["prompt"] if system_prompt is None else system_prompt
+
+    if session_id is not None:
+        messages = [m for m in messages if not m.get("sid") or str(m.get("sid")) == str(session_id)]
+    ratio = calibration_ratio(messages)
+    base = estimate_tokens(system_prompt) + int(estimate_tokens(user_text) * ratio) + 2 * MESSAGE_OVERHEAD
+
+    count = 0
+    total = base
+    for msg in reversed(messages):
+        if count >= max_count:
+            break
+        tokens = message_tokens(msg, ratio)
+        if budget and total + tokens > budget:
+            break
+        total += tokens
+        count += 1
+
+    trimmed = count < max_count and count < len(messages)
+    if count == 0 and messages:
+        # 部分后端把 0 视为不限制，至少保留 1 条；这一条即使超出预算也会被发送，需要计入提示 token 数
+        total += message_tokens(messages[-1], ratio)
+        count = 1
+    if not trimmed:
+        # 本地只加载了部分历史时，已知部分在预算内，未加载的部分交给服务器按原条数处理
+        count = max(max_count, 1)
+    return {
+        "count": count,
+        "max_count": max_count,
+        "prompt_tokens": total,
+        "budget": budget,
+        "trimmed": trimmed,
+        "over_budget": bool(budget) and total > budget
+    }
@@ -1,20 +1,113 @@
 # 核心业务逻辑模块 - 处理AI客户端和API调用
-import requests
 import json
-import base64
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from .config import CONFIG
+from .http_pool import pooled_session
+from .sse import iter_events, EVENT_STRING
+from .upload_stream import iter_chat_body, file_data_prefix
+from .attachment_cache import encode_file
+from . import metrics
 
-class AIClient:
+
+class CancelToken:
     """
-    AI客户端类，处理与API的交互
+    流式对话的取消令牌，可在任意线程调用 cancel() 停止生成
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._responses = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def bind(self, response):
+        """
+        登记正在读取的同步响应，取消时立即关闭连接（已取消时直接关闭）
+        """
+        with self._lock:
+            if not self.cancelled:
+                self._responses.append(response)
+                return
+        _close_quietly(response)
+
+    def cancel(self):
+        """
+        取消生成并关闭所有已登记的响应
+        """
+        with self._lock:
+            self._event.set()
+            responses, self._responses = self._responses, []
+        for response in responses:
+            _close_quietly(response)
+
+
+def _response_socket(response):
+    """
+    取出 requests 响应底层的 socket（不同版本的 urllib3 路径不同），取不到时返回 None
     """
-    def __init__(self, authorization):
+    raw = getattr(response, "raw", None)
+    connection = getattr(raw, "_connection", None) or getattr(raw, "connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        return sock
+    try:
+        return raw._fp.fp.raw._sock
+    except AttributeError:
+        return None
+
+
+def _close_quietly(response):
+    # 只调用 close() 不会唤醒正阻塞在 recv() 中的读取线程，先 shutdown 让对方的读取立即返回
+    sock = _response_socket(response)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    try:
+        response.close()
+    except Exception:
+        pass
+
+
+def _iter_available(response, size):
+    """
+    逐块产出连接上已经到达的字节（每块最多 size 字节），不等待攒满 size。
+    iter_content(chunk_size=N) 会攒满 N 字节才产出；chunk_size=None 在非 chunked、以关闭连接结束的响应上
+    会一直读到连接关闭，两种情况首字都要等到流结束，SSE 事件边界交给 SSEDecoder 切分
+    """
+    read1 = getattr(response.raw, "read1", None)
+    if read1 is None:
+        # urllib3 1.x 没有 read1，按收到的 chunk 产出
+        yield from response.iter_content(chunk_size=None)
+        return
+    while True:
+        block = read1(size)
+        if not block:
+            return
+        yield block
+
+
+class BaseAIClient:
+    """
+    AI客户端基类，保存请求头、会话状态，以及同步/异步客户端共享的请求体构造与响应解析逻辑
+    """
+    def __init__(self, authorization, base_url=None):
         self.authorization = authorization
         self.session_id = None
-        self.base_url = CONFIG["base_url"]
+        # 默认使用配置中的地址，可指向本地模拟服务器等其他地址
+        self.base_url = base_url or CONFIG["base_url"]
         # 新增：用于存储最后一次对话的完整元数据（时间、Tokens等）
         self.last_chat_metadata = {}
         self.last_tokens_used = 0
+        # 当前会话使用的模型（用于按模型统计指标）与最后一次流式对话的指标
+        self.model = None
+        self.last_stream_metrics = {}
         self.headers = {
             "Authorization": authorization,
             "Content-Type": "application/json",
@@ -34,19 +127,40 @@ class AIClient:
             "Sec-Fetch-Site": "same-origin"
         }
 
-    def create_session(self, model="gemini-3-pro-preview"):
+    def process_streamlit_file(self, uploaded_file):
         """
-        创建新会话
+        处理Streamlit上传的文件，转换为API需要的格式
         
         Args:
-            model (str): 要使用的模型名称
+            uploaded_file: Streamlit上传文件对象
             
         Returns:
-            tuple: (成功状态, 消息或会话ID)
+            dict or None: 处理后的文件数据，或None（如果处理失败）
         """
+        if not uploaded_file:
+            return None
 
-        url = f"{self.base_url}/chat/session"
-        payload = {
+        try:
+            # 按内容哈希复用已编码的结果，重复发送同一文件时不再重新编码
+            encoded = encode_file(uploaded_file).decode('utf-8')
+
+            # 获取文件名，按扩展名（或预处理图片的 MIME 类型）生成前缀
+            filename = uploaded_file.name
+            prefix = file_data_prefix(filename, getattr(uploaded_file, "mime", None))
+
+            # 构造API需要的格式
+            return {
+                "name": filename,
+                "data": f"{prefix}{encoded}"
+            }
+        except Exception as e:
+            return None
+
+    def _build_session_payload(self, model):
+        """
+        构造创建会话的请求体
+        """
+        return {
             "model": model, 
             "plugins": [], 
             "mcp": [],
@@ -58,48 +172,216 @@ class AIClient:
             "temperature": CONFIG["temperature"],
             "topSort": CONFIG["topSort"]
         }
+
+    def _build_update_payload(self, update_data, session_data):
+        """
+        构造更新会话的请求体
+        """
+        # 1. 以当前会话数据为基础，保留 id, created, model, uid 等字段
+        payload = session_data.copy()
+
+        # 2. 根据需求：生成参数以 CONFIG 全局配置为准
+        # 强制同步以下字段，防止前端使用了旧的配置
+        config_sync_keys = [
+            "contextCount", 
+            "frequencyPenalty", 
+            "maxToken", 
+            "presencePenalty", 
+            "prompt", 
+            "temperature"
+        ]
+
+        for key in config_sync_keys:
+            if key in CONFIG:
+                payload[key] = CONFIG[key]
+
+        # 3. 应用本次明确的更新 (例如 name, topSort)
+        # 这会覆盖掉上面的 Config 值（如果 update_data 里也有的话），也会覆盖掉旧的 session_data
+        payload.update(update_data)
+        return payload
+
+    def _build_chat_payload(self, user_text, file_obj=None, context_count=None):
+        """
+        构造流式对话的请求体，context_count 为本次携带的上下文条数（默认使用配置）
+        """
+        files_data = []
+        if file_obj:
+            # 支持单个文件或多个文件
+            if isinstance(file_obj, list):
+                # 处理多个文件
+                for uploaded_file in file_obj:
+                    processed_file = self.process_streamlit_file(uploaded_file)
+                    if processed_file:
+                        files_data.append(processed_file)
+            else:
+                # 处理单个文件
+                processed_file = self.process_streamlit_file(file_obj)
+                if processed_file:
+                    files_data.append(processed_file)
+
+        return {
+            "sessionId": self.session_id,
+            "text": user_text,
+            "files": files_data,
+            "contextCount": CONFIG["contextCount"] if context_count is None else context_count,
+            "frequencyPenalty": CONFIG["frequencyPenalty"],
+            "maxToken": CONFIG["maxToken"],
+            "presencePenalty": CONFIG["presencePenalty"],
+            "prompt": CONFIG["prompt"],
+            "temperature": CONFIG["temperature"],
+            "topSort": CONFIG["topSort"]
+        }
+
+    def _stream_headers(self):
+        """
+        流式接口使用的请求头
+        """
+        stream_headers = self.headers.copy()
+        stream_headers["Accept"] = "text/event-stream"
+        return stream_headers
+
+    def _unwrap(self, res_json, default=None, success_value=None, fail_msg=None):
+        """
+        解析 API 统一响应格式 {"code": 0, "data": ..., "msg": ...}
+
+        Args:
+            res_json (dict): 响应 JSON
+            default: data 字段缺失时的默认值
+            success_value: 成功时返回的固定值（为 None 时返回 data）
+            fail_msg (str, optional): msg 字段缺失时的失败消息
+
+        Returns:
+            tuple: (成功状态, 数据或错误消息)
+        """
+        if res_json.get("code") == 0:
+            if success_value is not None:
+                return True, success_value
+            return True, res_json.get('data', default)
+        return False, res_json.get('msg', fail_msg)
+
+    def _record_request(self, method, url, start, status=None, nbytes=0, error=None):
+        """
+        记录一次普通请求的耗时、状态与响应字节数
+        """
+        metrics.record({
+            "endpoint": metrics.endpoint_name(method, url, self.base_url),
+            "status": status,
+            "ok": error is None and status is not None and status < 400,
+            "error": error,
+            "latency": time.perf_counter() - start,
+            "bytes": nbytes,
+            "model": self.model
+        })
+
+    def _stream_timer(self, url):
+        """
+        为流式对话创建计时器
+        """
+        return metrics.StreamTimer(metrics.endpoint_name("POST", url, self.base_url))
+
+    def _reset_chat_metadata(self):
+        """
+        每次对话开始前重置元数据
+        """
+        self.last_tokens_used = 0
+        self.last_chat_metadata = {} # 初始化为空字典
+
+    def _event_content(self, kind, value):
+        """
+        将 SSE 解码结果转换为流式文本，非文本事件用于更新元数据
+
+        Returns:
+            str or None: 流式文本内容
+        """
+        if kind == EVENT_STRING:
+            return value
+        return self._handle_stream_event(value)
+
+    def _handle_stream_event(self, data_obj):
+        """
+        处理一条 SSE 事件，更新元数据
+
+        Returns:
+            str or None: 流式文本内容（非文本事件返回 None）
+        """
+        if not isinstance(data_obj, dict):
+            return None
+
+        # 1. 处理字符串内容 (流式文本)
+        if data_obj.get("type") == "string":
+            return data_obj.get("data", "")
+
+        # 2. 处理对象元数据 (API返回的最终统计信息)
+        if data_obj.get("type") == "object":
+            # data 结构示例: {"id":..., "created":"...", "updated":"...", "completionTokens":...}
+            data = data_obj.get("data", {})
+            if not isinstance(data, dict):
+                return None
+
+            # 保存完整元数据到实例变量，供外部读取
+            self.last_chat_metadata = data
+
+            # 为了兼容旧逻辑，更新 tokens
+            self.last_tokens_used = data.get("completionTokens", 0)
+
+        # 3. 处理 stats 类型 (兼容性)
+        elif data_obj.get("type") == "stats":
+            stats = data_obj.get("data", {})
+            if isinstance(stats, dict):
+                self.last_tokens_used = stats.get("totalToken", 0)
+        return None
+
+
+class AIClient(BaseAIClient):
+    """
+    AI客户端类，处理与API的交互
+    """
+
+    def _request(self, method, url, http=None, **kwargs):
+        """
+        通过共享连接池发送请求，默认携带实例请求头。
+        未传入 http 时在本次请求期间借用连接池会话；流式请求由调用方借用到响应读完为止
+        """
+        if http is None:
+            with pooled_session(self.base_url, self.authorization) as http:
+                return self._request(method, url, http=http, **kwargs)
+        kwargs.setdefault("headers", self.headers)
+        start = time.perf_counter()
         try:
-            response = requests.post(url, headers=self.headers, json=payload)
-            if response.status_code == 200:
-                res_json = response.json()
-                if res_json.get("code") == 0:
-                    self.session_id = res_json['data']['id']
-                    return True, str(self.session_id)
-                else:
-                    return False, res_json.get('msg')
-            return False, f"HTTP {response.status_code}"
+            response = http.request(method, url, **kwargs)
         except Exception as e:
-            return False, str(e)
+            self._record_request(method, url, start, error=str(e))
+            raise
+        # 流式请求由 chat_stream 自行记录首字节、首字与总耗时
+        if not kwargs.get("stream"):
+            self._record_request(method, url, start, response.status_code, len(response.content))
+        return response
 
-    def process_streamlit_file(self, uploaded_file):
+    def create_session(self, model="gemini-3-pro-preview"):
         """
-        处理Streamlit上传的文件，转换为API需要的格式
+        创建新会话
         
         Args:
-            uploaded_file: Streamlit上传文件对象
+            model (str): 要使用的模型名称
             
         Returns:
-            dict or None: 处理后的文件数据，或None（如果处理失败）
+            tuple: (成功状态, 消息或会话ID)
         """
-        if not uploaded_file:
-            return None
 
+        url = f"{self.base_url}/chat/session"
+        payload = self._build_session_payload(model)
         try:
-            # 读取文件字节流
-            bytes_data = uploaded_file.getvalue()
-            encoded = base64.b64encode(bytes_data).decode('utf-8')
-
-            # 获取文件名和扩展名
-            filename = uploaded_file.name
-            ext = filename.split('.')[-1]
-
-            # 构造API需要的格式
-            return {
-                "name": filename,
-                "data": f"data:application/{ext};base64,{encoded}"
-            }
+            response = self._request("POST", url, json=payload)
+            if response.status_code == 200:
+                ok, data = self._unwrap(response.json())
+                if ok:
+                    self.session_id = data['id']
+                    self.model = model
+                    return True, str(self.session_id)
+                return False, data
+            return False, f"HTTP {response.status_code}"
         except Exception as e:
-            return None
+            return False, str(e)
 
     def get_sessions(self):
         """
@@ -110,13 +392,9 @@ class AIClient:
         """
         url = f"{self.base_url}/chat/session"
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._request("GET", url)
             if response.status_code == 200:
-                res_json = response.json()
-                if res_json.get("code") == 0:
-                    return True, res_json.get('data', [])
-                else:
-                    return False, res_json.get('msg')
+                return self._unwrap(response.json(), default=[])
             return False, f"HTTP {response.status_code}"
         except Exception as e:
             return False, str(e)
@@ -134,17 +412,52 @@ class AIClient:
         """
         url = f"{self.base_url}/chat/record/{session_id}?page={page}"
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._request("GET", url)
             if response.status_code == 200:
-                res_json = response.json()
-                if res_json.get("code") == 0:
-                    return True, res_json.get('data', {})
-                else:
-                    return False, res_json.get('msg')
+                return self._unwrap(response.json(), default={})
             return False, f"HTTP {response.status_code}"
         except Exception as e:
             return False, str(e)
 
+    def iter_chat_records(self, session_id, start_page=1, prefetch=None):
+        """
+        按页迭代聊天记录（第 1 页为最新），并在后台并发预取后续若干页
+
+        Args:
+            session_id (str): 会话ID
+            start_page (int): 起始页码
+            prefetch (int, optional): 预取页数，默认读取 CONFIG["recordPrefetch"]
+
+        Yields:
+            list: 每一页的记录列表（新→旧），遇到空页、短页或请求失败时结束
+        """
+        prefetch = CONFIG["recordPrefetch"] if prefetch is None else prefetch
+        executor = ThreadPoolExecutor(max_workers=prefetch + 1, thread_name_prefix="record-prefetch")
+        futures = {}
+        page = start_page
+        page_size = None
+        try:
+            while True:
+                for p in range(page, page + prefetch + 1):
+                    if p not in futures:
+                        futures[p] = executor.submit(self.get_chat_records, session_id, p)
+
+                success, data = futures.pop(page).result()
+                records = data.get("records") if success and isinstance(data, dict) else None
+                if not records:
+                    return
+                yield records
+
+                # 以第一页的条数作为页大小，条数不足说明已是最后一页
+                page_size = page_size or len(records)
+                if len(records) < page_size:
+                    return
+                page += 1
+        finally:
+            for future in futures.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+
     def update_session(self, session_id, update_data, session_data):
         """
         更新会话信息（名称、置顶状态等）
@@ -159,37 +472,13 @@ class AIClient:
         """
         url = f"{self.base_url}/chat/session/{session_id}"
         try:
-            # 1. 以当前会话数据为基础，保留 id, created, model, uid 等字段
-            payload = session_data.copy()
-
-            # 2. 根据需求：生成参数以 CONFIG 全局配置为准
-            # 强制同步以下字段，防止前端使用了旧的配置
-            config_sync_keys = [
-                "contextCount", 
-                "frequencyPenalty", 
-                "maxToken", 
-                "presencePenalty", 
-                "prompt", 
-                "temperature"
-            ]
-
-            for key in config_sync_keys:
-                if key in CONFIG:
-                    payload[key] = CONFIG[key]
-
-            # 3. 应用本次明确的更新 (例如 name, topSort)
-            # 这会覆盖掉上面的 Config 值（如果 update_data 里也有的话），也会覆盖掉旧的 session_data
-            payload.update(update_data)
+            payload = self._build_update_payload(update_data, session_data)
 
             # 发送 PUT 请求
-            response = requests.put(url, headers=self.headers, json=payload)
+            response = self._request("PUT", url, json=payload)
 
             if response.status_code == 200:
-                res_json = response.json()
-                if res_json.get("code") == 0:
-                    return True, "会话信息更新成功"
-                else:
-                    return False, res_json.get('msg', '更新失败')
+                return self._unwrap(response.json(), success_value="会话信息更新成功", fail_msg='更新失败')
             return False, f"HTTP {response.status_code}"
 
         except Exception as e:
@@ -220,13 +509,9 @@ class AIClient:
         """
         url = f"{self.base_url}/chat/tmpl"
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._request("GET", url)
             if response.status_code == 200:
-                res_json = response.json()
-                if res_json.get("code") == 0:
-                    return True, res_json.get('data', {})
-                else:
-                    return False, res_json.get('msg')
+                return self._unwrap(response.json(), default={})
             return False, f"HTTP {response.status_code}"
         except Exception as e:
             return False, str(e)
@@ -243,13 +528,9 @@ class AIClient:
         """
         url = f"{self.base_url}/chat/session/{session_id}"
         try:
-            response = requests.delete(url, headers=self.headers)
+            response = self._request("DELETE", url)
             if response.status_code == 200:
-                res_json = response.json()
-                if res_json.get("code") == 0:
-                    return True, "会话删除成功"
-                else:
-                    return False, res_json.get('msg')
+                return self._unwrap(response.json(), success_value="会话删除成功")
             return False, f"HTTP {response.status_code}"
         except Exception as e:
             return False, str(e)
@@ -272,15 +553,11 @@ class AIClient:
             url += f"&taskId={task_id}"
         
         try:
-            response = requests.delete(url, headers=self.headers)
+            response = self._request("DELETE", url)
             if response.status_code == 200:
                 # 检查API返回的JSON格式
                 try:
-                    res_json = response.json()
-                    if res_json.get("code") == 0:
-                        return True, "聊天记录删除成功"
-                    else:
-                        return False, res_json.get('msg', "删除失败")
+                    return self._unwrap(response.json(), success_value="聊天记录删除成功", fail_msg="删除失败")
                 except json.JSONDecodeError:
                     # 如果返回的不是JSON格式，可能是直接返回成功信息
                     return True, "聊天记录删除成功"
@@ -288,85 +565,59 @@ class AIClient:
         except Exception as e:
             return False, str(e)
 
-    def chat_stream(self, user_text, file_obj=None):
+    def chat_stream(self, user_text, file_obj=None, cancel_token=None, context_count=None):
         """
         流式聊天生成器
+
+        Args:
+            user_text (str): 用户输入
+            file_obj: 上传的文件（可选）
+            cancel_token (CancelToken, optional): 取消令牌，取消后立即关闭连接并结束生成
+            context_count (int, optional): 本次携带的上下文条数，默认使用 CONFIG["contextCount"]
         """
         if not self.session_id:
             yield "⚠️ 会话未连接，请先创建或选择会话！"
             return
 
         # 重置元数据
-        self.last_tokens_used = 0
-        self.last_chat_metadata = {} # 初始化为空字典
+        self._reset_chat_metadata()
 
         url = f"{self.base_url}/chat/completions"
+        # 有附件时流式发送请求体，附件分块编码，避免整文件的多份副本同时驻留内存
+        if file_obj and CONFIG["streamUploads"]:
+            body = {"data": iter_chat_body(self._build_chat_payload(user_text, context_count=context_count), file_obj)}
+        else:
+            body = {"json": self._build_chat_payload(user_text, file_obj, context_count)}
 
-        files_data = []
-        if file_obj:
-            # 支持单个文件或多个文件
-            if isinstance(file_obj, list):
-                # 处理多个文件
-                for uploaded_file in file_obj:
-                    processed_file = self.process_streamlit_file(uploaded_file)
-                    if processed_file:
-                        files_data.append(processed_file)
-            else:
-                # 处理单个文件
-                processed_file = self.process_streamlit_file(file_obj)
-                if processed_file:
-                    files_data.append(processed_file)
-
-        payload = {
-            "sessionId": self.session_id,
-            "text": user_text,
-            "files": files_data,
-            "contextCount": CONFIG["contextCount"],
-            "frequencyPenalty": CONFIG["frequencyPenalty"],
-            "maxToken": CONFIG["maxToken"],
-            "presencePenalty": CONFIG["presencePenalty"],
-            "prompt": CONFIG["prompt"],
-            "temperature": CONFIG["temperature"],
-            "topSort": CONFIG["topSort"]
-        }
-
-        stream_headers = self.headers.copy()
-        stream_headers["Accept"] = "text/event-stream"
+        timer = self._stream_timer(url)
+        error = None
+        finished = False
+        response = None
+        # 流式响应读取期间一直借用连接池会话，避免被空闲回收关闭
+        with pooled_session(self.base_url, self.authorization) as http:
+            try:
+                response = self._request("POST", url, http=http, headers=self._stream_headers(), stream=True, **body)
+                timer.response_started(response.status_code)
+                if cancel_token is not None:
+                    cancel_token.bind(response)
 
-        try:
-            response = requests.post(url, headers=stream_headers, json=payload, stream=True)
-
-            for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    if decoded_line.startswith("data:"):
-                        json_str = decoded_line[5:].strip()
-                        if json_str == "[DONE]":
-                            break
-                        try:
-                            data_obj = json.loads(json_str)
-                            
-                            # 1. 处理字符串内容 (流式文本)
-                            if isinstance(data_obj, dict) and data_obj.get("type") == "string":
-                                content = data_obj.get("data", "")
-                                yield content
-                                
-                            # 2. 处理对象元数据 (API返回的最终统计信息)
-                            elif isinstance(data_obj, dict) and data_obj.get("type") == "object":
-                                # data 结构示例: {"id":..., "created":"...", "updated":"...", "completionTokens":...}
-                                data = data_obj.get("data", {})
-                                
-                                # 保存完整元数据到实例变量，供外部读取
-                                self.last_chat_metadata = data
-                                
-                                # 为了兼容旧逻辑，更新 tokens
-                                self.last_tokens_used = data.get("completionTokens", 0)
-                                
-                            # 3. 处理 stats 类型 (兼容性)
-                            elif isinstance(data_obj, dict) and data_obj.get("type") == "stats":
-                                self.last_tokens_used = data_obj.get("data", {}).get("totalToken", 0)
-                                
-                        except Exception:
-                            continue
-        except Exception as e:
-            yield f"❌ 网络请求错误: {e}"
\ No newline at end of file
+                for kind, value in iter_events(timer.count(_iter_available(response, CONFIG["sseBlockSize"]))):
+                    if cancel_token is not None and cancel_token.cancelled:
+                        break
+                    content = self._event_content(kind, value)
+                    if content is not None:
+                        timer.token()
+                        yield content
+                else:
+                    finished = True
+            except Exception as e:
+                # 取消时连接被另一线程关闭，读取异常属于预期，不作为错误输出
+                if cancel_token is None or not cancel_token.cancelled:
+                    error = str(e)
+                    yield f"❌ 网络请求错误: {e}"
+            finally:
+                # 提前结束（取消或调用方关闭生成器）时立即关闭连接，避免服务器继续推送
+                if response is not None:
+                    _close_quietly(response)
+                self.last_stream_metrics = timer.finish(self.last_chat_metadata, self.model, error,
+                                                        cancelled=not finished and error is None)
@@ -0,0 +1,51 @@
+# 删除队列模块 - 页面先在本地移除被删除的对话，服务器删除在后台线程中确认，确认结果由提交删除的页面轮询取走
+import threading
+from .core import AIClient
+
+# 后台确认完成的删除: (会话ID, 对话ID) -> (是否成功, 消息)
+_results = {}
+_lock = threading.Lock()
+
+
+def _confirm(bot, cid, sid, task_id):
+    try:
+        ok, msg = bot.delete_chat_record(cid, sid, task_id)
+    except Exception as e:
+        ok, msg = False, str(e)
+    with _lock:
+        _results[(str(sid), str(cid))] = (ok, msg)
+
+
+def submit_deletion(bot, cid, sid, task_id=""):
+    """
+    在后台线程中向服务器删除一条对话记录（只发送这一次请求）
+
+    Args:
+        bot (AIClient): 页面上的客户端，用于复制 authorization 与 base_url
+        cid (str): 对话ID
+        sid (str): 会话ID
+        task_id (str): 任务ID
+
+    Returns:
+        tuple: 删除键 (会话ID, 对话ID)，用于 pop_deletion_result 取回确认结果
+    """
+    # 后台线程使用独立的客户端，不与页面上的客户端共享状态
+    worker_bot = AIClient(bot.authorization, bot.base_url)
+    threading.Thread(
+        target=_confirm, args=(worker_bot, cid, sid, task_id or ""), name=f"delete-{cid}", daemon=True
+    ).start()
+    return str(sid), str(cid)
+
+
+def pop_deletion_result(key):
+    """
+    取走一条删除的确认结果；只有提交这条删除的页面持有它的删除键
+
+    Args:
+        key (tuple): submit_deletion 返回的删除键 (会话ID, 对话ID)
+
+    Returns:
+        tuple or None: (是否成功, 消息)，尚未确认时为 None
+    """
+    with _lock:
+        return _results.pop(key, None)
@@ -0,0 +1,328 @@
+# 文档提取模块 - 在本地进程池中把 PDF / DOCX / XLSX 等附件转换为纯文本或 Markdown，按内容哈希缓存
+import io
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from .config import CONFIG
+from .attachment_cache import file_digest
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf 为可选依赖，未安装时 PDF 按原样上传
+    PdfReader = None
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+S_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+# --- 各格式提取函数（在子进程中执行，必须是模块级函数） ---
+
+def _markdown_row(cells):
+    return "| " + " | ".join(c.replace("|", "\\|").replace("\n", " ") for c in cells) + " |"
+
+
+def _markdown_table(rows):
+    """
+    将二维列表转换为 Markdown 表格（第一行作为表头）
+    """
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    lines = [_markdown_row(rows[0]), "| " + " | ".join(["---"] * width) + " |"]
+    lines.extend(_markdown_row(row) for row in rows[1:])
+    return "\n".join(lines)
+
+
+def _docx_paragraph(p):
+    parts = []
+    for node in p.iter():
+        if node.tag == W_NS + "t":
+            parts.append(node.text or "")
+        elif node.tag == W_NS + "tab":
+            parts.append("\t")
+        elif node.tag in (W_NS + "br", W_NS + "cr"):
+            parts.append("\n")
+    text = "".join(parts)
+
+    style = p.find(f"{W_NS}pPr/{W_NS}pStyle")
+    level = re.match(r"(?:Heading|heading|标题)\s*(\d)", style.get(W_NS + "val", "")) if style is not None else None
+    if level and text.strip():
+        return "#" * int(level.group(1)) + " " + text.strip()
+    return text
+
+
+def extract_docx(data):
+    """
+    DOCX：段落转为文本行，标题样式转为 Markdown 标题，表格转为 Markdown 表格
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ET.fromstring(archive.read("word/document.xml"))
+    body = root.find(W_NS + "body")
+    blocks = []
+    for child in body:
+        if child.tag == W_NS + "p":
+            blocks.append(_docx_paragraph(child))
+        elif child.tag == W_NS + "tbl":
+            rows = [
+                ["\n".join(_docx_paragraph(p) for p in cell.iter(W_NS + "p")) for cell in row.iter(W_NS + "tc")]
+                for row in child.iter(W_NS + "tr")
+            ]
+            if rows:
+                blocks.append(_markdown_table(rows))
+    return "\n\n".join(block for block in blocks if block.strip())
+
+
+def _column_index(ref):
+    """
+    单元格引用（如 "AB12"）的列号，从 0 开始
+    """
+    index = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        index = index * 26 + ord(ch.upper()) - 64
+    return index - 1
+
+
+def extract_xlsx(data):
+    """
+    XLSX：每个工作表输出一个二级标题和一张 Markdown 表格
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = set(archive.namelist())
+        shared = []
+        if "xl/sharedStrings.xml" in names:
+            for si in ET.fromstring(archive.read("xl/sharedStrings.xml")).iter(S_NS + "si"):
+                shared.append("".join(t.text or "" for t in si.iter(S_NS + "t")))
+
+        rels = {
+            rel.get("Id"): rel.get("Target")
+            for rel in ET.fromstring(archive.read("xl/_rels/workbook.xml.rels")).iter(PKG_REL_NS + "Relationship")
+        }
+        sections = []
+        for sheet in ET.fromstring(archive.read("xl/workbook.xml")).iter(S_NS + "sheet"):
+            target = rels.get(sheet.get(R_NS + "id"), "")
+            path = target.lstrip("/") if target.startswith("/") else "xl/" + target
+            if path not in names:
+                continue
+            rows = []
+            for row in ET.fromstring(archive.read(path)).iter(S_NS + "row"):
+                values = []
+                for cell in row.iter(S_NS + "c"):
+                    col = _column_index(cell.get("r", ""))
+                    if col < 0:
+                        col = len(values)
+                    if col >= len(values):
+                        values.extend([""] * (col - len(values) + 1))
+                    kind = cell.get("t")
+                    if kind == "s":
+                        v = cell.find(S_NS + "v")
+                        text = shared[int(v.text)] if v is not None and v.text else ""
+                    elif kind == "inlineStr":
+                        text = "".join(t.text or "" for t in cell.iter(S_NS + "t"))
+                    else:
+                        v = cell.find(S_NS + "v")
+                        text = v.text if v is not None and v.text else ""
+                    values[col] = text
+                if any(values):
+                    rows.append(values)
+            if rows:
+                sections.append(f"## {sheet.get('name')}\n\n{_markdown_table(rows)}")
+    return "\n\n".join(sections)
+
+
+def extract_pdf(data):
+    """
+    PDF：需要安装 pypdf，逐页提取文本
+    """
+    reader = PdfReader(io.BytesIO(data))
+    pages = [page.extract_text() or "" for page in reader.pages]
+    return "\n\n".join(f"<!-- 第 {i} 页 -->\n{text.strip()}" for i, text in enumerate(pages, 1) if text.strip())
+
+
+def _extractor(ext):
+    if ext == "docx":
+        return extract_docx
+    if ext == "xlsx":
+        return extract_xlsx
+    if ext == "pdf" and PdfReader is not None:
+        return extract_pdf
+    return None
+
+
+def extract_text(name, data):
+    """
+    按扩展名提取文档文本（进程池的任务入口）
+
+    Args:
+        name (str): 文件名
+        data (bytes): 文件内容
+
+    Returns:
+        tuple: (成功状态, 提取的文本或错误消息)
+    """
+    extractor = _extractor(name.rsplit(".", 1)[-1].lower())
+    if extractor is None:
+        return False, "不支持的格式"
+    try:
+        return True, extractor(data)
+    except Exception as e:
+        return False, str(e)
+
+
+# --- 缓存与进程池 ---
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+_stats = {"hits": 0, "extracted": 0, "failed": 0}
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Streamlit 服务进程是多线程的，fork 出的子进程可能继承其他线程持有的锁，改用 spawn 启动
+            _pool = ProcessPoolExecutor(max_workers=CONFIG["extractWorkers"],
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _disk_path(digest):
+    return os.path.join(CONFIG["cacheDir"], "extracted", f"{digest}.md")
+
+
+def _cache_get(digest):
+    with _cache_lock:
+        text = _cache.get(digest)
+        if text is not None:
+            _cache.move_to_end(digest)
+            return text
+    try:
+        with open(_disk_path(digest), "r", encoding="utf-8") as f:
+            text = f.read()
+    except OSError:
+        return None
+    _cache_put(digest, text, persist=False)
+    return text
+
+
+def _cache_put(digest, text, persist=True):
+    with _cache_lock:
+        _cache[digest] = text
+        while len(_cache) > CONFIG["extractCacheEntries"]:
+            _cache.popitem(last=False)
+    if persist:
+        path = _disk_path(digest)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+class TextAttachment(io.BytesIO):
+    """
+    提取后的文本附件，接口与 Streamlit UploadedFile 一致
+
+    Args:
+        text (str): 提取的文本
+        name (str): 新文件名（原文件名 + .md）
+        original_size (int): 原始文件大小
+    """
+    def __init__(self, text, name, original_size):
+        data = text.encode("utf-8")
+        super().__init__(data)
+        self.name = name
+        self.type = "text/markdown"
+        self.mime = "text/markdown"
+        self.size = len(data)
+        self.original_size = original_size
+
+
+def supported_formats():
+    """
+    可以在本地提取文本的格式（未安装 pypdf 时不含 PDF）
+
+    Returns:
+        list: 格式名称列表
+    """
+    return (["PDF"] if PdfReader is not None else []) + ["DOCX", "XLSX"]
+
+
+def is_supported(uploaded_file):
+    """
+    附件是否可以在本地提取文本
+    """
+    return _extractor(uploaded_file.name.rsplit(".", 1)[-1].lower()) is not None
+
+
+def extract_attachments(files):
+    """
+    把支持的文档附件替换为提取出的文本附件，其余附件原样返回；
+    未命中缓存的文档在进程池中并行提取
+
+    Args:
+        files (list): 上传的文件列表
+
+    Returns:
+        tuple: (处理后的文件列表, {"documents": 转换的文档数, "original": 原始字节数, "extracted": 文本字节数, "failed": [文件名]})
+    """
+    report = {"documents": 0, "original": 0, "extracted": 0, "failed": []}
+    if not files:
+        return files, report
+
+    pending = {}
+    texts = {}
+    for index, f in enumerate(files):
+        if not is_supported(f):
+            continue
+        digest = file_digest(f)
+        text = _cache_get(digest)
+        if text is not None:
+            _stats["hits"] += 1
+            texts[index] = text
+        else:
+            pending[index] = (digest, _get_pool().submit(extract_text, f.name, f.getvalue()))
+
+    for index, (digest, future) in pending.items():
+        try:
+            ok, result = future.result()
+        except Exception as e:
+            ok, result = False, str(e)
+        if ok:
+            _stats["extracted"] += 1
+            _cache_put(digest, result)
+            texts[index] = result
+        else:
+            _stats["failed"] += 1
+            report["failed"].append(files[index].name)
+
+    converted = []
+    for index, f in enumerate(files):
+        if index in texts:
+            attachment = TextAttachment(texts[index], f"{f.name}.md", f.size if hasattr(f, "size") else len(f.getvalue()))
+            report["documents"] += 1
+            report["original"] += attachment.original_size
+            report["extracted"] += attachment.size
+            converted.append(attachment)
+        else:
+            converted.append(f)
+    return converted, report
+
+
+def get_extract_stats():
+    """
+    获取文档提取统计（缓存命中 / 实际提取 / 失败次数）
+    """
+    return dict(_stats)
@@ -0,0 +1,128 @@
+# 多模型对比模块 - 同一问题并发发送给多个模型，各模型的流式对话作为协程运行在共享事件循环中，分片汇入同一个队列
+import asyncio
+import queue
+import threading
+from .core import CancelToken
+from .async_core import AsyncAIClient, run_sync, _get_background_loop
+
+
+def prepare_model_clients(authorization, models, known_sessions, base_url=None):
+    """
+    为每个模型准备一个已连接会话的客户端：已有会话直接复用，缺少的会话并发创建
+
+    Args:
+        authorization (str): API Authorization
+        models (list): 模型名称列表
+        known_sessions (dict): 模型 -> 已有会话ID
+        base_url (str, optional): API 地址
+
+    Returns:
+        tuple: (模型 -> AsyncAIClient, 新建的 (模型, 会话ID) 列表, 模型 -> 创建失败的错误消息)
+    """
+    clients = {}
+    for model in models:
+        bot = AsyncAIClient(authorization, base_url)
+        bot.model = model
+        bot.session_id = known_sessions.get(model)
+        clients[model] = bot
+
+    missing = [model for model in models if not clients[model].session_id]
+    created = []
+    errors = {}
+    if missing:
+        async def create_all():
+            return await asyncio.gather(*(clients[model].create_session(model) for model in missing))
+
+        for model, (ok, msg) in zip(missing, run_sync(create_all())):
+            if ok:
+                created.append((model, clients[model].session_id))
+            else:
+                errors[model] = msg
+                clients.pop(model)
+    return clients, created, errors
+
+
+class FanoutStream:
+    """
+    并发消费多个客户端的 chat_stream，按到达顺序产出 (模型, 分片)。
+    每个模型一个协程，全部运行在 async_core 的共享事件循环中，不再为每个模型单独开线程
+
+    Args:
+        clients (dict): 模型 -> 已连接会话的 AsyncAIClient
+        user_text (str): 用户输入
+        file_obj: 上传的文件（可选）
+        cancel_token (CancelToken, optional): 共享的取消令牌，取消后所有模型的连接立即关闭
+    """
+    def __init__(self, clients, user_text, file_obj=None, cancel_token=None):
+        self.clients = clients
+        self.cancel_token = cancel_token or CancelToken()
+        self._queue = queue.Queue()
+        self._pending = len(clients)
+        self._lock = threading.Lock()
+        self._tasks = []
+        self._loop = _get_background_loop()
+        for model, bot in clients.items():
+            asyncio.run_coroutine_threadsafe(self._consume(model, bot, user_text, file_obj), self._loop)
+
+    async def _consume(self, model, bot, user_text, file_obj):
+        try:
+            # 协程开始运行后才登记任务，保证被取消时 finally 一定执行、结束标记一定送达
+            with self._lock:
+                if self.cancel_token.cancelled:
+                    return
+                self._tasks.append(asyncio.current_task())
+            async for chunk in bot.chat_stream(user_text, file_obj, cancel_token=self.cancel_token):
+                self._queue.put((model, chunk))
+        except asyncio.CancelledError:
+            # 停止生成：任务被取消时正在等待的读取立即中断，连接随 chat_stream 一起关闭
+            pass
+        except Exception as e:
+            self._queue.put((model, f"❌ 网络请求错误: {e}"))
+        finally:
+            # None 表示该模型的回复已结束
+            self._queue.put((model, None))
+
+    def __iter__(self):
+        """
+        Yields:
+            tuple: (模型, 文本分片)，分片为 None 表示该模型已结束
+        """
+        while self._pending:
+            model, chunk = self._queue.get()
+            if chunk is None:
+                self._pending -= 1
+            yield model, chunk
+
+    def cancel(self):
+        """
+        停止所有仍在生成的模型
+        """
+        self.cancel_token.cancel()
+        # 取消协程，打断正在等待服务器数据的读取（令牌只在收到事件后才被检查）
+        with self._lock:
+            tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            self._loop.call_soon_threadsafe(task.cancel)
+
+    def result(self, model):
+        """
+        获取单个模型的元数据与流式指标，收到该模型的结束标记后即可调用
+
+        Returns:
+            dict: {"metadata": dict, "metrics": dict, "session_id": 会话ID}
+        """
+        bot = self.clients[model]
+        return {
+            "metadata": bot.last_chat_metadata,
+            "metrics": bot.last_stream_metrics,
+            "session_id": bot.session_id
+        }
+
+    def results(self):
+        """
+        所有模型结束后获取各自的元数据与流式指标
+
+        Returns:
+            dict: 模型 -> {"metadata": dict, "metrics": dict, "session_id": 会话ID}
+        """
+        return {model: self.result(model) for model in self.clients}
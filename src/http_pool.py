@@ -0,0 +1,116 @@
+# 连接池模块 - 进程级共享的 HTTP keep-alive 连接池
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from .config import CONFIG
+
+# 按 (base_url, authorization 摘要) 缓存的会话: key -> [requests.Session, 最近使用时间, 正在使用的请求数]
+_sessions = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _auth_key(authorization):
+    """
+    生成 authorization 的摘要，避免在内存字典中直接以明文令牌作为键
+    """
+    return hashlib.sha256((authorization or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _build_session():
+    """
+    创建一个挂载了连接池适配器的 requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=CONFIG["poolConnections"],
+        pool_maxsize=CONFIG["poolMaxSize"],
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def _evict_idle(now):
+    """
+    关闭超过 keep-alive 时间未被使用的会话，仍有请求在使用的会话跳过（调用方需持有锁）
+    """
+    keep_alive = CONFIG["poolKeepAlive"]
+    for key, (session, last_used, in_use) in list(_sessions.items()):
+        if not in_use and now - last_used > keep_alive:
+            session.close()
+            del _sessions[key]
+            _stats["evictions"] += 1
+
+
+@contextmanager
+def pooled_session(base_url, authorization):
+    """
+    借用共享的 HTTP 会话，同一 base_url 与 authorization 复用同一个连接池；
+    借用期间会话被标记为使用中，其他线程回收空闲会话时不会关闭它
+
+    Args:
+        base_url (str): API 基础地址
+        authorization (str): 用户授权令牌
+
+    Yields:
+        requests.Session: 可在多线程间共享的会话对象
+    """
+    key = (base_url, _auth_key(authorization))
+    now = time.monotonic()
+    with _lock:
+        _evict_idle(now)
+        entry = _sessions.get(key)
+        if entry:
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+            entry = _sessions[key] = [_build_session(), now, 0]
+        entry[1] = now
+        entry[2] += 1
+    try:
+        yield entry[0]
+    finally:
+        with _lock:
+            # 从使用结束时开始计算空闲时间
+            entry[1] = time.monotonic()
+            entry[2] -= 1
+
+
+def get_pool_stats():
+    """
+    获取连接池命中统计
+
+    Returns:
+        dict: hits / misses / evictions 计数以及当前缓存的会话数
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["pools"] = len(_sessions)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total else 0.0
+    return stats
+
+
+def reset_pool_stats():
+    """
+    清零命中统计（不影响已建立的连接）
+    """
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def close_all_sessions():
+    """
+    关闭并清空所有缓存的会话
+    """
+    with _lock:
+        for session, _, _ in _sessions.values():
+            session.close()
+        _sessions.clear()
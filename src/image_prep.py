@@ -0,0 +1,118 @@
+# 图片预处理模块 - 上传前在本地缩放并重新压缩图片附件，多张图片在线程池中并行处理
+import io
+from concurrent.futures import ThreadPoolExecutor
+from .config import CONFIG
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 为可选依赖，未安装时图片按原样上传
+    Image = None
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "bmp", "tif", "tiff"}
+# 输出格式 -> (扩展名, MIME 类型)
+OUTPUT_FORMATS = {"JPEG": ("jpg", "image/jpeg"), "WEBP": ("webp", "image/webp"), "PNG": ("png", "image/png")}
+
+# Pillow 的解码与缩放会释放 GIL，线程池即可并行处理多张图片
+_executor = ThreadPoolExecutor(max_workers=CONFIG["imageWorkers"], thread_name_prefix="image-prep")
+
+
+class PreparedImage(io.BytesIO):
+    """
+    预处理后的图片，接口与 Streamlit UploadedFile 一致（name / size / type / read / getvalue）
+
+    Args:
+        data (bytes): 压缩后的图片数据
+        name (str): 新文件名（扩展名与输出格式一致）
+        mime (str): 图片 MIME 类型
+        original_size (int): 原始文件大小
+    """
+    def __init__(self, data, name, mime, original_size):
+        super().__init__(data)
+        self.name = name
+        self.type = mime
+        self.mime = mime
+        self.size = len(data)
+        self.original_size = original_size
+
+
+def is_available():
+    """
+    是否可以进行图片预处理（Pillow 已安装且配置开启）
+    """
+    return Image is not None and CONFIG["imagePrep"]
+
+
+def is_image(uploaded_file):
+    """
+    根据 MIME 类型或扩展名判断附件是否为可处理的静态图片
+    """
+    mime = getattr(uploaded_file, "type", "") or ""
+    ext = uploaded_file.name.rsplit(".", 1)[-1].lower()
+    return ext in IMAGE_EXTENSIONS or (mime.startswith("image/") and mime != "image/gif")
+
+
+def prepare_image(uploaded_file):
+    """
+    将图片缩放到 CONFIG["imageMaxEdge"] 以内并按 CONFIG["imageFormat"] / CONFIG["imageQuality"] 重新压缩
+
+    Args:
+        uploaded_file: Streamlit 上传的图片文件
+
+    Returns:
+        PreparedImage or 原文件: 处理失败或处理后没有变小时返回原文件
+    """
+    try:
+        data = uploaded_file.getvalue()
+        with Image.open(io.BytesIO(data)) as opened:
+            # 按 EXIF 方向摆正手机照片，缩放后 EXIF 不再保留
+            image = ImageOps.exif_transpose(opened)
+            max_edge = CONFIG["imageMaxEdge"]
+            resized = max(image.size) > max_edge
+            if resized:
+                image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+            fmt = CONFIG["imageFormat"].upper()
+            if fmt not in OUTPUT_FORMATS:
+                fmt = "PNG" if opened.format == "PNG" else "JPEG"
+            if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+                # JPEG 不支持透明通道，透明区域以白色填充
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+                image = background
+
+            output = io.BytesIO()
+            image.save(output, format=fmt, quality=CONFIG["imageQuality"], optimize=True)
+    except Exception:
+        return uploaded_file
+
+    if not resized and output.tell() >= len(data):
+        return uploaded_file
+    ext, mime = OUTPUT_FORMATS[fmt]
+    name = f"{uploaded_file.name.rsplit('.', 1)[0]}.{ext}"
+    return PreparedImage(output.getvalue(), name, mime, len(data))
+
+
+def prepare_attachments(files):
+    """
+    并行预处理附件中的图片，非图片附件原样返回
+
+    Args:
+        files (list): 上传的文件列表
+
+    Returns:
+        tuple: (处理后的文件列表, {"images": 处理的图片数, "original": 原始字节数, "prepared": 处理后字节数})
+    """
+    report = {"images": 0, "original": 0, "prepared": 0}
+    if not files or not is_available():
+        return files, report
+
+    futures = [_executor.submit(prepare_image, f) if is_image(f) else None for f in files]
+    prepared = []
+    for original, future in zip(files, futures):
+        result = future.result() if future else original
+        if isinstance(result, PreparedImage):
+            report["images"] += 1
+            report["original"] += result.original_size
+            report["prepared"] += result.size
+        prepared.append(result)
+    return prepared, report
@@ -1,12 +1,19 @@
 import streamlit as st
 import re
+import time
 from datetime import datetime
-from .core import AIClient
-from .utils import process_ai_content
+from .config import CONFIG
+from .utils import ThinkStreamParser, process_ai_content
+from .stream_render import RenderScheduler
+from .fanout import prepare_model_clients, FanoutStream
+from .stream_worker import start_stream, get_job, pop_finished_job
+from .image_prep import prepare_attachments
+from .doc_extract import extract_attachments
+from .context_planner import plan_context
+from .session_cache import add_session, new_session_entry
 from .file_utils import format_file_attachments
 from .styles import apply_global_styles
-from .chat_utils import clean_ai_text, render_badges
-from st_copy import copy_button
+from .chat_utils import render_badges, render_message_toolbar, ACTIVE_MESSAGE_INDEX
 # --- 新增引用 ---
 from .navigation import render_right_sidebar_nav 
 
@@ -16,6 +23,8 @@ def render_input_area():
     """
     渲染输入区域组件
     """
+    render_context_estimate()
+
     # 恢复为原来的实现，不使用Streamlit Extras
     chat_input = st.chat_input(
         placeholder="询问任何问题...",
@@ -32,146 +41,82 @@ def render_input_area():
         if uploaded_files:
             file_names = ", ".join([f.name for f in uploaded_files])
             st.toast(f"已上传文件: {file_names}", icon="✅")
+
+            # 文本模式：文档附件在本地提取为 Markdown 文本后发送，代替原始二进制
+            if st.session_state.get("doc_text_mode"):
+                uploaded_files, extract_report = extract_attachments(uploaded_files)
+                if extract_report["documents"]:
+                    st.toast(
+                        f"已提取 {extract_report['documents']} 个文档为文本: {extract_report['original'] / 2**20:.1f} MB → "
+                        f"{extract_report['extracted'] / 1024:.1f} KB",
+                        icon="📄"
+                    )
+                for name in extract_report["failed"]:
+                    st.toast(f"{name} 提取失败，按原文件发送", icon="⚠️")
+
+            # 图片附件先在本地缩放并重新压缩，减小请求体与上传时间
+            uploaded_files, prep_report = prepare_attachments(uploaded_files)
+            if prep_report["images"]:
+                st.session_state.last_upload_reduction = prep_report
+                st.toast(
+                    f"已压缩 {prep_report['images']} 张图片: {prep_report['original'] / 2**20:.1f} MB → "
+                    f"{prep_report['prepared'] / 2**20:.1f} MB (减少 {1 - prep_report['prepared'] / prep_report['original']:.0%})",
+                    icon="🖼️"
+                )
         
-        handle_user_input(prompt, uploaded_files)
+        # 选择了多个对比模型时，同一问题并发发送给所有模型
+        fanout_models = st.session_state.get("fanout_models") or []
+        if len(fanout_models) > 1:
+            handle_fanout_input(prompt, uploaded_files, fanout_models)
+        else:
+            handle_user_input(prompt, uploaded_files)
         
         # 显示成功动画
         from .styles import show_success_animation
         show_success_animation()
 
-# 处理用户输入
-def handle_user_input(prompt, uploaded_files):
+# 渲染流式回复的当前内容
+def render_stream_view(placeholder, parser):
     """
-    处理用户输入
-    """
-    apply_global_styles()
+    将解析器当前的正文与思考内容重绘到占位符中
 
-    if not st.session_state.bot:
-        st.error("请先连接会话！")
-        return
-
-    # 获取当前模型名称
-    current_model = st.session_state.get("current_session_model", "Unknown")
-    temp_time = datetime.now().strftime("%H:%M:%S")
-
-    # --- 1. 计算新的 QA 索引 (用于锚点和导航) ---
-    # 统计历史消息中 user 的数量
-    existing_user_msgs = [m for m in st.session_state.messages if m["role"] == "user"]
-    current_pair_index = len(existing_user_msgs) # 如果已有0个，当前就是第0个；已有5个，当前就是第5个
-
-    # --- 用户消息处理 ---
-    file_names = [f.name for f in uploaded_files] if uploaded_files else []
-    file_name_record = file_names[0] if file_names else None
-
-    # 【关键修改 1】在此处手动注入锚点，否则导航栏点击后不知道跳到哪里
-    st.markdown(f"""
-    <div id='msg-anchor-{current_pair_index}' style='position:relative; top: -80px; visibility: hidden;'></div>
-    """, unsafe_allow_html=True)
-
-    with st.chat_message("user"):
-        # 文件显示逻辑
-        file_html = format_file_attachments([], file_name_record, f"{file_name_record}" if file_name_record else "")
-        if file_html:
-            st.markdown(file_html, unsafe_allow_html=True)
-            st.markdown("\n\n")
+    Args:
+        placeholder: st.empty() 占位符
+        parser: 提供 view() 的对象（ThinkStreamParser 或 StreamJob）
+    """
+    main_content, think_content, is_thinking = parser.view()
 
-        st.text(prompt)
+    placeholder.empty()
+    with placeholder.container():
+        if think_content or is_thinking:
+            status_label = "🤔 Thinking..." if is_thinking else "💡 思考过程"
+            with st.expander(status_label, expanded=is_thinking):
+                st.markdown(f"{think_content}{'...' if is_thinking else ''}")
+        if main_content:
+            st.markdown(main_content)
 
-        buttons_col, badges_col = st.columns([0.1, 0.9], vertical_alignment="center")
-        with buttons_col:
-            copy_button(prompt)
-        with badges_col:
-            user_badges_placeholder = st.empty()
-            user_badges_placeholder.html(render_badges(tokens=0, time_str=temp_time, model_name=current_model))
+# 保存一轮问答到历史记录
+def save_exchange(prompt, file_name_record, full_response, metadata, session_id, fallback_time, file_digest=None):
+    """
+    将用户消息与 AI 回复写入 st.session_state.messages（被停止时保存已生成的部分）
 
-    # 【关键修改 2】强制更新右侧导航栏
-    # 在用户发完消息、AI 回复之前，立即更新导航栏为 (历史数量 + 1)
-    # 这样用户就能立刻看到新的节点出现
-    render_right_sidebar_nav(current_pair_index + 1)
+    Args:
+        prompt (str): 用户输入
+        file_name_record (str): 第一个上传文件的文件名
+        full_response (str): AI 回复全文
+        metadata (dict): 对话元数据（id、completionTokens、updated 等，可能不完整）
+        session_id: 会话ID
+        fallback_time (str): 元数据中没有时间时使用的时间
+        file_digest (str, optional): 第一个上传文件的内容 SHA-256
+    """
+    final_tokens = metadata.get("completionTokens", 0)
 
-    # --- AI 消息处理 (流式) ---
-    with st.chat_message("assistant"):
-        # ... 以下代码保持原样 ...
-        response_placeholder = st.empty()
-        full_response = ""
+    # 提取并格式化时间 (使用 'updated' 字段，格式如 "2026-01-13 17:19:50")
+    final_time = fallback_time
+    api_time_str = metadata.get("updated", "")
+    if api_time_str and " " in api_time_str:
+        final_time = api_time_str.split(" ")[1]
 
-        
-        # 3. 创建 AI 徽章的占位符
-        ai_badges_placeholder = st.empty()
-        
-        # 迭代流式响应
-        try:
-            for chunk in st.session_state.bot.chat_stream(prompt, uploaded_files):
-                full_response += chunk
-                main_content, think_content, is_thinking = process_ai_content(full_response)
-                
-                response_placeholder.empty()
-                with response_placeholder.container():
-                    if think_content or is_thinking:
-                        status_label = "🤔 Thinking..." if is_thinking else "💡 思考过程"
-                        with st.expander(status_label, expanded=is_thinking):
-                            st.markdown(f"{think_content}{'...' if is_thinking else ''}")
-                    if main_content:
-                        st.markdown(main_content)
-            
-            # --- 流式结束后的数据更新逻辑 ---
-            
-            # 1. 获取 Core 中保存的完整元数据
-            metadata = getattr(st.session_state.bot, 'last_chat_metadata', {})
-            
-            # 2. 提取 Tokens
-            final_tokens = metadata.get("completionTokens", 0)
-            
-            # 3. 提取并格式化时间 (使用 'updated' 字段，格式如 "2026-01-13 17:19:50")
-            api_time_str = metadata.get("updated", "")
-            final_time = temp_time # 默认回退
-            if api_time_str and " " in api_time_str:
-                try:
-                    # 截取 HH:MM:SS 部分
-                    final_time = api_time_str.split(" ")[1]
-                except:
-                    pass
-            
-            # 4. 更新 AI 的操作栏和徽章 - 将操作按钮放在一个横向栏目中
-            # 显示复制、删除按钮和评分
-            buttons_col, badges_col = st.columns([0.2, 0.8], vertical_alignment="center")
-            
-            with buttons_col:
-                # 在按钮栏目中创建两个子列，横向排列复制和删除按钮
-                copy_col, delete_col, reserve_col = st.columns([1, 1, 1], gap="small", vertical_alignment="center")
-                
-                with copy_col:
-                    text_to_copy = clean_ai_text(full_response)
-                    copy_button(text_to_copy)
-                
-                with delete_col:
-                    # 占位符，用于后续添加删除按钮
-                    pass
-                
-                with reserve_col:
-                    # 占位符，用于后续添加评分功能
-                    pass
-            
-            with badges_col:
-                # 渲染最终的 AI 徽章（包含真实Tokens和API时间）
-                st.html(render_badges(tokens=final_tokens, time_str=final_time, model_name=current_model))
-
-            # 5. 回填更新 用户 的徽章 (关键步骤)
-            # 使用真实的时间戳更新用户消息的徽章
-            user_badges_placeholder.html(render_badges(tokens=0, time_str=final_time, model_name=current_model))
-
-        except Exception as e:
-            st.error(f"生成回复时出错: {str(e)}")
-            final_tokens = 0
-            final_time = temp_time
-
-    # --- 保存历史记录 ---
-    
-    # 从 bot 对象获取元数据和会话信息
-    bot = st.session_state.bot
-    last_metadata = getattr(bot, 'last_chat_metadata', {})
-    session_id = getattr(bot, 'session_id', '')
-    
     # 保存用户消息 (包含文件信息)
     user_message = {
         "role": "user",
@@ -180,17 +125,21 @@ def handle_user_input(prompt, uploaded_files):
         "tokens": 0,
         "files": [],
         "timestamp": final_time, # 保存时间
-        "cid": last_metadata.get("id", ""),  # 保存删除所需的参数
+        "cid": metadata.get("id", ""),  # 保存删除所需的参数
         "sid": session_id,
-        "taskId": last_metadata.get("taskId", "")
+        "taskId": metadata.get("taskId", "")
     }
     
     if file_name_record:
-        file_info = {"name": file_name_record, "url": ""}
+        file_info = {"name": file_name_record, "url": "", "sha256": file_digest}
         user_message["files"].append(file_info)
         if "useFiles" not in st.session_state:
             st.session_state.useFiles = []
-        file_exists = any(file.get("name") == file_name_record for file in st.session_state.useFiles)
+        # 同名文件或内容完全相同（即使改了名）的文件只记录一次
+        file_exists = any(
+            file.get("name") == file_name_record or (file_digest and file.get("sha256") == file_digest)
+            for file in st.session_state.useFiles
+        )
         if not file_exists:
             st.session_state.useFiles.append(file_info)
     
@@ -203,20 +152,297 @@ def handle_user_input(prompt, uploaded_files):
         "tokens": final_tokens,
         "useTokens": final_tokens,
         "timestamp": final_time, # 保存时间
-        "cid": last_metadata.get("id", ""),  # 保存删除所需的参数
+        "cid": metadata.get("id", ""),  # 保存删除所需的参数
         "sid": session_id,
-        "taskId": last_metadata.get("taskId", "")
+        "taskId": metadata.get("taskId", "")
     })
-    
-    # 自动滚动脚本
-    st.markdown("""
-    <script>
-        function scrollToBottom() {
-            const scrollHeight = document.documentElement.scrollHeight || document.body.scrollHeight;
-            window.scrollTo({top: scrollHeight, behavior: "smooth"});
+
+# 显示下一次请求的预计提示 token 数
+def render_context_estimate():
+    """
+    在输入框上方显示按当前历史记录估算的提示 token 数与将携带的上下文条数（不含本次输入）
+    """
+    bot = st.session_state.get("bot")
+    if not bot or not bot.session_id:
+        return
+    plan = plan_context(st.session_state.get("messages", []), session_id=bot.session_id)
+    budget = f" / 预算 {plan['budget']}" if plan["budget"] else ""
+    trimmed = " · 已按预算裁剪" if plan["trimmed"] else ""
+    if plan["over_budget"]:
+        trimmed += " · ⚠️ 最近一条消息已超出预算"
+    st.caption(f"📏 预计提示约 {plan['prompt_tokens']} tokens{budget} · 上下文 {plan['count']}/{plan['max_count']} 条{trimmed}")
+
+# 处理用户输入
+def handle_user_input(prompt, uploaded_files):
+    """
+    处理用户输入：在后台启动流式生成，页面只负责轮询渲染，
+    之后的重跑、切换会话都不会中断生成
+    """
+    if not st.session_state.bot:
+        st.error("请先连接会话！")
+        return
+
+    # 获取当前模型名称
+    current_model = st.session_state.get("current_session_model", "Unknown")
+    st.session_state.bot.model = current_model
+
+    # 按 token 预算决定本次携带的上下文条数，避免几条超长消息撑大提示
+    plan = plan_context(st.session_state.get("messages", []), prompt, session_id=st.session_state.bot.session_id)
+    st.session_state.last_context_plan = plan
+    if plan["over_budget"]:
+        st.toast(
+            f"最近的上下文已超出预算，本次仍携带 1 条 (约 {plan['prompt_tokens']} / {plan['budget']} tokens)",
+            icon="⚠️"
+        )
+    elif plan["trimmed"]:
+        st.toast(
+            f"上下文超出预算，本次携带 {plan['count']}/{plan['max_count']} 条 (约 {plan['prompt_tokens']} tokens)",
+            icon="✂️"
+        )
+
+    ok, result = start_stream(st.session_state.bot, prompt, uploaded_files, current_model, context_count=plan["count"])
+    if not ok:
+        st.toast(result, icon="⚠️")
+        return
+    # 重跑后由聊天区域渲染进行中的回复
+    st.rerun()
+
+# 取走已结束的后台生成结果
+def collect_finished_stream():
+    """
+    当前会话的后台生成已结束时，把问答写入历史记录
+
+    Returns:
+        bool: 是否写入了新的消息
+    """
+    bot = st.session_state.bot
+    if not bot or not bot.session_id:
+        return False
+    job = pop_finished_job(bot.authorization, bot.session_id)
+    if job is None:
+        return False
+
+    st.session_state.last_render_stats = job.render_stats()
+    st.session_state.last_stream_metrics = job.metrics
+    metadata = job.metadata or {}
+    # 切回会话时若历史记录已从服务器同步到这条回复，则不再重复追加
+    if metadata.get("id") and any(str(m.get("cid")) == str(metadata["id"]) for m in st.session_state.messages):
+        return False
+    save_exchange(job.prompt, job.file_name, job.full_text(), metadata, job.session_id, job.started, job.file_digest)
+    return True
+
+# 渲染当前会话进行中的后台生成
+def render_active_stream(pair_index):
+    """
+    渲染当前会话正在后台生成的问答（用户消息 + 轮询刷新的 AI 回复）
+
+    Args:
+        pair_index (int): 本轮问答的序号（用于锚点）
+
+    Returns:
+        str or None: 进行中问答的用户输入（供页面级工具栏复制），当前会话没有进行中的生成时为 None
+    """
+    bot = st.session_state.bot
+    if not bot or not bot.session_id:
+        return None
+    job = get_job(bot.authorization, bot.session_id)
+    if job is None:
+        return None
+
+    # 在此处手动注入锚点，否则导航栏点击后不知道跳到哪里
+    st.markdown(f"""
+    <div id='msg-anchor-{pair_index}' style='position:relative; top: -80px; visibility: hidden;'></div>
+    """, unsafe_allow_html=True)
+
+    with st.chat_message("user"):
+        # 文件显示逻辑
+        file_html = format_file_attachments([], job.file_name, f"{job.file_name}" if job.file_name else "")
+        if file_html:
+            st.markdown(file_html, unsafe_allow_html=True)
+            st.markdown("\n\n")
+
+        st.text(job.prompt)
+
+        # 复制按钮由页面级工具栏组件处理，复制文本以 ACTIVE_MESSAGE_INDEX 为键
+        user_msg = {"role": "user", "content": job.prompt, "tokens": 0, "timestamp": job.started, "model": job.model}
+        st.html(render_message_toolbar(user_msg, ACTIVE_MESSAGE_INDEX, job.model))
+
+    render_live_answer(bot.authorization, bot.session_id)
+    return job.prompt
+
+# 跟随后台任务重绘 AI 回复（局部刷新，不重跑整个页面）
+@st.fragment(run_every=CONFIG["streamPollInterval"])
+def render_live_answer(authorization, session_id):
+    job = get_job(authorization, session_id)
+    if job is None:
+        return
+    if job.done:
+        # 生成结束：整页重跑，由 collect_finished_stream 写入历史记录
+        st.rerun()
+
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        # 停止后连接立即关闭，已生成的部分在生成结束后写入历史记录
+        st.button("⏹️ 停止生成", key=f"stop_generation_{session_id}", on_click=job.cancel)
+
+    # 片段运行期间跟随生成进度：新分片按 renderInterval / renderBytes 合并后才重绘，没有新分片时不重绘；
+    # 期间到期的 run_every 重跑会被合并，不会打断本次运行
+    received = job.chunks
+    scheduler = RenderScheduler(lambda: render_stream_view(placeholder, job))
+    scheduler.flush()
+    idle_since = time.monotonic()
+    while True:
+        chunks = job.wait_for_chunks(received, CONFIG["renderInterval"])
+        if not chunks:
+            if job.done:
+                break
+            # 较长时间没有新分片（如模型正在思考）时结束本次运行，让停止按钮等交互及时得到处理，
+            # run_every 到期后重新跟随
+            if time.monotonic() - idle_since >= CONFIG["streamPollInterval"]:
+                scheduler.close()
+                return
+        else:
+            idle_since = time.monotonic()
+            received += len(chunks)
+            for chunk in chunks:
+                scheduler.push(chunk)
+        scheduler.poll()
+    scheduler.close()
+    st.rerun()
+
+# 多模型对比：同一问题并发发送给多个模型，并排显示
+def handle_fanout_input(prompt, uploaded_files, models):
+    """
+    为每个选中的模型复用或创建一个会话，并发执行 chat_stream，
+    各模型的回复按到达顺序并排渲染，每个模型结束时立即显示其首字延迟与生成速度
+
+    Args:
+        prompt (str): 用户输入
+        uploaded_files (list): 上传的文件
+        models (list): 参与对比的模型名称
+    """
+    apply_global_styles()
+
+    bot = st.session_state.bot
+    authorization = bot.authorization if bot else st.session_state.get("saved_api_authorization", "")
+    if not authorization:
+        st.error("请先连接会话！")
+        return
+
+    # 对比会话按当前会话分组保存，当前会话的模型直接复用当前会话
+    active_session_id = bot.session_id if bot else None
+    fanout_sessions = st.session_state.setdefault("fanout_sessions", {})
+    known_sessions = fanout_sessions.setdefault(str(active_session_id), {})
+    if active_session_id:
+        known_sessions.setdefault(st.session_state.get("current_session_model"), active_session_id)
+
+    clients, created, errors = prepare_model_clients(authorization, models, known_sessions)
+    for model, session_id in created:
+        known_sessions[model] = session_id
+        add_session(new_session_entry(session_id, model))
+    for model, msg in errors.items():
+        st.toast(f"{model}: {msg}", icon="❌")
+    if not clients:
+        return
+
+    temp_time = datetime.now().strftime("%H:%M:%S")
+    current_pair_index = len([m for m in st.session_state.messages if m["role"] == "user"])
+    file_names = [f.name for f in uploaded_files] if uploaded_files else []
+    file_name_record = file_names[0] if file_names else None
+
+    st.markdown(f"""
+    <div id='msg-anchor-{current_pair_index}' style='position:relative; top: -80px; visibility: hidden;'></div>
+    """, unsafe_allow_html=True)
+
+    with st.chat_message("user"):
+        file_html = format_file_attachments([], file_name_record, f"{file_name_record}" if file_name_record else "")
+        if file_html:
+            st.markdown(file_html, unsafe_allow_html=True)
+            st.markdown("\n\n")
+        st.text(prompt)
+        st.html(render_badges(tokens=0, time_str=temp_time, model_name=" / ".join(clients)))
+
+    render_right_sidebar_nav(current_pair_index + 1)
+
+    # 每个模型一列：解析器 + 合并重绘调度器 + 指标占位符
+    panes = {}
+    with st.chat_message("assistant"):
+        for column, model in zip(st.columns(len(clients)), clients):
+            with column:
+                st.markdown(f"**{model}**")
+                placeholder = st.empty()
+                stats_placeholder = st.empty()
+            parser = ThinkStreamParser()
+            scheduler = RenderScheduler(lambda placeholder=placeholder, parser=parser: render_stream_view(placeholder, parser))
+            panes[model] = (parser, scheduler, stats_placeholder)
+
+        # 停止按钮或重跑打断时，finally 中关闭所有模型的连接并保存已生成的部分
+        stop_placeholder = st.empty()
+        stream = FanoutStream(clients, prompt, uploaded_files)
+        stop_placeholder.button("⏹️ 停止生成", key="stop_fanout", on_click=stream.cancel)
+        try:
+            for model, chunk in stream:
+                parser, scheduler, stats_placeholder = panes[model]
+                if chunk is None:
+                    # 该模型已结束：立即显示它的指标，不等其余模型
+                    scheduler.close()
+                    result = stream.result(model)
+                    stream_metrics = result["metrics"]
+                    ttft = stream_metrics.get("ttft")
+                    speed = stream_metrics.get("tokens_per_sec")
+                    tokens = result["metadata"].get("completionTokens", 0)
+                    stats_placeholder.caption(
+                        f"⏱️ 首字 {f'{ttft:.2f}s' if ttft is not None else '-'} · "
+                        f"{f'{speed:.1f} tok/s' if speed else '- tok/s'} · {tokens} tokens"
+                    )
+                    continue
+                parser.feed(chunk)
+                scheduler.push(chunk)
+            stop_placeholder.empty()
+        finally:
+            stream.cancel()
+            save_fanout_exchange(prompt, file_name_record, temp_time, stream.results(), panes)
+
+
+# 保存多模型对比的一轮问答
+def save_fanout_exchange(prompt, file_name_record, temp_time, results, panes):
+    """
+    当前会话模型的回复按普通问答写入历史记录；其他模型的回复已保存在各自的服务器会话中，
+    这里只作为当前会话最近一次的对比记录保存，不混入历史消息（被停止时保存已生成的部分）
+    """
+    bot = st.session_state.bot
+    active_session_id = str(bot.session_id) if bot and bot.session_id else None
+    comparison = {"prompt": prompt, "time": temp_time, "answers": {}}
+    for model, result in results.items():
+        if active_session_id and str(result["session_id"]) == active_session_id:
+            save_exchange(prompt, file_name_record, panes[model][0].full_text(), result["metadata"],
+                          result["session_id"], temp_time)
+            continue
+        comparison["answers"][model] = {
+            "content": panes[model][0].full_text(),
+            "session_id": result["session_id"],
+            "metrics": result["metrics"],
+            "tokens": result["metadata"].get("completionTokens", 0)
         }
-        scrollToBottom();
-        setTimeout(scrollToBottom, 100);
-        setTimeout(scrollToBottom, 300);
-    </script>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    if comparison["answers"]:
+        st.session_state.setdefault("fanout_comparisons", {})[str(active_session_id)] = comparison
+
+# 显示当前会话最近一次多模型对比中其他模型的回复
+def render_fanout_comparison():
+    """
+    在历史消息之后以折叠面板显示其他模型的回复（这些回复属于各自的会话，不计入当前会话历史）
+    """
+    bot = st.session_state.bot
+    active_session_id = str(bot.session_id) if bot and bot.session_id else None
+    comparison = st.session_state.get("fanout_comparisons", {}).get(str(active_session_id))
+    if not comparison:
+        return
+    with st.expander(f"🔀 多模型对比 · {comparison['prompt'][:30]}", expanded=False):
+        answers = comparison["answers"]
+        for column, (model, answer) in zip(st.columns(len(answers)), answers.items()):
+            with column:
+                st.markdown(f"**{model}**")
+                main_content, _, _ = process_ai_content(answer["content"])
+                st.markdown(main_content)
+                speed = answer["metrics"].get("tokens_per_sec")
+                st.caption(f"{f'{speed:.1f} tok/s' if speed else '- tok/s'} · {answer['tokens']} tokens · 会话 {answer['session_id']}")
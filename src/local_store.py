@@ -0,0 +1,250 @@
+# 本地存储模块 - 使用 SQLite 缓存会话列表与聊天记录，按时间戳增量同步
+import json
+import os
+import sqlite3
+import threading
+from .config import CONFIG
+from .http_pool import _auth_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    owner TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated TEXT,
+    PRIMARY KEY (owner, id)
+);
+CREATE TABLE IF NOT EXISTS records (
+    owner TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created TEXT,
+    updated TEXT,
+    PRIMARY KEY (owner, id)
+);
+CREATE INDEX IF NOT EXISTS idx_records_session ON records (owner, session_id, created);
+"""
+
+
+class LocalStore:
+    """
+    会话列表与聊天记录的本地缓存，不同 authorization 的数据按 owner 隔离
+
+    Args:
+        path (str): SQLite 数据库文件路径
+    """
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self.stats = {"lookups": 0, "hits": 0, "bytes_saved": 0}
+
+    # --- 会话 ---
+
+    def save_sessions(self, owner, sessions):
+        """
+        用最新的会话列表覆盖本地缓存
+        """
+        rows = [(owner, str(s.get("id")), json.dumps(s, ensure_ascii=False), s.get("updated", "")) for s in sessions]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE owner = ?", (owner,))
+            self._conn.executemany("INSERT INTO sessions VALUES (?, ?, ?, ?)", rows)
+
+    def load_sessions(self, owner):
+        """
+        读取本地缓存的会话列表（保持保存时的顺序）
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM sessions WHERE owner = ? ORDER BY rowid", (owner,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete_session(self, owner, session_id):
+        """
+        删除会话及其全部聊天记录
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE owner = ? AND id = ?", (owner, str(session_id)))
+            self._conn.execute("DELETE FROM records WHERE owner = ? AND session_id = ?", (owner, str(session_id)))
+
+    # --- 聊天记录 ---
+
+    def get_records(self, owner, session_id):
+        """
+        读取会话的缓存记录
+
+        Returns:
+            list: 记录列表（新→旧，与接口返回顺序一致）
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM records WHERE owner = ? AND session_id = ? ORDER BY created DESC, rowid DESC",
+                (owner, str(session_id))
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def lookup_records(self, owner, session_id):
+        """
+        切换会话时读取缓存记录，并计入命中统计
+        """
+        records = self.get_records(owner, session_id)
+        with self._lock:
+            self.stats["lookups"] += 1
+            if records:
+                self.stats["hits"] += 1
+        return records
+
+    def get_record_versions(self, owner, session_id):
+        """
+        获取会话中每条记录的更新时间与数据大小
+
+        Returns:
+            dict: 记录ID -> (updated, 字节数)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, updated, length(CAST(data AS BLOB)) FROM records WHERE owner = ? AND session_id = ?",
+                (owner, str(session_id))
+            ).fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def upsert_records(self, owner, session_id, records):
+        """
+        写入或更新聊天记录
+        """
+        rows = [
+            (owner, str(session_id), str(r.get("id")), json.dumps(r, ensure_ascii=False),
+             r.get("created", ""), r.get("updated") or r.get("created", ""))
+            for r in records if r.get("id") is not None
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_missing_records(self, owner, session_id, since, keep_ids):
+        """
+        删除创建时间晚于 since、但不在服务器最新几页中的记录（已在服务器上被删除）
+
+        Args:
+            since (str): 已拉取页中最早记录的创建时间
+            keep_ids (set): 已拉取页中的记录ID
+
+        Returns:
+            int: 删除的记录数
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id FROM records WHERE owner = ? AND session_id = ? AND created > ?",
+                (owner, str(session_id), since)
+            ).fetchall()
+            stale = [(owner, row[0]) for row in rows if row[0] not in keep_ids]
+            self._conn.executemany("DELETE FROM records WHERE owner = ? AND id = ?", stale)
+        return len(stale)
+
+    def add_bytes_saved(self, size):
+        """
+        累计增量同步时未重新下载的记录字节数
+        """
+        with self._lock:
+            self.stats["bytes_saved"] += size
+
+    def delete_record(self, owner, record_id):
+        """
+        删除单条聊天记录
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM records WHERE owner = ? AND id = ?", (owner, str(record_id)))
+
+    def get_stats(self):
+        """
+        获取缓存命中统计
+
+        Returns:
+            dict: lookups / hits / hit_rate / bytes_saved
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store_path():
+    """
+    本地存储的数据库文件路径
+    """
+    return os.path.join(CONFIG["cacheDir"], "store.sqlite3")
+
+
+def get_store():
+    """
+    获取进程级共享的本地存储（未启用时返回 None）
+    """
+    global _store
+    if not CONFIG["localStore"]:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = LocalStore(store_path())
+        return _store
+
+
+def owner_key(authorization):
+    """
+    由 authorization 生成本地数据的隔离键
+    """
+    return _auth_key(authorization)
+
+
+def sync_session_records(bot, session_id):
+    """
+    增量同步会话记录：从最新一页开始拉取，遇到本地已有且未变化的记录即停止；
+    已拉取范围内本地有而服务器没有的记录视为已在服务器上删除，一并移除
+
+    Args:
+        bot (AIClient): 客户端实例
+        session_id (str): 会话ID
+
+    Returns:
+        tuple: (变更的记录数, 已拉取的页数, 页大小)
+    """
+    store = get_store()
+    owner = owner_key(bot.authorization)
+    known = store.get_record_versions(owner, session_id)
+    changed = 0
+    pages = 0
+    page_size = 0
+    fetched_ids = set()
+    oldest = None
+
+    for records in bot.iter_chat_records(session_id, prefetch=0):
+        pages += 1
+        page_size = page_size or len(records)
+        fresh = []
+        for record in records:
+            record_id = str(record.get("id"))
+            fetched_ids.add(record_id)
+            created = record.get("created", "")
+            if created and (oldest is None or created < oldest):
+                oldest = created
+            version = record.get("updated") or record.get("created", "")
+            if known.get(record_id, (None, 0))[0] != version:
+                fresh.append(record)
+        if fresh:
+            store.upsert_records(owner, session_id, fresh)
+            changed += len(fresh)
+        # 本页存在未变化的记录，说明更早的记录也已同步；首次缓存只拉取一页
+        if len(fresh) < len(records) or not known:
+            break
+
+    # 已拉取的各页从最新开始连续，比最早一条更新的记录都应出现在其中（同一时间的边界记录保留）
+    if oldest is not None:
+        changed += store.delete_missing_records(owner, session_id, oldest, fetched_ids)
+
+    store.add_bytes_saved(sum(size for record_id, (_, size) in known.items() if record_id not in fetched_ids))
+    return changed, pages, page_size
@@ -0,0 +1,205 @@
+# 指标模块 - 记录每次 API 请求的耗时、状态与流量，以及流式对话的首字延迟和吞吐
+import re
+import threading
+import time
+from collections import deque
+from .config import CONFIG
+
+# 最近请求的环形缓冲区
+_records = deque(maxlen=CONFIG["metricsBufferSize"])
+_hooks = []
+_lock = threading.Lock()
+
+# 路径中的会话/记录ID统一替换为占位符，便于按接口聚合
+_ID_SEGMENT = re.compile(r"/(\d+|[0-9a-fA-F-]{16,})(?=/|$)")
+
+
+def endpoint_name(method, url, base_url=""):
+    """
+    将请求地址归一化为接口名，例如 "GET /chat/record/{id}"
+    """
+    path = url[len(base_url):] if base_url and url.startswith(base_url) else url
+    path = path.split("?", 1)[0]
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+def add_hook(hook):
+    """
+    注册指标回调，每条记录写入后以 dict 参数调用 hook(record)
+    """
+    with _lock:
+        if hook not in _hooks:
+            _hooks.append(hook)
+
+
+def remove_hook(hook):
+    """
+    注销指标回调
+    """
+    with _lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def record(entry):
+    """
+    写入一条指标记录并通知所有回调（回调异常不影响请求本身）
+    """
+    entry.setdefault("timestamp", time.time())
+    with _lock:
+        _records.append(entry)
+        hooks = list(_hooks)
+    for hook in hooks:
+        try:
+            hook(entry)
+        except Exception:
+            pass
+
+
+def recent(limit=None, endpoint=None):
+    """
+    获取最近的指标记录（旧→新）
+
+    Args:
+        limit (int, optional): 最多返回的条数
+        endpoint (str, optional): 只返回指定接口的记录
+    """
+    with _lock:
+        entries = list(_records)
+    if endpoint:
+        entries = [e for e in entries if e["endpoint"] == endpoint]
+    return entries[-limit:] if limit else entries
+
+
+def percentile(values, q):
+    """
+    计算百分位数（线性插值）
+
+    Args:
+        values (list): 数值列表
+        q (float): 0~100 之间的百分位
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def summarize(field="latency", group_by="endpoint"):
+    """
+    按接口（或模型等字段）汇总最近记录的百分位统计
+
+    Args:
+        field (str): 要统计的字段，如 latency / ttft / tokens_per_sec
+        group_by (str): 分组字段，如 endpoint / model
+
+    Returns:
+        dict: 分组 -> {"count", "p50", "p95", "p99", "max"}
+    """
+    groups = {}
+    for entry in recent():
+        value = entry.get(field)
+        if value is not None:
+            groups.setdefault(entry.get(group_by), []).append(value)
+    return {
+        key: {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": max(values)
+        }
+        for key, values in groups.items()
+    }
+
+
+def clear():
+    """
+    清空环形缓冲区
+    """
+    with _lock:
+        _records.clear()
+
+
+class StreamTimer:
+    """
+    流式请求计时器：记录首字节、首个文本分片、总耗时与下行字节数
+
+    Args:
+        endpoint (str): 接口名
+    """
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.status = None
+        self.ttfb = None
+        self.ttft = None
+        self.bytes = 0
+
+    def response_started(self, status):
+        """
+        收到响应头时调用
+        """
+        self.status = status
+        self.ttfb = time.perf_counter() - self.start
+
+    def count(self, blocks):
+        """
+        包装字节块迭代器以统计下行字节数
+        """
+        for block in blocks:
+            self.bytes += len(block)
+            yield block
+
+    async def acount(self, blocks):
+        """
+        count 的异步版本
+        """
+        async for block in blocks:
+            self.bytes += len(block)
+            yield block
+
+    def token(self):
+        """
+        每产出一个文本分片时调用
+        """
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.start
+
+    def finish(self, metadata=None, model=None, error=None, cancelled=False):
+        """
+        流结束时生成并写入指标记录
+
+        Args:
+            metadata (dict, optional): 对话元数据（last_chat_metadata），用于读取 completionTokens
+            model (str, optional): 模型名称
+            error (str, optional): 错误信息
+            cancelled (bool): 是否在完成前被取消
+
+        Returns:
+            dict: 指标记录
+        """
+        total = time.perf_counter() - self.start
+        metadata = metadata or {}
+        tokens = metadata.get("completionTokens") or 0
+        generation = total - self.ttft if self.ttft is not None else None
+        entry = {
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "ok": error is None and self.status == 200,
+            "error": error,
+            "cancelled": cancelled,
+            "latency": total,
+            "bytes": self.bytes,
+            "ttfb": self.ttfb,
+            "ttft": self.ttft,
+            "total": total,
+            "tokens": tokens,
+            "tokens_per_sec": tokens / generation if tokens and generation else None,
+            "model": metadata.get("model") or model
+        }
+        record(entry)
+        return entry
@@ -0,0 +1,136 @@
+# 模型列表缓存模块 - 进程级共享的模型列表，带 TTL、磁盘快照与并发请求合并
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from .config import CONFIG
+from .http_pool import _auth_key
+
+# 按 (base_url, authorization 隔离键) 缓存: 键 -> {"data": ..., "fetched_at": 时间戳}
+_cache = {}
+# 正在进行中的请求: 键 -> Future
+_inflight = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "fetches": 0, "deduped": 0, "snapshot_loads": 0}
+
+
+def _cache_key(bot):
+    """
+    不同用户可见的模型可能不同，缓存按 base_url 与 authorization 一起隔离
+    """
+    return bot.base_url, _auth_key(bot.authorization)
+
+
+def _snapshot_path(key):
+    digest = hashlib.sha256("\n".join(key).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CONFIG["cacheDir"], f"models_{digest}.json")
+
+
+def _load_snapshot(key):
+    """
+    读取磁盘快照（调用方不要持有锁），读到后放入内存缓存
+    """
+    try:
+        with open(_snapshot_path(key), "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    with _lock:
+        _stats["snapshot_loads"] += 1
+        # 读取期间其他线程可能已写入更新的数据，以内存中的为准
+        return _cache.setdefault(key, snapshot)
+
+
+def _save_snapshot(key, entry):
+    """
+    原子写入磁盘快照（调用方不要持有锁）
+    """
+    path = _snapshot_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _fetch(bot, key, future):
+    """
+    发起真实请求并唤醒所有等待同一结果的调用方
+    """
+    try:
+        result = bot.get_model_list()
+    except Exception as e:
+        result = (False, str(e))
+
+    entry = None
+    with _lock:
+        if result[0]:
+            entry = {"data": result[1], "fetched_at": time.time()}
+            _cache[key] = entry
+        _inflight.pop(key, None)
+    future.set_result(result)
+    if entry is not None:
+        _save_snapshot(key, entry)
+    return result
+
+
+def get_model_list(bot):
+    """
+    获取模型列表，接口与 AIClient.get_model_list 相同
+
+    - 内存中未过期（CONFIG["modelListTTL"]）时直接返回；
+    - 进程冷启动时先读取磁盘快照，快照过期则在后台刷新，同时先返回快照内容；
+    - 多个会话同时首次加载时只会发出一次请求，其余调用等待同一结果；
+    - 缓存按 base_url 与 authorization 隔离，不同用户之间互不共享。
+
+    Args:
+        bot (AIClient): 用于请求的客户端实例
+
+    Returns:
+        tuple: (成功状态, 模型列表数据或错误消息)
+    """
+    key = _cache_key(bot)
+    with _lock:
+        entry = _cache.get(key)
+    if entry is None:
+        entry = _load_snapshot(key)
+
+    with _lock:
+        fresh = entry and time.time() - entry["fetched_at"] < CONFIG["modelListTTL"]
+        if fresh:
+            _stats["hits"] += 1
+            return True, entry["data"]
+
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+            _stats["fetches"] += 1
+        elif not entry:
+            _stats["deduped"] += 1
+
+    if entry:
+        # 有过期数据时不阻塞页面：后台刷新，先返回旧数据
+        if leader:
+            threading.Thread(target=_fetch, args=(bot, key, future), name="model-list-refresh", daemon=True).start()
+        with _lock:
+            _stats["hits"] += 1
+        return True, entry["data"]
+
+    if leader:
+        return _fetch(bot, key, future)
+    return future.result()
+
+
+def get_model_cache_stats():
+    """
+    获取模型列表缓存统计
+    """
+    with _lock:
+        return dict(_stats)
@@ -1,17 +1,22 @@
 # 导航模块 - 处理消息导航和跳转功能
 import streamlit as st
 import streamlit.components.v1 as components
+import json
 
-def render_right_sidebar_nav(qa_count):
+def render_right_sidebar_nav(qa_count, collapsed_pages=None, page_size=None):
     """
     渲染右侧固定的导航栏，提供快速跳转到不同消息的功能。
     使用 JS 注入父级 DOM 的方式，确保点击事件 100% 触发。
 
     Args:
         qa_count (int): 对话组数量
+        collapsed_pages (list, optional): 未渲染（折叠）的页码，跳转到这些页时先点击对应的展开按钮
+        page_size (int, optional): 每页的对话组数量
     """
     if qa_count == 0:
         return
+    collapsed = json.dumps(sorted(collapsed_pages or []))
+    page_size = page_size or qa_count
 
     # 这里的 JS 逻辑是：
     # 1. 找到父窗口 (Streamlit 主页面) 的 document
@@ -121,6 +126,12 @@ def render_right_sidebar_nav(qa_count):
                 z-index: 1;
             }}
 
+            /* 尚未渲染的对话：空心点，点击时先展开所在页 */
+            .nav-item-container.collapsed .nav-dot {{
+                background-color: transparent;
+                border-style: dashed;
+            }}
+
             .nav-item-container:hover + .nav-item-container .nav-line {{
                 /* background-color: #ffcccc; 可选：连线变色 */
             }}
@@ -132,15 +143,45 @@ def render_right_sidebar_nav(qa_count):
         navContainer.id = 'ac-pro-right-nav';
 
         var count = {qa_count};
+        var collapsedPages = {collapsed};
+        var pageSize = {page_size};
+        var storage = window.parent.sessionStorage;
+
+        function isCollapsed(i) {{
+            return collapsedPages.indexOf(Math.floor(i / pageSize)) !== -1;
+        }}
+
+        // 上一次点击的目标在折叠页中：展开后的这次渲染里等待锚点出现再滚动过去
+        var pending = storage.getItem('ac-nav-target');
+        if (pending !== null && !isCollapsed(Number(pending))) {{
+            storage.removeItem('ac-nav-target');
+            let tries = 0;
+            let timer = setInterval(function() {{
+                let anchor = parentDoc.getElementById('msg-anchor-' + pending);
+                if (anchor || ++tries > 30) {{
+                    clearInterval(timer);
+                    if (anchor) anchor.scrollIntoView({{ behavior: 'smooth', block: 'start' }});
+                }}
+            }}, 100);
+        }}
 
         for (let i = 0; i < count; i++) {{
             // 容器
             let item = parentDoc.createElement('div');
-            item.className = 'nav-item-container';
+            item.className = isCollapsed(i) ? 'nav-item-container collapsed' : 'nav-item-container';
             item.setAttribute('data-tooltip', '跳转到对话 ' + (i + 1));
 
             // 点击事件
             item.onclick = function() {{
+                // 目标尚未渲染：记下目标并点击所在页的展开按钮，重新渲染后再滚动
+                if (isCollapsed(i)) {{
+                    let button = parentDoc.querySelector('.st-key-chat_page_' + Math.floor(i / pageSize) + ' button');
+                    if (button) {{
+                        storage.setItem('ac-nav-target', i);
+                        button.click();
+                        return;
+                    }}
+                }}
                 // 在父窗口查找锚点
                 let anchor = parentDoc.getElementById('msg-anchor-' + i);
                 if (anchor) {{
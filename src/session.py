@@ -1,6 +1,7 @@
 # Session管理模块 - 处理Streamlit Session State
 import streamlit as st
 from .config import CONFIG
+from .session_cache import SessionStore
 
 # 初始化Session State
 def init_session_state():
@@ -14,7 +15,7 @@ def init_session_state():
     if "status" not in st.session_state:
         st.session_state.status = "未连接"
     if "sessions" not in st.session_state:
-        st.session_state.sessions = []  # 存储会话列表
+        st.session_state.sessions = SessionStore()  # 存储会话列表（带 id 索引）
     if "models" not in st.session_state:
         st.session_state.models = []  # 存储模型列表
     if "selected_model" not in st.session_state:
@@ -0,0 +1,298 @@
+# 会话列表缓存模块 - 带 TTL 的会话列表，变更时本地修补，过期后在后台与服务器对账
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
+import streamlit as st
+from .config import CONFIG
+
+# 后台对账使用的共享线程池
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="session-reconcile")
+
+# 全局递增的版本号，不同 SessionStore 实例之间也不会重复
+_versions = itertools.count(1)
+
+# 侧边栏分组的显示顺序
+GROUP_ORDER = ["📌 已置顶", "今天", "昨天", "过去 7 天", "过去 30 天", "更早", "未知时间"]
+
+
+@lru_cache(maxsize=65536)
+def parse_session_date(timestamp):
+    """
+    把会话的时间戳（秒级整数、ISO 格式或 "%Y-%m-%d %H:%M:%S"）解析为日期，
+    结果按原始值缓存，每个时间戳只解析一次
+
+    Returns:
+        date or None: 无法解析时返回 None
+    """
+    if not timestamp:
+        return None
+    try:
+        if isinstance(timestamp, int):
+            return datetime.fromtimestamp(timestamp).date()
+        clean_ts = str(timestamp).replace('Z', '')
+        dt = datetime.fromisoformat(clean_ts) if 'T' in clean_ts else datetime.strptime(clean_ts, "%Y-%m-%d %H:%M:%S")
+        return dt.date()
+    except (ValueError, TypeError, OverflowError, OSError):
+        return None
+
+
+def session_group(session, today):
+    """
+    会话所属的侧边栏分组
+
+    Args:
+        session (dict): 会话数据
+        today (date): 当天日期（每次渲染只取一次）
+    """
+    if session.get("topSort") == 1:
+        return "📌 已置顶"
+    day = parse_session_date(session.get("updated"))
+    if day is None:
+        return "未知时间"
+    diff_days = (today - day).days
+    if diff_days == 0: return "今天"
+    if diff_days == 1: return "昨天"
+    if diff_days <= 7: return "过去 7 天"
+    if diff_days <= 30: return "过去 30 天"
+    return "更早"
+
+
+def group_sessions(sessions, today):
+    """
+    按 GROUP_ORDER 分组，组内保持传入的顺序
+
+    Returns:
+        list: [(分组名, 会话列表)]，只包含非空分组
+    """
+    groups = {}
+    for session in sessions:
+        groups.setdefault(session_group(session, today), []).append(session)
+    return [(name, groups[name]) for name in GROUP_ORDER if name in groups]
+
+
+class SessionStore:
+    """
+    会话列表：保持服务器返回的顺序，同时维护 id -> 会话 的索引与版本号，
+    增删改时增量更新索引并递增版本号，派生视图按版本号缓存
+
+    Args:
+        sessions (list, optional): 初始会话列表
+    """
+    def __init__(self, sessions=None):
+        self.replace(sessions or [])
+
+    def _changed(self):
+        self.version = next(_versions)
+        self._views = {}
+
+    def replace(self, sessions):
+        """
+        用完整的会话列表替换当前内容
+        """
+        self._sessions = list(sessions)
+        self._index = {str(s.get("id")): s for s in self._sessions}
+        self._changed()
+
+    def get(self, session_id):
+        """
+        按ID查找会话，O(1)，未找到时返回 None
+        """
+        if session_id is None:
+            return None
+        return self._index.get(str(session_id))
+
+    def add(self, session):
+        """
+        在列表最前面插入会话（已存在同ID会话时先移除旧的）
+        """
+        key = str(session.get("id"))
+        if key in self._index:
+            self._sessions = [s for s in self._sessions if str(s.get("id")) != key]
+        self._sessions.insert(0, session)
+        self._index[key] = session
+        self._changed()
+
+    def patch(self, session_id, changes):
+        """
+        修改会话字段，返回修改后的会话，未找到时返回 None
+        """
+        session = self.get(session_id)
+        if session is not None:
+            session.update(changes)
+            self._changed()
+        return session
+
+    def remove(self, session_id):
+        """
+        删除会话，返回是否删除
+        """
+        session = self._index.pop(str(session_id), None)
+        if session is None:
+            return False
+        self._sessions = [s for s in self._sessions if s is not session]
+        self._changed()
+        return True
+
+    def view(self, name, build):
+        """
+        获取按当前版本号缓存的派生视图，版本变化后重新调用 build(sessions) 生成
+        """
+        if name not in self._views:
+            self._views[name] = build(self._sessions)
+        return self._views[name]
+
+    def sorted(self):
+        """
+        按 (置顶, 更新时间) 倒序排列的会话列表（按版本号缓存，调用方不要修改）
+        """
+        return self.view("sorted", lambda sessions: sorted(
+            sessions, key=lambda x: (x.get('topSort', 0), x.get('updated', '')), reverse=True
+        ))
+
+    def grouped(self, today=None):
+        """
+        按侧边栏分组的会话列表，只在会话列表版本或日期变化时重新计算（调用方不要修改）
+
+        Args:
+            today (date, optional): 当天日期，默认 date.today()
+
+        Returns:
+            list: [(分组名, 会话列表)]
+        """
+        today = today or date.today()
+        return self.view(("grouped", today), lambda sessions: group_sessions(self.sorted(), today))
+
+    def __iter__(self):
+        return iter(self._sessions)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __bool__(self):
+        return bool(self._sessions)
+
+
+def get_session_store():
+    """
+    获取当前用户的会话列表对象（不存在时创建）
+    """
+    store = st.session_state.get("sessions")
+    if not isinstance(store, SessionStore):
+        store = SessionStore(store or [])
+        st.session_state.sessions = store
+    return store
+
+
+def get_session(session_id):
+    """
+    按ID查找会话，未找到时返回 None
+    """
+    return get_session_store().get(session_id)
+
+
+def set_sessions(sessions):
+    """
+    用服务器返回的完整会话列表替换缓存，并重置 TTL
+    """
+    get_session_store().replace(sessions)
+    st.session_state.sessions_fetched_at = time.monotonic()
+
+
+def load_cached_sessions(sessions, bot):
+    """
+    先用本地缓存的会话列表渲染，同时立即在后台向服务器拉取，结果由 reconcile_sessions 替换
+
+    Args:
+        sessions (list): 本地缓存的会话列表
+        bot (AIClient): 用于拉取会话列表的客户端实例
+    """
+    set_sessions(sessions)
+    st.session_state.sessions_future_started = time.monotonic()
+    st.session_state.sessions_future = _executor.submit(bot.get_sessions)
+
+
+def is_sessions_loaded():
+    """
+    会话列表是否已从服务器加载过
+    """
+    return bool(st.session_state.get("sessions_fetched_at"))
+
+
+def _mark_mutated():
+    st.session_state.sessions_mutated_at = time.monotonic()
+
+
+def add_session(session):
+    """
+    本地插入一个新建的会话（放在列表最前面）
+    """
+    get_session_store().add(session)
+    _mark_mutated()
+
+
+def patch_session(session_id, changes):
+    """
+    本地修改会话字段
+
+    Args:
+        session_id: 会话ID
+        changes (dict): 要修改的字段，如 {"name": "新名称"}
+
+    Returns:
+        dict or None: 修改后的会话，未找到时返回 None
+    """
+    session = get_session_store().patch(session_id, changes)
+    if session is not None:
+        _mark_mutated()
+    return session
+
+
+def remove_session(session_id):
+    """
+    本地删除会话
+    """
+    get_session_store().remove(session_id)
+    _mark_mutated()
+
+
+def new_session_entry(session_id, model, name="New Chat"):
+    """
+    构造新建会话在列表中的占位数据，后台对账时会被服务器数据替换
+    """
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    return {"id": session_id, "name": name, "model": model, "topSort": 0, "created": now, "updated": now}
+
+
+def reconcile_sessions(bot):
+    """
+    每次渲染调用一次：应用已完成的后台对账结果；TTL 过期时在后台重新拉取会话列表
+
+    Args:
+        bot (AIClient): 用于拉取会话列表的客户端实例
+
+    Returns:
+        bool: 本次是否用服务器数据替换了会话列表
+    """
+    replaced = False
+    future = st.session_state.get("sessions_future")
+    if future is not None and future.done():
+        st.session_state.sessions_future = None
+        started_at = st.session_state.get("sessions_future_started", 0)
+        try:
+            success, data = future.result()
+        except Exception:
+            success, data = False, None
+        # 拉取期间发生过本地修补时，结果可能是旧的，丢弃并等待下一次对账
+        if success and st.session_state.get("sessions_mutated_at", 0) <= started_at:
+            set_sessions(data)
+            replaced = True
+        else:
+            st.session_state.sessions_fetched_at = time.monotonic()
+
+    fetched_at = st.session_state.get("sessions_fetched_at", 0)
+    if st.session_state.get("sessions_future") is None and time.monotonic() - fetched_at > CONFIG["sessionListTTL"]:
+        st.session_state.sessions_future_started = time.monotonic()
+        st.session_state.sessions_future = _executor.submit(bot.get_sessions)
+    return replaced
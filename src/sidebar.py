@@ -3,30 +3,18 @@ import streamlit as st
 import streamlit.components.v1 as components
 from .core import AIClient
 from .config import CONFIG
-from datetime import datetime
+from .http_pool import get_pool_stats
+from .attachment_cache import get_attachment_stats
+from .doc_extract import supported_formats
+from .metrics import summarize
+from .utils import open_session_messages
+from .local_store import get_store, owner_key, store_path
+from .session_cache import add_session, patch_session, remove_session, new_session_entry, get_session, get_session_store
+from .stream_worker import active_session_ids
 
 
 # --- 1. 辅助逻辑函数 ---
 
-def get_session_group(timestamp_str, is_pinned=False):
-    if is_pinned: return "📌 已置顶"
-    if not timestamp_str: return "未知时间"
-    try:
-        if isinstance(timestamp_str, int):
-            dt = datetime.fromtimestamp(timestamp_str)
-        else:
-            clean_ts = str(timestamp_str).replace('Z', '')
-            dt = datetime.fromisoformat(clean_ts) if 'T' in clean_ts else datetime.strptime(clean_ts, "%Y-%m-%d %H:%M:%S")
-
-        now = datetime.now()
-        diff_days = (now.date() - dt.date()).days
-        if diff_days == 0: return "今天"
-        if diff_days == 1: return "昨天"
-        if diff_days <= 7: return "过去 7 天"
-        if diff_days <= 30: return "过去 30 天"
-        return "更早"
-    except:
-        return "未知时间"
 def load_session_to_state(session_id, session_name, session_model, user_authorization):
     """加载会话数据到全局状态"""
     if not st.session_state.bot:
@@ -47,24 +35,12 @@ def load_session_to_state(session_id, session_name, session_model, user_authoriz
     st.session_state.messages = [] 
     st.session_state.useFiles = [] 
 
-    success, data = st.session_state.bot.get_chat_records(session_id)
-    if success and data.get("records"):
-        for record in reversed(data["records"]):
-            use_files = record.get("useFiles", []) or []
-            if record.get("userText"):
-                st.session_state.messages.append({
-                    "role": "user", 
-                    "content": record.get("userText"),
-                    "files": use_files, 
-                    "file_name": record.get("fileName", "")
-                })
-            if record.get("aiText"):
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": record.get("aiText"),
-                    "tokens": record.get("completionTokens", 0)
-                })
-            for file in use_files:
+    # 有本地缓存时立即显示缓存，随后增量同步；否则只加载最新一页，更早的记录由聊天区按需加载
+    messages = open_session_messages(st.session_state.bot, session_id)
+    if messages:
+        st.session_state.messages = messages
+        for msg in messages:
+            for file in msg.get("files", []):
                 if not any(f.get("name") == file.get("name") for f in st.session_state.useFiles):
                     st.session_state.useFiles.append(file)
         st.toast(f"已加载: {session_name}", icon="✅")
@@ -244,6 +220,20 @@ def render_model_selector(user_authorization):
             label_visibility="collapsed",
             key="sidebar_model_select"
         )
+        # 选择两个及以上模型时，发送的问题会并发交给这些模型并排回答
+        st.multiselect(
+            "多模型对比",
+            [m["value"] for m in st.session_state.models],
+            key="fanout_models",
+            placeholder="🔀 多模型对比（选择 2 个及以上）",
+            label_visibility="collapsed"
+        )
+        st.toggle(
+            "📄 文档以文本发送",
+            key="doc_text_mode",
+            value=CONFIG["docTextMode"],
+            help=f"{' / '.join(supported_formats())} 附件在本地提取为 Markdown 文本后发送，请求体更小"
+        )
         st.html('<div style="height: 15px;"></div>')
         # 注意：这里的“新建对话”按钮在 stHorizontalBlock 之外
         if st.button("✨ 新建对话", use_container_width=True, type="primary"):
@@ -253,12 +243,9 @@ def render_model_selector(user_authorization):
                 bot = AIClient(user_authorization)
                 ok, msg = bot.create_session(model=selected_val)
                 if ok: 
-                    # --- 修复点：新建成功后，立即同步一次会话列表 ---
-                    # 这样 rerun 后，侧边栏列表中就包含了这个新会话，状态才是一致的
-                    success_list, sessions_data = bot.get_sessions()
-                    if success_list:
-                        st.session_state.sessions = sessions_data
-                    # ---------------------------------------------
+                    # 新建成功后直接在本地列表中插入该会话，rerun 后侧边栏状态即一致，
+                    # 完整数据由 TTL 过期后的后台对账补齐
+                    add_session(new_session_entry(bot.session_id, selected_val))
 
                     load_session_to_state(msg, "New Chat", selected_val, user_authorization)
                 else: 
@@ -267,12 +254,12 @@ def render_model_selector(user_authorization):
         if selected_val != display_model:
             st.session_state.selected_model = selected_val
             if active_session_id:
-                curr_s = next((s for s in st.session_state.sessions if s["id"] == active_session_id), None)
+                curr_s = get_session(active_session_id)
                 if curr_s:
                     bot = AIClient(user_authorization)
                     ok, _ = bot.update_session(active_session_id, {"model": selected_val}, curr_s)
                     if ok:
-                        curr_s["model"] = selected_val
+                        patch_session(active_session_id, {"model": selected_val})
                         st.session_state.current_session_model = selected_val
                         st.toast(f"已切换模型至 {selected_val}", icon="🔄")
                         st.rerun()
@@ -284,23 +271,25 @@ def render_session_list(user_authorization):
     st.text_input("搜索", placeholder="🔍 搜索...", key="search_query", label_visibility="collapsed")
     query = st.session_state.get("search_query", "").lower()
     st.html('<div style="height: 15px;"></div>')
-    if not st.session_state.sessions:
+    store = get_session_store()
+    if not store:
         st.info("暂无历史", icon="📭")
         return
 
-    sessions = st.session_state.sessions
-    if query: sessions = [s for s in sessions if query in (s.get("name") or "").lower()]
-    sessions.sort(key=lambda x: (x.get('topSort', 0), x.get('updated', '')), reverse=True)
+    # 排序与分组结果按 (会话列表版本号, 日期) 缓存，列表未变化时不再重新排序和解析时间
+    grouped = store.grouped()
+    if query:
+        grouped = [(g, [s for s in group if query in (s.get("name") or "").lower()]) for g, group in grouped]
+    active_id = str(st.session_state.bot.session_id) if st.session_state.bot else None
 
-    groups = {}
-    group_order = ["📌 已置顶", "今天", "昨天", "过去 7 天", "更早", "未知时间"]
-    for s in sessions:
-        g = get_session_group(s.get('updated'), is_pinned=s.get('topSort')==1)
-        groups.setdefault(g, []).append(s)
+    streaming_ids = active_session_ids(user_authorization)
+    page_size = CONFIG["sessionPageSize"]
+    group_limits = st.session_state.get("session_group_limits", {})
+    editing_id = st.session_state.get("editing_session")
 
     first_group = True
-    for g_name in group_order:
-        if g_name in groups:
+    for g_name, group in grouped:
+        if group:
             # 物理空行
             st.html('<div style="height: 5px;"></div>')
 
@@ -314,12 +303,16 @@ def render_session_list(user_authorization):
 
             first_group = False
 
-            for s in groups[g_name]:
+            # 分页：每组只渲染前若干个会话，其余通过“显示更多”逐页展开
+            limit = group_limits.get(g_name, page_size) if page_size else len(group)
+            for s in group[:limit]:
                 s_id = s["id"]
                 s_name = s.get("name", "未命名")
+                # 后台仍在生成回复的会话加上标记
+                if str(s_id) in streaming_ids:
+                    s_name = f"⏳ {s_name}"
 
-                is_active = (st.session_state.bot and str(s_id) == str(st.session_state.bot.session_id))
-                is_pinned = s.get("topSort") == 1
+                is_active = str(s_id) == active_id
 
                 # 这种 columns 结构会被 CSS 捕获为 stHorizontalBlock
                 c1, c2 = st.columns([0.85, 0.15])
@@ -331,32 +324,71 @@ def render_session_list(user_authorization):
                         load_session_to_state(s_id, s_name, s.get("model"), user_authorization)
 
                 with c2:
-                    with st.popover(" ", use_container_width=True):
-                        st.markdown(f"**{s_name}**")
-
-                        pin_label = "🚫 取消置顶" if is_pinned else "📌 置顶"
-                        if st.button(pin_label, key=f"pin_{s_id}", use_container_width=True):
-                            bot = AIClient(user_authorization)
-                            if bot.toggle_session_pin(s)[0]:
-                                st.session_state.sessions = bot.get_sessions()[1]
-                                st.rerun()
-
-                        new_name = st.text_input("重命名", value=s_name, key=f"ren_{s_id}")
-                        if new_name != s_name and st.button("确认修改", key=f"ren_btn_{s_id}"):
-                             bot = AIClient(user_authorization)
-                             bot.update_session(s_id, {"name": new_name}, s)
-                             s["name"] = new_name 
-                             st.rerun()
-
-                        st.divider()
-                        if st.button("🗑️ 删除", key=f"del_{s_id}", type="primary", use_container_width=True):
-                            bot = AIClient(user_authorization)
-                            if bot.delete_session(s_id)[0]:
-                                st.session_state.sessions = bot.get_sessions()[1]
-                                if is_active: 
-                                    st.session_state.bot = None
-                                    st.session_state.messages = []
-                                st.rerun()
+                    # 菜单内容只为正在编辑的那一行创建，其余行只有一个按钮
+                    st.button(" ", key=f"menu_{s_id}", on_click=_toggle_session_menu, args=(str(s_id),), use_container_width=True)
+
+                if editing_id == str(s_id):
+                    render_session_menu(s, s_name, is_active, user_authorization)
+
+            if len(group) > limit:
+                st.button(
+                    f"显示更多（还有 {len(group) - limit} 个）",
+                    key=f"more_{g_name}",
+                    on_click=_show_more_sessions,
+                    args=(g_name, limit + page_size),
+                    use_container_width=True
+                )
+
+def _toggle_session_menu(session_id):
+    """
+    打开 / 关闭某个会话的操作菜单（同一时间只有一个）
+    """
+    if st.session_state.get("editing_session") == session_id:
+        st.session_state.editing_session = None
+    else:
+        st.session_state.editing_session = session_id
+
+def _show_more_sessions(group_name, limit):
+    st.session_state.setdefault("session_group_limits", {})[group_name] = limit
+
+def render_session_menu(s, s_name, is_active, user_authorization):
+    """
+    渲染单个会话的操作菜单：置顶 / 重命名 / 删除
+    """
+    s_id = s["id"]
+    is_pinned = s.get("topSort") == 1
+    with st.container(border=True):
+        st.markdown(f"**{s_name}**")
+
+        pin_label = "🚫 取消置顶" if is_pinned else "📌 置顶"
+        if st.button(pin_label, key=f"pin_{s_id}", use_container_width=True):
+            bot = AIClient(user_authorization)
+            if bot.toggle_session_pin(s)[0]:
+                patch_session(s_id, {"topSort": 0 if is_pinned else 1})
+                st.rerun()
+
+        new_name = st.text_input("重命名", value=s_name, key=f"ren_{s_id}")
+        if new_name != s_name and st.button("确认修改", key=f"ren_btn_{s_id}"):
+             bot = AIClient(user_authorization)
+             if bot.update_session(s_id, {"name": new_name}, s)[0]:
+                 patch_session(s_id, {"name": new_name})
+             st.session_state.editing_session = None
+             st.rerun()
+
+        st.divider()
+        if st.button("🗑️ 删除", key=f"del_{s_id}", type="primary", use_container_width=True):
+            bot = AIClient(user_authorization)
+            if bot.delete_session(s_id)[0]:
+                store = get_store()
+                if store:
+                    store.delete_session(owner_key(user_authorization), s_id)
+                remove_session(s_id)
+                st.session_state.editing_session = None
+                if is_active: 
+                    st.session_state.bot = None
+                    st.session_state.messages = []
+                    st.session_state.history_iter = None
+                st.rerun()
 
 def render_config_area():
     with st.expander("⚙️ 设置", expanded=False):
@@ -377,10 +409,14 @@ def render_config_area():
 
         st.divider()
         if "chat_params" not in st.session_state:
-            st.session_state.chat_params = {k: CONFIG[k] for k in ["contextCount", "prompt", "temperature"]}
+            st.session_state.chat_params = {k: CONFIG[k] for k in ["contextCount", "contextTokenBudget", "prompt", "temperature"]}
 
         p = st.session_state.chat_params
         p["contextCount"] = st.slider("Context (上下文)", 1, 100, int(p["contextCount"]))
+        p["contextTokenBudget"] = st.number_input(
+            "上下文 Token 预算", min_value=0, step=1000, value=int(p.get("contextTokenBudget", CONFIG["contextTokenBudget"])),
+            help="超出预算时自动减少携带的上下文条数，0 表示不限制"
+        )
         p["temperature"] = st.slider("Temperature (温度)", 0.0, 1.0, float(p["temperature"]), step=0.1)
         p["prompt"] = st.text_area("System Prompt", value=p["prompt"], height=80)
 
@@ -388,6 +424,36 @@ def render_config_area():
             CONFIG.update(p)
             st.toast("配置已保存", icon="✅")
 
+        pool = get_pool_stats()
+        st.caption(f"🔌 连接池: 命中 {pool['hits']} / 未命中 {pool['misses']} · 活跃 {pool['pools']}")
+        CONFIG["localStore"] = st.checkbox(
+            "💾 本地缓存会话与聊天记录", value=CONFIG["localStore"],
+            help=f"开启后会话列表与聊天记录会保存到本机 {store_path()}，切换会话时先显示缓存再增量同步"
+        )
+        store = get_store()
+        if store:
+            st.caption(f"💾 聊天内容已保存到本机: {store_path()}")
+            cache = store.get_stats()
+            st.caption(f"💾 本地缓存: 命中率 {cache['hit_rate']:.0%} · 节省 {cache['bytes_saved'] / 1024:.1f} KB")
+        attachments = get_attachment_stats()
+        if attachments["hits"] or attachments["misses"]:
+            st.caption(f"📎 附件缓存: 命中 {attachments['hits']} / 未命中 {attachments['misses']} · 节省编码 {attachments['bytes_saved'] / 2**20:.1f} MB")
+        reduction = st.session_state.get("last_upload_reduction")
+        if reduction:
+            st.caption(f"🖼️ 上次图片压缩: {reduction['original'] / 2**20:.1f} MB → {reduction['prepared'] / 2**20:.1f} MB")
+        render_stats = st.session_state.get("last_render_stats")
+        if render_stats:
+            st.caption(f"🖼️ 上次回复: 收到 {render_stats['chunks_received']} 个分片 / 重绘 {render_stats['renders_emitted']} 次")
+        stream_metrics = st.session_state.get("last_stream_metrics")
+        if stream_metrics and stream_metrics.get("ttft") is not None:
+            speed = stream_metrics.get("tokens_per_sec")
+            speed_text = f" · {speed:.1f} tok/s" if speed else ""
+            st.caption(f"⏱️ 上次回复: 首字 {stream_metrics['ttft']:.2f}s · 总耗时 {stream_metrics['total']:.2f}s{speed_text}")
+        latency = summarize("latency")
+        # 按 p95 从慢到快列出接口耗时
+        for endpoint, summary in sorted(latency.items(), key=lambda item: -item[1]["p95"])[:5]:
+            st.caption(f"📈 {endpoint}: p50 {summary['p50'] * 1000:.0f} ms / p95 {summary['p95'] * 1000:.0f} ms · {summary['count']} 次")
+
 # --- 4. 主入口 ---
 
 def render_sidebar():
@@ -0,0 +1,183 @@
+# SSE 解码模块 - 按大块读取字节流，切分事件并快速解析文本分片
+import json
+from json.decoder import scanstring
+from .config import CONFIG
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 文本分片事件的固定前缀/后缀，命中时无需完整 JSON 解析
+STRING_PREFIX = b'{"type":"string","data":"'
+STRING_SUFFIX = b'"}'
+DATA_FIELD = b"data:"
+DONE_MARK = b"[DONE]"
+_PREFIX_LEN = len(STRING_PREFIX)
+_SUFFIX_LEN = len(STRING_SUFFIX)
+_FIELD_LEN = len(DATA_FIELD)
+
+# 解码结果类型
+EVENT_DONE = "done"
+EVENT_STRING = "string"
+EVENT_OBJECT = "object"
+EVENT_INVALID = "invalid"
+
+_json_backend = "json"
+_json_loads = json.loads
+
+
+def set_json_backend(name="auto"):
+    """
+    设置 JSON 解析后端
+
+    Args:
+        name (str): "auto"（优先 orjson）、"orjson" 或 "json"
+
+    Returns:
+        str: 实际生效的后端名称
+    """
+    global _json_backend, _json_loads
+    if name in ("auto", "orjson") and orjson is not None:
+        _json_backend, _json_loads = "orjson", orjson.loads
+    elif name == "orjson":
+        raise ValueError("orjson 未安装")
+    else:
+        _json_backend, _json_loads = "json", json.loads
+    return _json_backend
+
+
+def get_json_backend():
+    """
+    获取当前 JSON 解析后端名称
+    """
+    return _json_backend
+
+
+def decode_event(payload):
+    """
+    解析单个 data 字段的内容
+
+    Args:
+        payload (bytes): "data:" 之后、去除首尾空白的字节串
+
+    Returns:
+        tuple: (事件类型, 值)，文本分片返回 (EVENT_STRING, str)，其他事件返回 (EVENT_OBJECT, dict)
+    """
+    # 快速路径：{"type":"string","data":"..."}，内容不含转义时直接按 UTF-8 解码
+    if payload.startswith(STRING_PREFIX) and payload.endswith(STRING_SUFFIX):
+        inner = payload[_PREFIX_LEN:-_SUFFIX_LEN]
+        if b"\\" not in inner and b'"' not in inner:
+            try:
+                return EVENT_STRING, inner.decode("utf-8")
+            except UnicodeDecodeError:
+                return EVENT_INVALID, None
+        # 含转义字符时用 json 的 C 字符串扫描器只解析字符串字面量本身，
+        # 字面量必须恰好在结尾的 "}" 之前结束，否则按完整 JSON 解析
+        try:
+            text = payload.decode("utf-8")
+            value, end = scanstring(text, _PREFIX_LEN)
+            if end == len(text) - 1:
+                return EVENT_STRING, value
+        except (UnicodeDecodeError, ValueError):
+            pass
+
+    if payload == DONE_MARK:
+        return EVENT_DONE, None
+
+    try:
+        return EVENT_OBJECT, _json_loads(payload)
+    except Exception:
+        return EVENT_INVALID, None
+
+
+class SSEDecoder:
+    """
+    增量 SSE 解码器：喂入任意大小的字节块，返回其中完整事件的解码结果
+
+    只在字节层面切分换行并匹配 "data:" 前缀，不对每一行做文本解码；
+    文本分片命中快速路径时直接切片解码，不经过 JSON 解析。
+    """
+    def __init__(self):
+        self._tail = b""
+
+    def feed(self, block):
+        """
+        喂入一个字节块
+
+        Args:
+            block (bytes): 从连接中读取的原始字节
+
+        Returns:
+            list: 本块中完整事件的 (事件类型, 值)，已跳过无法解析的事件
+        """
+        lines = (self._tail + block if self._tail else block).split(b"\n")
+        # 最后一段没有换行结尾，留到下一个字节块
+        self._tail = lines.pop()
+        return self._decode_lines(lines)
+
+    def close(self):
+        """
+        流结束时处理缓冲区中没有换行结尾的最后一行
+        """
+        tail, self._tail = self._tail, b""
+        return self._decode_lines([tail]) if tail else []
+
+    def _decode_lines(self, lines):
+        events = []
+        for line in lines:
+            # 事件之间的空行最多，先用最便宜的判断跳过
+            if not line or not line.startswith(DATA_FIELD):
+                continue
+            payload = line[_FIELD_LEN:]
+            # 仅在确有首尾空白时才做 strip
+            if payload[:1] in (b" ", b"\t") or payload[-1:] in (b"\r", b" "):
+                payload = payload.strip()
+            kind, value = decode_event(payload)
+            if kind != EVENT_INVALID:
+                events.append((kind, value))
+        return events
+
+
+def iter_events(blocks):
+    """
+    将字节块迭代器转换为解码后的事件迭代器，遇到 [DONE] 结束
+
+    Args:
+        blocks (iterable): 字节块迭代器，例如 response.iter_content(65536)
+
+    Yields:
+        tuple: (事件类型, 值)，跳过无法解析的事件
+    """
+    decoder = SSEDecoder()
+    for block in blocks:
+        for event in decoder.feed(block):
+            if event[0] == EVENT_DONE:
+                return
+            yield event
+    for event in decoder.close():
+        if event[0] == EVENT_DONE:
+            return
+        yield event
+
+
+async def aiter_events(blocks):
+    """
+    iter_events 的异步版本
+
+    Args:
+        blocks (async iterable): 异步字节块迭代器，例如 response.aiter_bytes()
+    """
+    decoder = SSEDecoder()
+    async for block in blocks:
+        for event in decoder.feed(block):
+            if event[0] == EVENT_DONE:
+                return
+            yield event
+    for event in decoder.close():
+        if event[0] == EVENT_DONE:
+            return
+        yield event
+
+
+set_json_backend(CONFIG["jsonBackend"])
@@ -0,0 +1,83 @@
+# 流式渲染模块 - 按时间/字节阈值合并流式分片，减少前端重绘次数
+import time
+from .config import CONFIG
+
+
+class RenderScheduler:
+    """
+    渲染调度器：缓冲流式分片，达到时间间隔或字节阈值时才触发一次渲染
+
+    Args:
+        render_fn (callable): 无参渲染函数，由调用方读取最新内容并重绘
+        interval (float, optional): 最短渲染间隔（秒），默认读取 CONFIG["renderInterval"]
+        max_bytes (int, optional): 累积多少字节后立即渲染，默认读取 CONFIG["renderBytes"]
+    """
+    def __init__(self, render_fn, interval=None, max_bytes=None, clock=time.monotonic):
+        self.render_fn = render_fn
+        self.interval = CONFIG["renderInterval"] if interval is None else interval
+        self.max_bytes = CONFIG["renderBytes"] if max_bytes is None else max_bytes
+        self.clock = clock
+        self.chunks_received = 0
+        self.renders_emitted = 0
+        self._pending_bytes = 0
+        self._pending_chunks = 0
+        # 首个分片到达时立即渲染，保证首字延迟不受影响
+        self._last_flush = float("-inf")
+
+    def push(self, chunk):
+        """
+        接收一个分片，满足条件时触发渲染
+
+        Returns:
+            bool: 本次是否触发了渲染
+        """
+        self.chunks_received += 1
+        self._pending_chunks += 1
+        self._pending_bytes += len(chunk.encode("utf-8")) if chunk else 0
+
+        if self._pending_bytes >= self.max_bytes or self.clock() - self._last_flush >= self.interval:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """
+        立即渲染缓冲内容
+        """
+        self.render_fn()
+        self.renders_emitted += 1
+        self._pending_bytes = 0
+        self._pending_chunks = 0
+        self._last_flush = self.clock()
+
+    def poll(self):
+        """
+        没有新分片到达时调用：缓冲中仍有未渲染的分片且已超过最短间隔时渲染，避免最后几个分片迟迟不显示
+
+        Returns:
+            bool: 本次是否触发了渲染
+        """
+        if self._pending_chunks and self.clock() - self._last_flush >= self.interval:
+            self.flush()
+            return True
+        return False
+
+    def close(self):
+        """
+        流结束时的最终渲染，仅在仍有未渲染分片时执行
+        """
+        if self._pending_chunks:
+            self.flush()
+
+    def stats(self):
+        """
+        获取合并统计
+
+        Returns:
+            dict: chunks_received / renders_emitted / saved_renders
+        """
+        return {
+            "chunks_received": self.chunks_received,
+            "renders_emitted": self.renders_emitted,
+            "saved_renders": self.chunks_received - self.renders_emitted
+        }
@@ -0,0 +1,195 @@
+# 后台流式生成模块 - 每个对话一个后台线程消费 chat_stream，页面重跑或切换会话不会中断生成
+import threading
+import time
+from datetime import datetime
+from .core import AIClient, CancelToken
+from .http_pool import _auth_key
+from .attachment_cache import file_digest
+from .utils import ThinkStreamParser
+
+# 进程级任务表: (authorization 隔离键, 会话ID) -> StreamJob
+_jobs = {}
+_lock = threading.Lock()
+
+# 已结束但一直未被页面取走的任务保留时长（秒）
+FINISHED_JOB_TTL = 600
+
+
+class StreamJob:
+    """
+    一次后台流式生成：线程把分片写入解析器，页面通过 view() 轮询读取
+
+    Args:
+        bot (AIClient): 该任务专用的客户端（与页面上的客户端互不影响）
+        prompt (str): 用户输入
+        file_obj: 上传的文件（可选）
+        context_count (int, optional): 本次携带的上下文条数（由上下文规划决定）
+    """
+    def __init__(self, bot, prompt, file_obj=None, context_count=None):
+        self.bot = bot
+        self.session_id = bot.session_id
+        self.model = bot.model
+        self.prompt = prompt
+        self.context_count = context_count
+        first_file = (file_obj[0] if file_obj else None) if isinstance(file_obj, list) else file_obj
+        self.file_name = getattr(first_file, "name", None)
+        self.file_digest = file_digest(first_file) if first_file else None
+        self.started = datetime.now().strftime("%H:%M:%S")
+        self.finished_at = None
+        self.cancel_token = CancelToken()
+        self.parser = ThinkStreamParser()
+        self.chunks = 0
+        self.renders = 0
+        self._lock = threading.Lock()
+        # 新分片到达或生成结束时唤醒正在跟随的页面
+        self._changed = threading.Condition(self._lock)
+        self._received = []
+        self._thread = threading.Thread(target=self._run, args=(file_obj,), name=f"stream-{self.session_id}", daemon=True)
+        self._thread.start()
+
+    def _run(self, file_obj):
+        try:
+            for chunk in self.bot.chat_stream(self.prompt, file_obj, cancel_token=self.cancel_token,
+                                              context_count=self.context_count):
+                with self._lock:
+                    self.parser.feed(chunk)
+                    self.chunks += 1
+                    self._received.append(chunk)
+                    self._changed.notify_all()
+        except Exception as e:
+            with self._lock:
+                self.parser.feed(f"❌ 网络请求错误: {e}")
+                self._received.append(f"❌ 网络请求错误: {e}")
+        finally:
+            with self._lock:
+                self.finished_at = time.monotonic()
+                self._changed.notify_all()
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    @property
+    def metadata(self):
+        return self.bot.last_chat_metadata
+
+    @property
+    def metrics(self):
+        return self.bot.last_stream_metrics
+
+    def view(self):
+        """
+        获取当前的 (主要内容, 思考内容, 是否正在思考)，每次调用计为一次重绘
+        """
+        with self._lock:
+            self.renders += 1
+            return self.parser.view()
+
+    def wait_for_chunks(self, start, timeout):
+        """
+        等待第 start 个之后的新分片，生成结束或超时后立即返回
+
+        Args:
+            start (int): 调用方已处理的分片数
+            timeout (float): 最长等待时间（秒）
+
+        Returns:
+            list: 新到达的分片（可能为空）
+        """
+        with self._lock:
+            self._changed.wait_for(lambda: len(self._received) > start or self.done, timeout)
+            return self._received[start:]
+
+    def full_text(self):
+        with self._lock:
+            return self.parser.full_text()
+
+    def cancel(self):
+        """
+        停止生成，已生成的部分保留
+        """
+        self.cancel_token.cancel()
+
+    def render_stats(self):
+        """
+        与 RenderScheduler.stats() 相同格式的重绘统计
+        """
+        return {
+            "chunks_received": self.chunks,
+            "renders_emitted": self.renders,
+            "saved_renders": max(self.chunks - self.renders, 0)
+        }
+
+
+def _key(authorization, session_id):
+    return _auth_key(authorization), str(session_id)
+
+
+def _prune(now):
+    """
+    清理早已结束却没有被取走的任务（调用方需持有锁）
+    """
+    for key, job in list(_jobs.items()):
+        if job.done and now - job.finished_at > FINISHED_JOB_TTL:
+            del _jobs[key]
+
+
+def start_stream(bot, prompt, file_obj=None, model=None, context_count=None):
+    """
+    在后台为当前会话启动一次流式生成
+
+    Args:
+        bot (AIClient): 页面上的客户端，用于复制 authorization、base_url 与会话ID
+        prompt (str): 用户输入
+        file_obj: 上传的文件（可选）
+        model (str, optional): 当前会话模型
+        context_count (int, optional): 本次携带的上下文条数，默认使用配置
+
+    Returns:
+        tuple: (成功状态, StreamJob 或错误消息)
+    """
+    if not bot.session_id:
+        return False, "会话未连接，请先创建或选择会话！"
+
+    key = _key(bot.authorization, bot.session_id)
+    with _lock:
+        _prune(time.monotonic())
+        job = _jobs.get(key)
+        if job is not None and not job.done:
+            return False, "该对话正在生成中，请稍候"
+
+        worker_bot = AIClient(bot.authorization, bot.base_url)
+        worker_bot.session_id = bot.session_id
+        worker_bot.model = model or bot.model
+        job = StreamJob(worker_bot, prompt, file_obj, context_count)
+        _jobs[key] = job
+    return True, job
+
+
+def get_job(authorization, session_id):
+    """
+    获取会话的后台任务（进行中或已结束未取走），没有时返回 None
+    """
+    with _lock:
+        return _jobs.get(_key(authorization, session_id))
+
+
+def pop_finished_job(authorization, session_id):
+    """
+    取走会话已结束的后台任务，任务仍在进行时返回 None
+    """
+    key = _key(authorization, session_id)
+    with _lock:
+        job = _jobs.get(key)
+        if job is None or not job.done:
+            return None
+        return _jobs.pop(key)
+
+
+def active_session_ids(authorization):
+    """
+    获取正在后台生成的会话ID集合
+    """
+    owner = _auth_key(authorization)
+    with _lock:
+        return {session_id for (key_owner, session_id), job in _jobs.items() if key_owner == owner and not job.done}
@@ -49,6 +49,54 @@ global_css = """<style>
     padding: 10px !important;
 }
 
+/* 消息底部工具栏：复制 / 删除按钮由页面级 chat_toolbar 组件统一处理点击 */
+.ac-msg-toolbar {
+    display: flex;
+    flex-direction: row;
+    align-items: center;
+    gap: 8px;
+    flex-wrap: wrap;
+    margin-top: 4px;
+}
+
+.ac-msg-action {
+    border: none;
+    background: transparent;
+    padding: 4px;
+    margin: 0;
+    cursor: pointer;
+    color: #999;
+    width: 24px;
+    height: 24px;
+    line-height: 0;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    transition: color 0.2s ease, transform 0.1s;
+}
+
+.ac-msg-action:hover {
+    color: #FF4B4B;
+}
+
+.ac-msg-action:active {
+    transform: scale(0.9);
+}
+
+.ac-msg-action.copied {
+    color: #21C354;
+}
+
+.ac-msg-action svg {
+    width: 16px;
+    height: 16px;
+    display: block;
+}
+
+.ac-msg-action[data-action="delete"] svg {
+    fill: currentColor;
+}
+
 /* 优化网格布局 */
 [data-testid="stVerticalBlock"] > div[data-testid="stVerticalBlock"] {
     gap: 0.5rem !important;
@@ -0,0 +1,87 @@
+# 上传流模块 - 流式构造带附件的 /chat/completions 请求体，附件按固定大小分块 base64 编码
+import base64
+import json
+from .config import CONFIG
+from .attachment_cache import encode_file, is_cacheable
+
+
+def _read_size():
+    """
+    每次读取的原始字节数，向下取整为 3 的倍数，保证各块的 base64 结果可以直接拼接
+    """
+    return max(3, CONFIG["uploadChunkSize"] // 3 * 3)
+
+
+def _as_list(file_obj):
+    if not file_obj:
+        return []
+    return file_obj if isinstance(file_obj, list) else [file_obj]
+
+
+def file_data_prefix(filename, mime=None):
+    """
+    附件 data 字段的前缀；预处理过的图片带有准确的 MIME 类型，其余按扩展名生成
+    """
+    if mime:
+        return f"data:{mime};base64,"
+    ext = filename.split('.')[-1]
+    return f"data:application/{ext};base64,"
+
+
+def iter_base64(fileobj, read_size=None):
+    """
+    分块读取文件并逐块 base64 编码
+
+    Args:
+        fileobj: 支持 seek/read 的文件对象（如 Streamlit UploadedFile）
+        read_size (int, optional): 每块原始字节数（3 的倍数）
+
+    Yields:
+        bytes: base64 编码后的块
+    """
+    read_size = read_size or _read_size()
+    fileobj.seek(0)
+    while True:
+        block = fileobj.read(read_size)
+        if not block:
+            break
+        yield base64.b64encode(block)
+
+
+def iter_chat_body(payload, file_obj, read_size=None):
+    """
+    流式生成对话请求体：先输出 JSON 外壳，再逐块输出每个附件的 base64 内容，
+    与 json=payload 发送的内容等价；大附件任意时刻只有一块数据在内存中
+
+    Args:
+        payload (dict): 不含附件的请求体（files 字段会被忽略）
+        file_obj: 上传的文件或文件列表
+        read_size (int, optional): 每块原始字节数
+
+    Yields:
+        bytes: 请求体片段，可直接作为 requests 的 data 参数（自动使用分块传输编码）
+    """
+    head = json.dumps({k: v for k, v in payload.items() if k != "files"}, ensure_ascii=False)
+    yield (head[:-1] + ', "files": [').encode("utf-8")
+
+    separator = ""
+    for uploaded_file in _as_list(file_obj):
+        name = uploaded_file.name
+        prefix = file_data_prefix(name, getattr(uploaded_file, "mime", None))
+        yield f'{separator}{{"name": {json.dumps(name, ensure_ascii=False)}, "data": "{prefix}'.encode("utf-8")
+        # 小附件使用按内容哈希缓存的编码结果，大附件逐块编码
+        if is_cacheable(uploaded_file):
+            yield encode_file(uploaded_file)
+        else:
+            yield from iter_base64(uploaded_file, read_size)
+        yield b'"}'
+        separator = ", "
+    yield b"]}"
+
+
+async def aiter_chat_body(payload, file_obj, read_size=None):
+    """
+    iter_chat_body 的异步版本，供 httpx.AsyncClient 的 content 参数使用
+    """
+    for part in iter_chat_body(payload, file_obj, read_size):
+        yield part
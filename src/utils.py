@@ -45,6 +45,121 @@ def process_ai_content(content):
         # 没有<think>标签，返回原内容
         return content, None, False
 
+THINK_OPEN = '<think>'
+THINK_CLOSE = '</think>'
+
+
+class _StrippedBuffer:
+    """
+    始终保持首尾无空白的文本缓冲区，末尾空白暂存在 ws 中，直到后面出现非空白内容
+    """
+    def __init__(self):
+        self.text = ""
+        self.ws = ""
+
+    def append(self, piece):
+        if not self.text:
+            piece = piece.lstrip()
+            if not piece:
+                return
+        stripped = piece.rstrip()
+        if stripped:
+            # 先取出到局部变量再拼接，无其他引用时 CPython 可原地扩容，避免整段复制
+            text, self.text = self.text, ""
+            text += self.ws
+            text += stripped
+            self.text = text
+            self.ws = piece[len(stripped):]
+        else:
+            self.ws += piece
+
+    def value(self, pending=""):
+        if not pending:
+            return self.text
+        return self.text + self.ws + pending if self.text else pending
+
+
+class ThinkStreamParser:
+    """
+    增量解析流式回复中的<think>标签，与 process_ai_content 返回相同的视图
+
+    每次 feed 只扫描新到达的分片，主内容与思考内容分别追加到各自的缓冲区；
+    跨分片被截断的标签会暂存在 _pending 中，等下一个分片到达后再判断。
+    """
+    def __init__(self):
+        self._raw = ""
+        self._main = _StrippedBuffer()
+        self._think = _StrippedBuffer()
+        self._pending = ""
+        self._in_think = False
+        self._seen_think = False
+        self._view = None
+
+    def feed(self, chunk):
+        """
+        追加一个流式分片
+
+        Args:
+            chunk (str): 新到达的文本分片
+        """
+        if not chunk:
+            return
+        self._view = None
+        raw, self._raw = self._raw, ""
+        raw += chunk
+        self._raw = raw
+
+        text = self._pending + chunk
+        self._pending = ""
+        pos = 0
+        while True:
+            tag = THINK_CLOSE if self._in_think else THINK_OPEN
+            target = self._think if self._in_think else self._main
+            idx = text.find(tag, pos)
+            if idx == -1:
+                break
+            target.append(text[pos:idx])
+            pos = idx + len(tag)
+            if self._in_think:
+                # 与 process_ai_content 一致：每个完整思考块后追加空行
+                self._think.append("\n\n")
+                self._in_think = False
+            else:
+                self._in_think = True
+                self._seen_think = True
+
+        # 末尾可能是被截断的标签前缀，暂存到下一个分片
+        tail = text[pos:]
+        for size in range(min(len(tag) - 1, len(tail)), 0, -1):
+            if tag.startswith(tail[-size:]):
+                self._pending = tail[-size:]
+                tail = tail[:-size]
+                break
+        target.append(tail)
+
+    def full_text(self):
+        """
+        获取已接收的原始全文
+        """
+        return self._raw
+
+    def view(self):
+        """
+        获取当前解析结果，在两次 feed 之间会被缓存
+
+        Returns:
+            tuple: (主要内容, 思考内容, 是否正在思考状态)
+        """
+        if self._view is None:
+            if not self._seen_think:
+                self._view = (self._raw, None, False)
+            elif self._in_think:
+                self._view = (self._main.value(), self._think.value(self._pending), True)
+            else:
+                self._view = (self._main.value(self._pending), self._think.value(), False)
+        return self._view
+
+
 # 确保当前会话模型正确设置
 def ensure_current_model():
     """
@@ -52,12 +167,167 @@ def ensure_current_model():
     """
     import streamlit as st
     
-    if st.session_state.bot and st.session_state.bot.session_id and st.session_state.sessions:
-        # 查找当前会话信息
-        for session in st.session_state.sessions:
-            if session.get("id") == st.session_state.bot.session_id:
-                # 更新当前会话模型
-                session_model = session.get("model", st.session_state.selected_model)
-                st.session_state.current_session_model = session_model
-                st.session_state.selected_model = session_model
-                break
+    from .session_cache import get_session
+
+    if st.session_state.bot and st.session_state.bot.session_id:
+        # 按ID查找当前会话信息
+        session = get_session(st.session_state.bot.session_id)
+        if session:
+            # 更新当前会话模型
+            session_model = session.get("model", st.session_state.selected_model)
+            st.session_state.current_session_model = session_model
+            st.session_state.selected_model = session_model
+
+
+# 将接口返回的聊天记录转换为消息格式
+def records_to_messages(records, session_id=None):
+    """
+    将 /chat/record 返回的记录（新→旧）转换为按时间顺序排列的消息列表
+
+    Args:
+        records (list): 聊天记录列表
+        session_id (str, optional): 记录所属会话ID（记录中缺失时使用）
+
+    Returns:
+        list: 消息字典列表
+    """
+    messages = []
+    for record in reversed(records or []):
+        common = {
+            "model": record.get("model", ""),
+            "cid": record.get("id", ""),
+            "sid": record.get("sessionId") or session_id or "",
+            "taskId": record.get("taskId", "")
+        }
+        if record.get("userText"):
+            messages.append({
+                "role": "user",
+                "content": record.get("userText"),
+                "files": record.get("useFiles", []) or [],
+                "file_name": record.get("fileName", ""),
+                "tokens": record.get("promptTokens", 0),
+                "updated": record.get("created", ""),
+                **common
+            })
+        if record.get("aiText"):
+            messages.append({
+                "role": "assistant",
+                "content": record.get("aiText"),
+                "tokens": record.get("completionTokens", 0),
+                "updated": record.get("updated", ""),
+                **common
+            })
+    return messages
+
+# 打开会话的分页历史记录
+def open_chat_history(bot, session_id):
+    """
+    创建会话的分页迭代器并加载最新一页，迭代器保存在 session_state 中供“加载更早消息”使用
+
+    Args:
+        bot (AIClient): 客户端实例
+        session_id (str): 会话ID
+
+    Returns:
+        list: 最新一页的消息列表（无记录或请求失败时为空列表）
+    """
+    import streamlit as st
+    from .local_store import get_store, owner_key
+
+    history = bot.iter_chat_records(session_id)
+    records = next(history, None)
+    st.session_state.history_iter = history if records else None
+
+    store = get_store()
+    if store and records:
+        store.upsert_records(owner_key(bot.authorization), session_id, records)
+    return records_to_messages(records, session_id)
+
+# 打开会话：优先使用本地缓存
+def open_session_messages(bot, session_id):
+    """
+    切换会话时获取要显示的消息。本地有缓存时直接返回缓存内容，并标记在本轮渲染后增量同步；
+    否则从服务器加载最新一页
+
+    Args:
+        bot (AIClient): 客户端实例
+        session_id (str): 会话ID
+
+    Returns:
+        list: 消息列表
+    """
+    import streamlit as st
+    from .local_store import get_store, owner_key
+
+    st.session_state.pending_sync = None
+    store = get_store()
+    cached = store.lookup_records(owner_key(bot.authorization), session_id) if store else []
+    if not cached:
+        return open_chat_history(bot, session_id)
+
+    st.session_state.history_iter = None
+    st.session_state.pending_sync = session_id
+    return records_to_messages(cached, session_id)
+
+# 对缓存渲染的会话执行增量同步
+def sync_pending_history():
+    """
+    在缓存内容渲染完成后，与服务器增量同步当前会话
+
+    Returns:
+        bool: 是否有新的或变化的记录（需要重新渲染）
+    """
+    import streamlit as st
+    from .local_store import get_store, owner_key, sync_session_records
+
+    session_id = st.session_state.get("pending_sync")
+    bot = st.session_state.get("bot")
+    if not session_id:
+        return False
+    st.session_state.pending_sync = None
+    store = get_store()
+    if not store or not bot or str(bot.session_id) != str(session_id):
+        return False
+
+    changed, _, page_size = sync_session_records(bot, session_id)
+    records = store.get_records(owner_key(bot.authorization), session_id)
+
+    # 缓存之外更早的记录仍按页按需加载（与已有消息按 cid 去重）
+    if page_size and len(records) >= page_size:
+        st.session_state.history_iter = bot.iter_chat_records(session_id, start_page=len(records) // page_size + 1)
+
+    if changed:
+        st.session_state.messages = records_to_messages(records, session_id)
+    return bool(changed)
+
+# 加载更早一页的历史消息
+def load_older_messages():
+    """
+    从分页迭代器中取出下一页（更早的）记录并插入到消息列表开头
+
+    Returns:
+        int: 新加载的消息条数，没有更早的记录时返回 0
+    """
+    import streamlit as st
+    from .local_store import get_store, owner_key
+
+    history = st.session_state.get("history_iter")
+    bot = st.session_state.get("bot")
+    if history is None or not bot:
+        return 0
+
+    known = {m.get("cid") for m in st.session_state.messages if m.get("cid")}
+    while True:
+        records = next(history, None)
+        if not records:
+            st.session_state.history_iter = None
+            return 0
+
+        store = get_store()
+        if store:
+            store.upsert_records(owner_key(bot.authorization), bot.session_id, records)
+
+        older = [m for m in records_to_messages(records, bot.session_id) if m.get("cid") not in known]
+        if older:
+            st.session_state.messages = older + st.session_state.messages
+            return len(older)